@@ -12,61 +12,25 @@
 """
 Handles different import attempts to cope with Blender's *Reload script* functionality.
 
+Only the modules listed in :data:`REGISTER_MODULES`, which define the Blender classes of Phobos,
+are imported on startup. All other modules are imported by these or on first use.
+
+If the environment variable ``PHOBOS_PROFILE_IMPORT`` is set, the time spent importing each Phobos
+module and registering the add-on is printed.
+
 Contains also some adjustments to make YAML imports deal with booleans appropriately.
 """
 
 import sys
 import os.path
+import time
 import importlib
-import pkgutil
 
 # TODO double import of basemodule?
 import bpy
 import phobos
 import yaml
 
-def import_submodules(package, recursive=True, verbose=False):
-    """Import all submodules of a module, recursively, including subpackages.
-        If a module is already imported it is reloaded instead.
-        Recursion can be turned off.
-        The imported modules are returned as dictionary.
-
-    Args:
-      package(str | module): package (name or actual module)
-      recursive(bool, optional): recursion active (Default value = True)
-      verbose(bool, optional): import feedback active (Default value = False)
-
-    Returns:
-
-    """
-    modules = sys.modules
-
-    # when using string import initial module first
-    if isinstance(package, str):
-        package = importlib.import_module(package)
-
-    results = {}
-    # iterate over all modules in package path
-    for loader, name, is_pkg in pkgutil.walk_packages(package.__path__):
-        full_name = package.__name__ + '.' + name
-
-        # reload already imported modules
-        if full_name in modules.keys():
-            if verbose:
-                print("RELOAD: ", full_name)
-            results[full_name] = importlib.reload(modules[full_name])
-        # otherwise import them
-        else:
-            if verbose:
-                print("IMPORT: ", full_name)
-            results[full_name] = importlib.import_module(full_name)
-
-        # recursion on submodules
-        if recursive and is_pkg:
-            results.update(import_submodules(full_name))
-    return results
-
-
 bl_info = {
     "name": "Phobos",
     "description": "A toolbox to enable editing of robot models in Blender.",
@@ -131,10 +95,148 @@ def bool_constructor(self, node):
 
 yaml.Loader.add_constructor(u'tag:yaml.org,2002:bool', bool_constructor)
 yaml.SafeLoader.add_constructor(u'tag:yaml.org,2002:bool', bool_constructor)
+# the C loader (used for the definitions, if available) does not share the constructors
+if hasattr(yaml, 'CLoader'):
+    yaml.CLoader.add_constructor(u'tag:yaml.org,2002:bool', bool_constructor)
+
+#: Modules defining the operators, panels and properties registered by Phobos.
+REGISTER_MODULES = (
+    'phobos.phobosgui',
+    'phobos.display',
+    'phobos.operators.generic',
+    'phobos.operators.selection',
+    'phobos.operators.naming',
+    'phobos.operators.editing',
+    'phobos.operators.poses',
+    'phobos.operators.io',
+)
+
+
+class ImportProfiler(object):
+    """Meta path finder measuring the time spent executing each Phobos module when it is imported.
+
+    The measured times include the imports of further modules, which are listed indented below.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.depth = 0
+
+    def find_spec(self, fullname, path, target=None):
+        """Returns the module spec of the remaining finders with a timed loader for Phobos modules.
+
+        Args:
+          fullname(str): name of the imported module
+          path(list): search path of the parent package
+          target(module, optional): module to reload (Default value = None)
+
+        Returns:
+          : ModuleSpec -- spec of the module or None if it is not a Phobos module
+
+        """
+        if not fullname.startswith(__name__ + '.'):
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            spec.loader.exec_module = self.timeExecution(spec.loader.exec_module)
+        return spec
+
+    def timeExecution(self, exec_module):
+        """Wraps the execution of a module to record its duration.
+
+        Args:
+          exec_module(function): exec_module function of the module loader
+
+        Returns:
+          : function -- the timed function
+
+        """
+
+        def timed_exec_module(module):
+            """
 
-# Recursively import all submodules
+            Args:
+              module:
+
+            Returns:
+
+            """
+            index = len(self.records)
+            self.records.append(None)
+            self.depth += 1
+            start = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                self.depth -= 1
+                self.records[index] = (self.depth, module.__name__, time.perf_counter() - start)
+
+        return timed_exec_module
+
+    def report(self):
+        """Returns a table of the measured import times in milliseconds.
+
+        Args:
+
+        Returns:
+          : str -- one line per imported module
+
+        """
+        lines = ['Phobos import profile [ms]:']
+        for record in self.records:
+            if record:
+                depth, name, duration = record
+                lines.append('{0:9.1f}  {1}{2}'.format(duration * 1000, '  ' * depth, name))
+        return '\n'.join(lines)
+
+
+def import_register_modules(verbose=False):
+    """Imports the modules listed in :data:`REGISTER_MODULES`.
+
+    When Blender reloads the scripts, all previously imported Phobos modules are removed first, so
+    that they are executed again once they are imported.
+
+    Args:
+      verbose(bool, optional): import feedback active (Default value = False)
+
+    Returns:
+      : dict -- the imported modules
+
+    """
+    for name in [name for name in sys.modules if name.startswith(__name__ + '.')]:
+        if verbose:
+            print("UNLOAD: ", name)
+        del sys.modules[name]
+
+    results = {}
+    for name in REGISTER_MODULES:
+        if verbose:
+            print("IMPORT: ", name)
+        results[name] = importlib.import_module(name)
+    return results
+
+
+importprofiler = None
+if os.environ.get('PHOBOS_PROFILE_IMPORT'):
+    importprofiler = ImportProfiler()
+    sys.meta_path.insert(0, importprofiler)
+
+# Import the registered modules, the others are imported on first use
 print("Importing phobos")
-import_submodules(phobos, verbose=True)
+importstart = time.perf_counter()
+import_register_modules(verbose=True)
+
+if importprofiler:
+    sys.meta_path.remove(importprofiler)
+    print(importprofiler.report())
+    print("Imported Phobos in {0:.1f} ms.".format((time.perf_counter() - importstart) * 1000))
 
 
 def register():
@@ -147,8 +249,11 @@ def register():
     Returns:
 
     """
+    start = time.perf_counter()
     phobos.phobosgui.register()
     bpy.utils.register_module(__name__)
+    if importprofiler:
+        print("Registered Phobos in {0:.1f} ms.".format((time.perf_counter() - start) * 1000))
 
 
 def unregister():
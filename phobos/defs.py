@@ -17,6 +17,7 @@ added to this module at runtime.
 import os
 import glob
 import re
+import pickle
 
 import yaml
 import phobos.phobossystem as phobossystem
@@ -101,21 +102,83 @@ type_properties = {
     "submodel_default": (),
 }
 
+#: Pickled definitions of the categories loaded from the cache, which are unpickled on first use.
+_pendingcategories = {}
+
+
+class DefinitionCategories(dict):
+    """Dictionary of definition categories which are unpickled from the definitions cache on
+    first access (see :func:`loadDefinitions`).
+    """
+
+    def __getitem__(self, key):
+        if key in _pendingcategories:
+            loadCategory(key)
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        if key in _pendingcategories:
+            loadCategory(key)
+        return dict.get(self, key, default)
+
+    def values(self):
+        loadAllCategories()
+        return dict.values(self)
+
+    def items(self):
+        loadAllCategories()
+        return dict.items(self)
+
+
 # definitions of model elements to be read in
-definitions = {
-    'motors': {},
-    'sensors': {},
-    'controllers': {},
-    'algorithms': {},
-    'materials': {},
-    'model': {},
-    'submechanisms': {},
-    'submodeltypes': {},
-}
+definitions = DefinitionCategories(
+    {
+        'motors': {},
+        'sensors': {},
+        'controllers': {},
+        'algorithms': {},
+        'materials': {},
+        'model': {},
+        'submechanisms': {},
+        'submodeltypes': {},
+    }
+)
+
+def_settings = DefinitionCategories({key: {} for key in definitions.keys()})
 
-def_settings = {key: {} for key in definitions.keys()}
+def_subcategories = DefinitionCategories({key: set([]) for key in definitions.keys()})
+
+#: File of the definitions cache.
+definitioncache = os.path.join(phobossystem.getConfigPath(), 'definitions.cache')
+
+# the C implementation of the YAML loader is a lot faster, but not available everywhere
+_YAMLLoader = getattr(yaml, 'CLoader', yaml.Loader)
+
+_expression = re.compile('&.*&')
+
+
+def loadCategory(category):
+    """Unpickles a definition category loaded from the definitions cache.
+
+    Args:
+      category(str): name of the definition category
+
+    Returns:
+
+    """
+    data = _pendingcategories.pop(category, None)
+    if data is None:
+        return
+    catdefinitions, catsettings, catsubcategories = pickle.loads(data)
+    dict.__setitem__(definitions, category, catdefinitions)
+    dict.__setitem__(def_settings, category, catsettings)
+    dict.__setitem__(def_subcategories, category, catsubcategories)
 
-def_subcategories = {key: set([]) for key in definitions.keys()}
+
+def loadAllCategories():
+    """Unpickles all definition categories which have not been used yet."""
+    for category in list(_pendingcategories):
+        loadCategory(category)
 
 
 def updateDefs(defsFolderPath):
@@ -127,6 +190,7 @@ def updateDefs(defsFolderPath):
     Returns:
 
     """
+    loadAllCategories()
     dicts = __parseAllYAML(defsFolderPath)
     for diction in dicts:
         for category in diction:
@@ -170,8 +234,7 @@ def __evaluateString(s):
     # needed for evaluation of strings (see below)
     import math
 
-    p = re.compile('&.*&')
-    for ma in p.findall(s):
+    for ma in _expression.findall(s):
         try:
             s = s.replace(ma, str(eval(ma[1:-1])))
         except ():
@@ -180,6 +243,16 @@ def __evaluateString(s):
     return s
 
 
+def __findYAMLFiles(path):
+    """Returns all .yml files in the given path and its subfolders.
+
+    :param path: path to search
+    :type path: str
+    :return: list -- sorted paths of the YAML files
+    """
+    return sorted(glob.iglob(os.path.join(path, '**/*.yml'), recursive=True))
+
+
 def __parseAllYAML(path):
     """Reads all .yml files in the given path and loads them.
 
@@ -191,14 +264,14 @@ def __parseAllYAML(path):
     :rtype: dict
     """
     dicts = []
-    for file in glob.iglob(os.path.join(path, '**/*.yml'), recursive=True):
+    for file in __findYAMLFiles(path):
         print('  ' + os.path.basename(file))
         try:
             with open(os.path.join(path, file), 'r') as f:
                 tmpstring = f.read()
 
             try:
-                tmpyaml = yaml.load(__evaluateString(tmpstring))
+                tmpyaml = yaml.load(__evaluateString(tmpstring), Loader=_YAMLLoader)
 
                 if not tmpyaml:
                     print(file + " does not contain any yaml information.")
@@ -211,7 +284,75 @@ def __parseAllYAML(path):
     return dicts
 
 
+def __getCacheKey(path):
+    """Returns the key identifying the state of the definition files in the given path.
+
+    The key changes with the Phobos version and the name, modification time and size of every
+    definition file.
+
+    :param path: path of the definition files
+    :type path: str
+    :return: tuple -- key of the definitions
+    """
+    files = []
+    for file in __findYAMLFiles(path):
+        stat = os.stat(file)
+        files.append((os.path.relpath(file, path), stat.st_mtime_ns, stat.st_size))
+    return (version, os.path.abspath(path), tuple(files))
+
+
+def loadDefinitions(defsFolderPath):
+    """Loads the definitions from the definitions cache or, if it is outdated, from the YAML files.
+
+    The cache is read with a single file access. The categories remain pickled until they are
+    first used. If the definition files changed, they are parsed and the cache is rebuilt.
+
+    Args:
+      defsFolderPath(str): path to the folder with yaml files for definitions
+
+    Returns:
+
+    """
+    key = __getCacheKey(defsFolderPath)
+    try:
+        with open(definitioncache, 'rb') as cachefile:
+            cache = pickle.load(cachefile)
+        if cache['key'] == key:
+            for category, data in cache['categories'].items():
+                dict.__setitem__(definitions, category, None)
+                dict.__setitem__(def_settings, category, None)
+                dict.__setitem__(def_subcategories, category, None)
+                _pendingcategories[category] = data
+            print("Loaded definitions from cache:", definitioncache)
+            return
+    except (OSError, EOFError, KeyError, pickle.UnpicklingError, AttributeError, ImportError):
+        pass
+
+    print("Parsing definitions from:", defsFolderPath)
+    updateDefs(defsFolderPath)
+    cache = {
+        'key': key,
+        'categories': {
+            category: pickle.dumps(
+                (
+                    dict.__getitem__(definitions, category),
+                    dict.__getitem__(def_settings, category),
+                    dict.__getitem__(def_subcategories, category),
+                ),
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+            for category in definitions.keys()
+        },
+    }
+    try:
+        os.makedirs(os.path.dirname(definitioncache), exist_ok=True)
+        with open(definitioncache + '.tmp', 'wb') as cachefile:
+            pickle.dump(cache, cachefile, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(definitioncache + '.tmp', definitioncache)
+    except OSError as e:
+        print("Could not write definitions cache:", str(e))
+
+
 # Update definitions from files
 definitionpath = os.path.join(phobossystem.getConfigPath() + '/definitions')
-print("Parsing definitions from:", definitionpath)
-updateDefs(definitionpath)
+loadDefinitions(definitionpath)
@@ -0,0 +1,143 @@
+#!/usr/bin/python3
+# coding=utf-8
+
+# -------------------------------------------------------------------------------
+# This file is part of Phobos, a Blender Add-On to edit robot models.
+# Copyright (C) 2020 University of Bremen & DFKI GmbH Robotics Innovation Center
+#
+# You should have received a copy of the 3-Clause BSD License in the LICENSE file.
+# If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+# -------------------------------------------------------------------------------
+
+"""
+Exports the models of a .blend file inside a background Blender worker.
+
+This is the worker side of the *phobos-export* script, which distributes a list of .blend files
+onto a pool of background Blender processes (see :mod:`phobos.utils.batch`). Every worker opens one
+.blend file and exports the requested roots just like the
+:class:`phobos.operators.io.ExportModelOperator`.
+"""
+
+import os
+import time
+import traceback
+
+import bpy
+
+import phobos.model.models as models
+import phobos.utils.batch as batch
+import phobos.utils.io as ioUtils
+import phobos.utils.naming as nUtils
+import phobos.utils.selection as sUtils
+from phobos.phoboslog import log
+from phobos.io.entities import entity_types
+from phobos.io.meshes import mesh_types
+
+
+def setExportTypes(entitytypes=None, meshtypes=None):
+    """Enables the specified entity and mesh types for export and disables all others.
+
+    If a list is not provided, the export settings stored in the .blend file are kept.
+
+    Args:
+      entitytypes(list of str, optional): entity types to export (Default value = None)
+      meshtypes(list of str, optional): mesh types to export (Default value = None)
+
+    Returns:
+
+    """
+    scene = bpy.context.scene
+    if entitytypes is not None:
+        for entitytype in ioUtils.getEntityTypesForExport():
+            setattr(scene, 'export_entity_' + entitytype, entitytype in entitytypes)
+        for entitytype in entitytypes:
+            if entitytype not in entity_types:
+                log("Unknown entity type {}.".format(entitytype), 'WARNING')
+    if meshtypes is not None:
+        for meshtype in ioUtils.getMeshTypesForExport():
+            setattr(scene, 'export_mesh_' + meshtype, meshtype in meshtypes)
+        for meshtype in meshtypes:
+            if meshtype not in mesh_types:
+                log("Unknown mesh type {}.".format(meshtype), 'WARNING')
+        if meshtypes:
+            ioUtils.getExpSettings().outputMeshtype = meshtypes[0]
+
+
+def exportRoot(root, exportpath):
+    """Derives and exports the model of a root object.
+
+    Errors are collected in the returned result instead of interrupting the batch export.
+
+    Args:
+      root(bpy.types.Object): root object of the model
+      exportpath(str): export root of the model
+
+    Returns:
+      : dict -- result containing status, timings and errors of the export
+
+    """
+    result = {
+        'file': bpy.data.filepath,
+        'root': root.name,
+        'name': '{0}:{1}'.format(os.path.basename(bpy.data.filepath), root.name),
+        'model': nUtils.getModelName(root),
+        'output': exportpath,
+        'status': 'failed',
+        'timings': {},
+        'errors': [],
+    }
+    try:
+        start = time.perf_counter()
+        model = models.deriveModelDictionary(root)
+        result['timings']['derive'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ioUtils.exportModel(model, exportpath)
+        result['timings']['export'] = time.perf_counter() - start
+        result['status'] = 'ok'
+    except Exception:
+        result['errors'].append(traceback.format_exc())
+    return result
+
+
+def runExportWorker():
+    """Exports the roots passed on the command line and writes the worker report.
+
+    This is run inside a background Blender worker started by *phobos-export* with the .blend file
+    of the jobs already opened. A job without a root exports all models of the file.
+
+    Args:
+
+    Returns:
+
+    """
+    jobs, settings, reportfile = batch.readWorkerJobs()
+    setExportTypes(settings.get('entitytypes'), settings.get('meshtypes'))
+    roots = {root.name: root for root in sUtils.getRoots()}
+
+    results = []
+    for job in jobs:
+        exportpath = job.get('output') or ioUtils.getExportPath()
+        if job.get('root'):
+            rootnames = [job['root']]
+        else:
+            rootnames = sorted(roots)
+        if not rootnames:
+            results.append(
+                dict(job, status='failed', timings={}, errors=["No models found in file."])
+            )
+        for rootname in rootnames:
+            if rootname not in roots:
+                results.append(
+                    dict(
+                        job,
+                        name='{0}:{1}'.format(os.path.basename(job['file']), rootname),
+                        status='failed',
+                        timings={},
+                        errors=["No root object {} in file.".format(rootname)],
+                    )
+                )
+                continue
+            log("Exporting {} to {}...".format(rootname, exportpath), 'INFO')
+            results.append(exportRoot(roots[rootname], exportpath))
+    batch.writeWorkerReport(reportfile, results)
@@ -0,0 +1,296 @@
+#!/usr/bin/python3
+# coding=utf-8
+
+# -------------------------------------------------------------------------------
+# This file is part of Phobos, a Blender Add-On to edit robot models.
+# Copyright (C) 2020 University of Bremen & DFKI GmbH Robotics Innovation Center
+#
+# You should have received a copy of the 3-Clause BSD License in the LICENSE file.
+# If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+# -------------------------------------------------------------------------------
+
+"""
+Converts robot model files between formats without building the model in the Blender scene.
+
+The model dictionary returned by an entity importer is completed and handed directly to the entity
+exporters. Only exporters which do not rely on the Blender objects of a model support this.
+Mesh files are deduplicated by content hash using a cache directory, which can be shared by
+multiple workers. The functions are used by the *phobos-convert* script in background Blender
+workers (see :mod:`phobos.utils.batch`).
+"""
+
+import os
+import time
+import traceback
+from datetime import datetime
+
+import bpy
+
+import phobos.utils.batch as batch
+import phobos.utils.io as ioUtils
+from phobos.phoboslog import log
+from phobos.io.entities import entity_types
+from phobos.io.meshes import mesh_types
+from phobos.io.meshes.meshes import importMesh
+
+#: Entity types which can be exported from an imported model dictionary.
+DIRECT_EXPORT_TYPES = ('urdf', 'smurf', 'srdf', 'yaml')
+
+
+def getImportType(filepath):
+    """Returns the entity type which can import the specified file.
+
+    Args:
+      filepath(str): path of the model file
+
+    Returns:
+      : str -- entity type or None if no importer matches the file extension
+
+    """
+    extension = os.path.splitext(filepath)[-1][1:].lower()
+    for entitytype in sorted(entity_types):
+        if (
+            'import' in entity_types[entitytype]
+            and extension in entity_types[entitytype]['extensions']
+        ):
+            return entitytype
+    return None
+
+
+def completeImportedModel(model):
+    """Adds the entries of a derived model dictionary which are missing in an imported model.
+
+    The importers only provide the information contained in the file, while the exporters expect
+    the full model structure of :func:`phobos.model.models.deriveModelDictionary`.
+
+    Args:
+      model(dict): imported model dictionary
+
+    Returns:
+      : dict -- the completed model dictionary
+
+    """
+    for category in (
+        'links',
+        'joints',
+        'sensors',
+        'motors',
+        'controllers',
+        'materials',
+        'meshes',
+        'lights',
+        'groups',
+        'chains',
+    ):
+        model.setdefault(category, {})
+    model.setdefault('submechanisms', [])
+    model.setdefault('date', datetime.now().strftime("%Y%m%d_%H:%M"))
+    model.setdefault('version', 'undefined')
+    model.setdefault('description', '')
+
+    for link in model['links'].values():
+        link.setdefault('inertial', {})
+        link.setdefault('visual', {})
+        link.setdefault('collision', {})
+        link.setdefault('children', [])
+
+    # count material users and convert the imported color values
+    for material in model['materials'].values():
+        material['users'] = 0
+        if 'diffuseColor' not in material and 'diffuse' in material:
+            diffuse = material['diffuse']
+            material['diffuseColor'] = dict(zip(['r', 'g', 'b'], diffuse[:3]))
+            if len(diffuse) > 3:
+                material['transparency'] = 1.0 - diffuse[3]
+        material.setdefault('transparency', 0.0)
+    for link in model['links'].values():
+        for visual in link['visual'].values():
+            if visual.get('material') in model['materials']:
+                model['materials'][visual['material']]['users'] += 1
+    return model
+
+
+def exportMeshFile(sourcepath, meshpath, meshtype, cachedir=None):
+    """Provides a mesh file in the mesh export folder and returns its name without extension.
+
+    Meshes are identified by their content hash. If the cache already contains the mesh in the
+    requested format, it is linked into the export folder. Otherwise the mesh is copied or (for
+    different formats) converted by importing it into Blender and exporting it again.
+
+    Args:
+      sourcepath(str): path of the original mesh file
+      meshpath(str): folder to export the mesh to
+      meshtype(str): mesh type to export
+      cachedir(str, optional): directory of the shared mesh cache (Default value = None)
+
+    Returns:
+      : tuple -- name of the exported mesh and whether it was taken from the cache
+
+    """
+    sourcetype = os.path.splitext(sourcepath)[-1][1:].lower()
+    meshhash = batch.getFileHash(sourcepath, cachedir)
+    meshname = meshhash[:16]
+    targetpath = os.path.join(meshpath, meshname + '.' + meshtype)
+
+    cachedmesh = None
+    if cachedir:
+        cachedmesh = os.path.join(cachedir, 'meshes', meshtype, meshname + '.' + meshtype)
+        if os.path.isfile(cachedmesh):
+            batch.linkOrCopy(cachedmesh, targetpath)
+            return meshname, True
+
+    if sourcetype == meshtype:
+        batch.linkOrCopy(sourcepath, targetpath)
+    else:
+        log("Converting mesh {} to {}.".format(sourcepath, meshtype), 'DEBUG')
+        meshobj = importMesh(sourcepath, sourcetype)
+        meshobj.data.name = meshname
+        os.makedirs(meshpath, exist_ok=True)
+        mesh_types[meshtype]['export'](meshobj, meshpath)
+        bpy.ops.object.select_all(action='DESELECT')
+        meshobj.select = True
+        bpy.ops.object.delete()
+
+    if cachedmesh:
+        batch.linkOrCopy(targetpath, cachedmesh)
+    return meshname, False
+
+
+def exportModelMeshes(model, outpath, meshtype, cachedir=None):
+    """Exports the mesh files referenced by an imported model and updates the mesh references.
+
+    Args:
+      model(dict): imported model dictionary with absolute mesh file paths
+      outpath(str): export root of the model
+      meshtype(str): mesh type to export
+      cachedir(str, optional): directory of the shared mesh cache (Default value = None)
+
+    Returns:
+      : dict -- number of referenced meshes and meshes taken from the cache
+
+    """
+    meshpath = os.path.join(outpath, 'meshes', meshtype)
+    exported = {}
+    stats = {'total': 0, 'cached': 0}
+    for link in model['links'].values():
+        for category in ('visual', 'collision'):
+            for element in link[category].values():
+                geometry = element.get('geometry', {})
+                if geometry.get('type') != 'mesh':
+                    continue
+
+                sourcepath = geometry['filename']
+                if sourcepath not in exported:
+                    if not os.path.isfile(sourcepath):
+                        raise FileNotFoundError("Mesh file not found: " + sourcepath)
+                    exported[sourcepath], cached = exportMeshFile(
+                        sourcepath, meshpath, meshtype, cachedir
+                    )
+                    stats['total'] += 1
+                    stats['cached'] += int(cached)
+                geometry['filename'] = exported[sourcepath]
+    return stats
+
+
+def convertModel(filepath, outpath, entitytypes, meshtype, cachedir=None):
+    """Converts a model file to the specified entity types.
+
+    The model is not created in the Blender scene. Errors are collected in the returned result
+    instead of interrupting a batch conversion.
+
+    Args:
+      filepath(str): path of the model file to convert
+      outpath(str): export root for the converted model
+      entitytypes(list of str): entity types to export
+      meshtype(str): mesh type to export
+      cachedir(str, optional): directory of the shared mesh cache (Default value = None)
+
+    Returns:
+      : dict -- result containing status, timings and errors of the conversion
+
+    """
+    result = {
+        'file': filepath,
+        'output': outpath,
+        'status': 'failed',
+        'timings': {},
+        'errors': [],
+    }
+
+    def timed(name, function, *args):
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            result['timings'][name] = time.perf_counter() - start
+
+    importtype = getImportType(filepath)
+    if not importtype:
+        result['errors'].append("No importer for file " + filepath)
+        return result
+
+    try:
+        model = timed('import', entity_types[importtype]['import'], filepath)
+        if not model:
+            result['errors'].append("Import returned no model.")
+            return result
+        completeImportedModel(model)
+        result['model'] = model['name']
+        result['meshes'] = timed('meshes', exportModelMeshes, model, outpath, meshtype, cachedir)
+    except Exception:
+        result['errors'].append(traceback.format_exc())
+        return result
+
+    for entitytype in entitytypes:
+        if entitytype not in DIRECT_EXPORT_TYPES or 'export' not in entity_types.get(
+            entitytype, {}
+        ):
+            result['errors'].append("Entity type {} can not be converted to.".format(entitytype))
+            continue
+        model_path = os.path.join(outpath, entitytype)
+        os.makedirs(model_path, exist_ok=True)
+        try:
+            # exporters may modify the model, so each one gets its own copy
+            timed(
+                entitytype,
+                entity_types[entitytype]['export'],
+                ioUtils.copy_model(model),
+                model_path,
+            )
+        except Exception:
+            result['errors'].append(traceback.format_exc())
+
+    if not result['errors']:
+        result['status'] = 'ok'
+    return result
+
+
+def runConversionWorker():
+    """Converts the jobs passed on the command line and writes the worker report.
+
+    This is run inside a background Blender worker started by *phobos-convert*.
+
+    Args:
+
+    Returns:
+
+    """
+    jobs, settings, reportfile = batch.readWorkerJobs()
+    meshtype = settings['meshtype']
+    if meshtype not in mesh_types:
+        log("Unknown mesh type {}.".format(meshtype), 'ERROR')
+    bpy.context.scene.phobosexportsettings.outputMeshtype = meshtype
+
+    results = []
+    for job in jobs:
+        log("Converting {}...".format(job['file']), 'INFO')
+        results.append(
+            convertModel(
+                job['file'],
+                job['output'],
+                settings['entitytypes'],
+                meshtype,
+                settings.get('cachedir'),
+            )
+        )
+    batch.writeWorkerReport(reportfile, results)
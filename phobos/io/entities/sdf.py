@@ -1173,12 +1173,11 @@ def exportSDF(model, filepath):
         modelconffile = None
     errors = False
 
-    annotationdict = models.gatherAnnotations(model)
+    annotationdict = models.getAnnotationIndex(model)
     if 'sdf' in annotationdict:
         for category in annotationdict['sdf']:
-            for list_obj in annotationdict['sdf'][category]:
-                model[category + 's'][list_obj['name']].update(list_obj)
-        del annotationdict['sdf']
+            for name, annotation in annotationdict['sdf'][category].items():
+                model[category + 's'][name].update(annotation)
 
     modelconf = exportGazeboModelConf(model)
 
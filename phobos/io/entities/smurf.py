@@ -229,26 +229,25 @@ def exportSmurf(model, path):
     urdf_filename = model['name'] + '.urdf'
 
     # gather annotations and data from text files
-    annotationdict = models.gatherAnnotations(model)
+    annotationdict = models.getAnnotationIndex(model)
 
     # $mars annotated properties overwrite custom properties of objects for smurf
     if 'mars' in annotationdict:
         for category in annotationdict['mars']:
-            for list_obj in annotationdict['mars'][category]:
-                model[category + 's'][list_obj['name']].update(list_obj)
-        del annotationdict['mars']
+            for name, annotation in annotationdict['mars'][category].items():
+                model[category + 's'][name].update(annotation)
 
     for category in annotationdict:
         # TODO use os.path?
-        if category != 'sdf':
+        if category not in ('sdf', 'mars'):
             filenames[category] = model['name'] + '_' + category + '.yml'
             fileorder.append(category)
             exportdata[category] = True
 
     customdatalist = []
-    for text in bpy.data.texts:
-        if text.name.startswith(model['name'] + '::'):
-            dataname = text.name.split('::')[-1]
+    for textname in sorted(ioUtils.getModelTexts(model['name'])):
+        if textname.startswith(model['name'] + '::'):
+            dataname = textname.split('::')[-1]
             customdatalist.append(dataname)
             # TODO use os.path?
             filenames[dataname] = model['name'] + '_' + dataname + '.yml'
@@ -355,7 +354,15 @@ def exportSmurf(model, path):
                 op.write('#' + data + infostring)
                 op.write(
                     yaml.dump(
-                        sort_for_yaml_dump({data: list(model[data].values())}, data),
+                        sort_for_yaml_dump(
+                            {
+                                data: [
+                                    models.removeAnnotations(element)
+                                    for element in model[data].values()
+                                ]
+                            },
+                            data,
+                        ),
                         default_flow_style=False,
                     )
                 )
@@ -381,13 +388,16 @@ def exportSmurf(model, path):
 
     # write additional information
     for category in annotationdict.keys():
-        if category != 'sdf':
+        if category not in ('sdf', 'mars'):
             if exportdata[category]:
                 outstring = '#' + category + infostring
                 for elementtype in annotationdict[category]:
                     outstring += elementtype + ':\n'
                     outstring += (
-                        yaml.dump(annotationdict[category][elementtype], default_flow_style=False)
+                        yaml.dump(
+                            list(annotationdict[category][elementtype].values()),
+                            default_flow_style=False,
+                        )
                         + "\n"
                     )
                 with open(os.path.join(path, filenames[category]), 'w') as op:
@@ -517,5 +527,10 @@ def exportSmurf(model, path):
 
 # registering import/export functions of types with Phobos
 entity_type_dict = {
-    'smurf': {'export': exportSmurf, 'derive': deriveEntity, 'extensions': ('smurf',)}
+    'smurf': {
+        'export': exportSmurf,
+        'derive': deriveEntity,
+        'extensions': ('smurf',),
+        'threadsafe': True,
+    }
 }
@@ -307,4 +307,6 @@ def buildCollisionGroups(self, dic):
 
 
 # registering export functions of types with Phobos
-entity_type_dict = {'srdf': {'export': exportSRDF, 'extensions': ('srdf', 'xml')}}
+entity_type_dict = {
+    'srdf': {'export': exportSRDF, 'extensions': ('srdf', 'xml'), 'threadsafe': True}
+}
@@ -102,8 +102,9 @@ def exportUrdf(model, outpath):
     stored_element_order = None
     # CHECK test Windows path consistency
     order_file_name = model['name'] + '_urdf_order'
-    if order_file_name in bpy.data.texts:
-        stored_element_order = yaml.load(bpy.data.texts[order_file_name].as_string())
+    modeltexts = ioUtils.getModelTexts(model['name'])
+    if order_file_name in modeltexts:
+        stored_element_order = yaml.load(modeltexts[order_file_name])
 
     output = [xmlHeader, indent + '<robot name="' + model['name'] + '">\n\n']
     # export link information
@@ -809,5 +810,10 @@ def parseJoint(joint):
 
 # registering export functions of types with Phobos
 entity_type_dict = {
-    'urdf': {'export': exportUrdf, 'import': importUrdf, 'extensions': ('urdf', 'xml')}
+    'urdf': {
+        'export': exportUrdf,
+        'import': importUrdf,
+        'extensions': ('urdf', 'xml'),
+        'threadsafe': True,
+    }
 }
@@ -37,8 +37,9 @@ def exportYAML(model, path):
             "# created with Phobos {} - https://github.com/dfki-ric/phobos\n\n".format(defs.version)
         )
 
-        # write the yaml dump to the file
-        outputfile.write(yaml.dump(model))
+        # write the yaml dump to the file, without the annotation index derived from the model
+        modeldata = {key: value for key, value in model.items() if key != 'annotationindex'}
+        outputfile.write(yaml.dump(modeldata))
 
 
 # registering export functions of types with Phobos
@@ -9,13 +9,29 @@
 # If not, see <https://opensource.org/licenses/BSD-3-Clause>.
 # -------------------------------------------------------------------------------
 
+"""
+Provides the model library, which lists the models found in the models folder with previews.
+
+The library folder is scanned incrementally using a persistent index (see :func:`scanLibrary`),
+which stores the modification time of every category folder and the hash of every model
+thumbnail. Only changed category folders are listed again and thumbnails are copied to a local
+preview cache. The scan runs in a background thread, while the previews are loaded into the
+:data:`model_previews` collections in small batches on the main thread.
+"""
+
 import os
+import json
+import queue
+import threading
 import bpy
 import bpy.utils.previews
+from bpy.app.handlers import persistent
 import phobos.utils.naming as nUtils
 import phobos.utils.io as ioUtils
 import phobos.utils.blender as bUtils
+import phobos.utils.batch as batch
 from phobos.phoboslog import log
+from phobos.phobossystem import getConfigPath
 from bpy.props import StringProperty, BoolProperty
 
 # FIXME: the global variables get overwritten by the reload function
@@ -25,6 +41,23 @@ model_data = {}
 model_previews = {}
 categories = set([])
 
+#: Version of the library index format, older indices are discarded.
+INDEX_VERSION = 2
+
+#: Number of previews loaded per update on the main thread.
+PREVIEW_BATCH = 10
+
+#: Scanned library indices waiting to be applied on the main thread.
+scanresults = queue.Queue()
+
+#: Library index the model data and previews are currently updated from.
+libraryindex = {}
+
+# preview (type, path) of every loaded model preview per category
+_loadedpreviews = {}
+
+_scanthread = None
+
 
 def getModelListForEnumProperty(self, context):
     """Returns a list of (str, str, str) elements which contains the models
@@ -38,7 +71,7 @@ def getModelListForEnumProperty(self, context):
 
     """
     category = context.window_manager.category
-    if category == '-' or category == '':
+    if category == '-' or category == '' or category not in model_previews:
         return [('-',) * 3]
     return sorted(model_previews[category].enum_items)
 
@@ -62,20 +95,238 @@ def getCategoriesForEnumProperty(self, context):
     return sorted([(item,) * 3 for item in categories])
 
 
-def compileModelList():
-    """TODO Missing documentation"""
-    from bpy.props import EnumProperty
-    from bpy.types import WindowManager
+def getLibraryCacheFolder():
+    """Returns the folder of the library index and the local preview cache.
 
-    # DOCU missing some docstring
-    log("Compiling model list from local library...", "INFO")
+    Args:
 
-    # clear old preview collections
-    for previews in model_previews.values():
-        bpy.utils.previews.remove(previews)
-    model_previews.clear()
-    model_data.clear()
+    Returns:
+      : str -- path of the library cache folder
+
+    """
+    return os.path.join(getConfigPath(), 'library')
+
+
+def loadLibraryIndex(rootpath):
+    """Loads the persistent library index of a models folder.
+
+    Args:
+      rootpath(str): path of the models folder
+
+    Returns:
+      : dict -- the library index or an empty index if there is none for the folder
+
+    """
+    emptyindex = {'version': INDEX_VERSION, 'rootpath': rootpath, 'categories': {}}
+    try:
+        with open(os.path.join(getLibraryCacheFolder(), 'index.json'), 'r') as indexfile:
+            index = json.load(indexfile)
+    except (OSError, ValueError):
+        return emptyindex
+    if index.get('version') != INDEX_VERSION or index.get('rootpath') != rootpath:
+        return emptyindex
+    return index
+
+
+def saveLibraryIndex(index):
+    """Writes the library index to the library cache folder.
+
+    Args:
+      index(dict): the library index
+
+    Returns:
 
+    """
+    try:
+        batch.writeAtomic(
+            os.path.join(getLibraryCacheFolder(), 'index.json'), json.dumps(index, indent=1)
+        )
+    except OSError as e:
+        log("Could not write model library index: " + str(e), 'WARNING')
+
+
+def getModelPreview(modelpath, modelname, previous=None):
+    """Returns the preview entry of a model for the library index.
+
+    Thumbnails are copied to the local preview cache named by their content hash. They are only
+    hashed and copied again, if their modification time or size changed. Models without thumbnail
+    are previewed from their .blend file.
+
+    Args:
+      modelpath(str): folder of the model
+      modelname(str): name of the model
+      previous(dict, optional): preview entry of the model in the previous index (Default value = None)
+
+    Returns:
+      : dict -- type, path and source of the preview
+
+    """
+    thumbnail = os.path.join(modelpath, 'thumbnails', modelname + '.png')
+    try:
+        stat = os.stat(thumbnail)
+    except OSError:
+        blendpath = os.path.join(modelpath, 'blender', modelname + '.blend')
+        return {'type': 'BLEND', 'path': blendpath, 'source': blendpath}
+
+    if (
+        previous
+        and previous.get('source') == thumbnail
+        and previous.get('mtime') == stat.st_mtime_ns
+        and previous.get('size') == stat.st_size
+        and os.path.isfile(previous['path'])
+    ):
+        return previous
+
+    previewhash = batch.getFileHash(thumbnail)
+    previewpath = os.path.join(getLibraryCacheFolder(), 'previews', previewhash + '.png')
+    if not os.path.isfile(previewpath):
+        batch.linkOrCopy(thumbnail, previewpath)
+    return {
+        'type': 'IMAGE',
+        'path': previewpath,
+        'source': thumbnail,
+        'hash': previewhash,
+        'mtime': stat.st_mtime_ns,
+        'size': stat.st_size,
+    }
+
+
+def scanLibrary(rootpath, index):
+    """Scans the models folder and returns the updated library index.
+
+    Category folders whose modification time did not change since the last scan are not listed
+    again. The *blender* folder of every model folder is still checked, and only searched for the
+    .blend file if its modification time changed. This function does not use the Blender API, so
+    it can run in a background thread.
+
+    Args:
+      rootpath(str): path of the models folder
+      index(dict): library index of the previous scan
+
+    Returns:
+      : dict -- the updated library index
+
+    """
+    newindex = {'version': INDEX_VERSION, 'rootpath': rootpath, 'categories': {}}
+    for category in sorted(os.listdir(rootpath)):
+        categorypath = os.path.join(rootpath, category)
+        # skip all non folders
+        if not os.path.isdir(categorypath):
+            continue
+
+        mtime = os.stat(categorypath).st_mtime_ns
+        previous = index['categories'].get(category, {'mtime': None, 'folders': {}, 'models': {}})
+        if previous['mtime'] == mtime:
+            foldernames = sorted(previous['folders'])
+        else:
+            foldernames = sorted(os.listdir(categorypath))
+
+        # check for valid blender savefiles in the model folders
+        folders = {}
+        modelnames = []
+        for modelname in foldernames:
+            blenderpath = os.path.join(categorypath, modelname, 'blender')
+            try:
+                folders[modelname] = os.stat(blenderpath).st_mtime_ns
+            except OSError:
+                folders[modelname] = None
+                continue
+            if folders[modelname] == previous['folders'].get(modelname):
+                valid = modelname in previous['models']
+            else:
+                valid = os.path.exists(os.path.join(blenderpath, modelname + '.blend'))
+            if valid:
+                modelnames.append(modelname)
+
+        models = {}
+        for modelname in modelnames:
+            modelpath = os.path.join(categorypath, modelname)
+            models[modelname] = {
+                'path': modelpath,
+                'preview': getModelPreview(
+                    modelpath, modelname, previous['models'].get(modelname, {}).get('preview')
+                ),
+            }
+        if models:
+            newindex['categories'][category] = {
+                'mtime': mtime,
+                'folders': folders,
+                'models': models,
+            }
+    return newindex
+
+
+def applyLibraryIndex(index, budget=None):
+    """Updates the model data and preview collections from a library index.
+
+    Only new or changed previews are loaded. If a budget is given, at most this many previews are
+    loaded and the function has to be called again until it returns True.
+
+    Args:
+      index(dict): the library index
+      budget(int, optional): maximum number of previews to load (Default value = None)
+
+    Returns:
+      : bool -- True if all previews of the index are loaded
+
+    """
+    complete = True
+    loaded = 0
+    for category in list(model_previews):
+        if category not in index['categories']:
+            bpy.utils.previews.remove(model_previews.pop(category))
+            model_data.pop(category, None)
+            _loadedpreviews.pop(category, None)
+            categories.discard(category)
+
+    i = 0
+    for category, entry in sorted(index['categories'].items()):
+        if category not in model_previews:
+            model_previews[category] = bpy.utils.previews.new()
+        previews = model_previews[category]
+        loadedpreviews = _loadedpreviews.setdefault(category, {})
+        model_data[category] = {
+            modelname: {'path': model['path']} for modelname, model in entry['models'].items()
+        }
+
+        enum_items = []
+        for modelname, model in sorted(entry['models'].items()):
+            preview = (model['preview']['type'], model['preview']['path'])
+            if loadedpreviews.get(modelname) != preview:
+                if budget is not None and loaded >= budget:
+                    complete = False
+                else:
+                    log("Adding model to preview: " + preview[1], 'DEBUG')
+                    previews.load(
+                        modelname, preview[1], preview[0], force_reload=modelname in previews
+                    )
+                    loadedpreviews[modelname] = preview
+                    loaded += 1
+            icon = previews[modelname].icon_id if modelname in previews else 0
+            enum_items.append((modelname, modelname, "", icon, i))
+            i += 1
+        # save the category
+        previews.enum_items = enum_items
+        categories.add(category)
+    return complete
+
+
+def compileModelList(background=True):
+    """Updates the model library from the models folder in the Phobos preferences.
+
+    The models of the stored library index are shown right away. The folder is then scanned in a
+    background thread and the previews are loaded by :func:`updateLibraryPreviews`. Without
+    *background* (or in a background Blender), the library is scanned and loaded synchronously.
+
+    Args:
+      background(bool, optional): scan the library in a background thread (Default value = True)
+
+    Returns:
+
+    """
+    global libraryindex, _scanthread
+
+    log("Compiling model list from local library...", "INFO")
     try:
         rootpath = bUtils.getPhobosPreferences().modelsfolder
     except KeyError:
@@ -86,43 +337,65 @@ def compileModelList():
         log('Model library folder does not exist.')
         return
 
-    # parse the model folder
-    i = 0
-    for category in os.listdir(rootpath):
-        categorypath = os.path.join(rootpath, category)
-        # skip all non folders
-        if not os.path.isdir(categorypath):
-            continue
+    libraryindex = loadLibraryIndex(rootpath)
+    if not background or bpy.app.background:
+        libraryindex = scanLibrary(rootpath, libraryindex)
+        saveLibraryIndex(libraryindex)
+        applyLibraryIndex(libraryindex)
+        log("Finished parsing model folder.", 'INFO')
+        return
 
-        # initialise new dictionaries
-        model_data[category] = {}
-        newpreviewcollection = bpy.utils.previews.new()
-        enum_items = []
+    if _scanthread and _scanthread.is_alive():
+        log("Model library is already being updated.", 'DEBUG')
+        return
 
-        # parse category folder
-        for modelname in os.listdir(categorypath):
-            modelpath = os.path.join(categorypath, modelname)
+    # errors are passed to the main thread, as logging is not thread safe
+    def scan(index):
+        try:
+            scanresults.put(scanLibrary(rootpath, index))
+        except OSError as e:
+            scanresults.put(e)
 
-            # check for valid blender savefile in the model folder
-            if os.path.exists(os.path.join(modelpath, 'blender', modelname + '.blend')):
-                model_data[category][modelname] = {'path': modelpath}
+    _scanthread = threading.Thread(target=scan, args=(libraryindex,), daemon=True)
+    _scanthread.start()
+    if updateLibraryPreviews not in bpy.app.handlers.scene_update_post:
+        bpy.app.handlers.scene_update_post.append(updateLibraryPreviews)
 
-                # use existing thumbnail if available
-                if os.path.exists(os.path.join(modelpath, 'thumbnails')):
-                    previewpath = os.path.join(modelpath, 'thumbnails', modelname + '.png')
-                    preview = newpreviewcollection.load(modelname, previewpath, 'IMAGE')
-                # otherwise create one from the blend file
-                else:
-                    previewpath = os.path.join(modelpath, 'blender', modelname + '.blend')
-                    preview = newpreviewcollection.load(modelname, previewpath, 'BLEND')
-                log("Adding model to preview: " + previewpath, 'DEBUG')
-                enum_items.append((modelname, modelname, "", preview.icon_id, i))
-                i += 1
-                categories.add(category)
-        # save the category
-        newpreviewcollection.enum_items = enum_items
-        model_previews[category] = newpreviewcollection
-        log("Finished parsing model folder. Imported {0} models.".format(i), 'INFO')
+
+@persistent
+def updateLibraryPreviews(scene):
+    """Applies finished library scans and loads the next batch of previews.
+
+    This is called after scene updates until the library is complete.
+
+    Args:
+      scene(bpy.types.Scene): the updated scene
+
+    Returns:
+
+    """
+    global libraryindex
+    try:
+        result = scanresults.get_nowait()
+        if isinstance(result, Exception):
+            log("Could not scan model library: " + str(result), 'ERROR')
+        else:
+            libraryindex = result
+            saveLibraryIndex(libraryindex)
+    except queue.Empty:
+        pass
+
+    if not libraryindex or not libraryindex['categories']:
+        complete = True
+    else:
+        complete = applyLibraryIndex(libraryindex, PREVIEW_BATCH)
+        for window in bpy.context.window_manager.windows:
+            for area in window.screen.areas:
+                area.tag_redraw()
+
+    if complete and scanresults.empty() and not (_scanthread and _scanthread.is_alive()):
+        bpy.app.handlers.scene_update_post.remove(updateLibraryPreviews)
+        log("Finished parsing model folder.", 'INFO')
 
 
 class UpdateModelLibraryOperator(bpy.types.Operator):
@@ -203,7 +476,7 @@ class ImportModelFromLibraryOperator(bpy.types.Operator):
         wm = context.window_manager
         # FIXME: the following is a hack to fix the problem mentioned at the top
         if not model_data:
-            compileModelList()
+            compileModelList(background=False)
         filepath = os.path.join(
             model_data[wm.category][wm.modelpreview]['path'], 'blender', wm.modelpreview + '.blend'
         )
@@ -230,7 +503,10 @@ def register():
 
 def unregister():
     """TODO Missing documentation"""
+    if updateLibraryPreviews in bpy.app.handlers.scene_update_post:
+        bpy.app.handlers.scene_update_post.remove(updateLibraryPreviews)
     for previews in model_previews.values():
         bpy.utils.previews.remove(previews)
     model_previews.clear()
     model_data.clear()
+    _loadedpreviews.clear()
@@ -0,0 +1,265 @@
+#!/usr/bin/python3
+# coding=utf-8
+
+# -------------------------------------------------------------------------------
+# This file is part of Phobos, a Blender Add-On to edit robot models.
+# Copyright (C) 2020 University of Bremen & DFKI GmbH Robotics Innovation Center
+#
+# You should have received a copy of the 3-Clause BSD License in the LICENSE file.
+# If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+# -------------------------------------------------------------------------------
+
+"""
+Contains the pose catalogue, which lists the poses of all models in the models folder.
+
+The catalogue is stored as JSON index in the library cache folder and refreshed incrementally:
+directories are only listed again if their modification time changed, and SMURF and pose files are
+only parsed again if they changed. The baked meshes and previews of the poses are resolved with a
+filename map built from the directory listings instead of searching the folders. Previews of baked
+poses without one are rendered into the library cache (see :mod:`phobos.utils.rendering`).
+"""
+
+import os
+import json
+from collections import OrderedDict
+
+import yaml
+
+import phobos.utils.batch as batch
+import phobos.utils.rendering as rendering
+from phobos.phoboslog import log
+from phobos.io.libraries.models import getLibraryCacheFolder
+
+#: Version of the pose catalogue format, older catalogues are discarded.
+CATALOGUE_VERSION = 1
+
+#: Extensions of the baked pose meshes.
+BAKE_EXTENSIONS = ('.stl', '.obj')
+
+#: Extension of the pose previews.
+PREVIEW_EXTENSION = '.png'
+
+
+def loadCatalogueIndex(rootpath):
+    """Loads the stored pose catalogue index of a models folder.
+
+    Args:
+      rootpath(str): path of the models folder
+
+    Returns:
+      : dict -- the index or an empty index if there is none for the folder
+
+    """
+    emptyindex = {'version': CATALOGUE_VERSION, 'rootpath': rootpath, 'dirs': {}, 'files': {}}
+    try:
+        with open(os.path.join(getLibraryCacheFolder(), 'poses.json'), 'r') as indexfile:
+            index = json.load(indexfile)
+    except (OSError, ValueError):
+        return emptyindex
+    if index.get('version') != CATALOGUE_VERSION or index.get('rootpath') != rootpath:
+        return emptyindex
+    return index
+
+
+def saveCatalogueIndex(index):
+    """Writes the pose catalogue index to the library cache folder.
+
+    Args:
+      index(dict): the pose catalogue index
+
+    Returns:
+
+    """
+    try:
+        batch.writeAtomic(os.path.join(getLibraryCacheFolder(), 'poses.json'), json.dumps(index))
+    except OSError as e:
+        log("Could not write pose catalogue: " + str(e), 'WARNING')
+
+
+def scanDirectories(rootpath, previous):
+    """Returns the listings of all directories below the root path.
+
+    A directory is only listed again if its modification time differs from the previous scan.
+
+    Args:
+      rootpath(str): path of the models folder
+      previous(dict): directory listings of the previous scan
+
+    Returns:
+      : dict -- modification time, files and subdirectories of every directory
+
+    """
+    dirs = {}
+    stack = [rootpath]
+    while stack:
+        dirpath = stack.pop()
+        try:
+            mtime = os.stat(dirpath).st_mtime_ns
+        except OSError:
+            continue
+        listing = previous.get(dirpath)
+        if not listing or listing['mtime'] != mtime:
+            listing = {'mtime': mtime, 'files': [], 'dirs': []}
+            for entry in sorted(os.listdir(dirpath)):
+                if os.path.isdir(os.path.join(dirpath, entry)):
+                    listing['dirs'].append(entry)
+                else:
+                    listing['files'].append(entry)
+        dirs[dirpath] = listing
+        stack.extend(os.path.join(dirpath, subdir) for subdir in listing['dirs'])
+    return dirs
+
+
+def readPoseFiles(dirs, previous):
+    """Reads the model names and poses of all SMURF files found in the directory listings.
+
+    SMURF and pose files whose modification time did not change are not parsed again.
+
+    Args:
+      dirs(dict): directory listings as returned by :func:`scanDirectories`
+      previous(dict): SMURF entries of the previous scan
+
+    Returns:
+      : dict -- modification times, model name and poses of every SMURF file
+
+    """
+    files = {}
+    for dirpath, listing in dirs.items():
+        for filename in listing['files']:
+            if os.path.splitext(filename)[-1] != '.smurf':
+                continue
+            smurfpath = os.path.join(dirpath, filename)
+            entry = previous.get(smurfpath)
+            try:
+                mtime = os.stat(smurfpath).st_mtime_ns
+                if not entry or entry['mtime'] != mtime:
+                    with open(smurfpath, 'r') as robot_smurf:
+                        robot_yml = yaml.load(robot_smurf, Loader=yaml.Loader)
+                    entry = {
+                        'mtime': mtime,
+                        'modelname': robot_yml['modelname'],
+                        'posefiles': {
+                            file: {'mtime': None, 'poses': []}
+                            for file in robot_yml['files']
+                            if file.split('_')[-1] == 'poses.yml'
+                        },
+                    }
+                else:
+                    entry = dict(entry, posefiles=dict(entry['posefiles']))
+
+                for file, posefile in entry['posefiles'].items():
+                    posepath = os.path.join(dirpath, file)
+                    posemtime = os.stat(posepath).st_mtime_ns
+                    if posefile['mtime'] != posemtime:
+                        with open(posepath, 'r') as poses:
+                            poses_yml = yaml.load(poses, Loader=yaml.Loader)
+                        entry['posefiles'][file] = {
+                            'mtime': posemtime,
+                            'poses': [pose['name'] for pose in poses_yml['poses']],
+                        }
+            except (OSError, KeyError, TypeError, yaml.YAMLError) as e:
+                log("Could not read poses of {}: {}".format(smurfpath, str(e)), 'WARNING')
+                continue
+            files[smurfpath] = entry
+    return files
+
+
+def getFilenameMap(dirs):
+    """Maps the file names (without extension) in the directory listings to their paths.
+
+    Args:
+      dirs(dict): directory listings as returned by :func:`scanDirectories`
+
+    Returns:
+      : dict -- list of file paths for every file name without extension
+
+    """
+    filemap = {}
+    for dirpath, listing in dirs.items():
+        for filename in listing['files']:
+            stem = os.path.splitext(filename)[0]
+            filemap.setdefault(stem, []).append(os.path.join(dirpath, filename))
+    return filemap
+
+
+def renderBakePreview(meshpath):
+    """Renders the preview of a baked pose mesh to the library cache.
+
+    The preview is named by the content hash of the mesh, so it is only rendered again if the
+    mesh changed.
+
+    Args:
+      meshpath(str): path of the baked .obj or .stl mesh
+
+    Returns:
+      : str -- path of the preview or an empty string if it could not be rendered
+
+    """
+    cachefolder = getLibraryCacheFolder()
+    try:
+        meshhash = batch.getFileHash(meshpath, cachefolder)
+        previewpath = os.path.join(cachefolder, 'previews', meshhash + PREVIEW_EXTENSION)
+        if not os.path.isfile(previewpath):
+            vertices, triangles = rendering.readMeshFile(meshpath)
+            rendering.writeThumbnail(previewpath, vertices, triangles)
+    except (OSError, ValueError) as e:
+        log("Could not render preview of {}: {}".format(meshpath, str(e)), 'WARNING')
+        return ''
+    return previewpath
+
+
+def getPoseCatalogue(rootpath):
+    """Returns the poses of all models in the models folder and updates the stored catalogue.
+
+    The baked mesh and preview of a pose are searched as *<model>_<pose>.<ext>* in the folder of the
+    model (the parent folder for models in a *smurf* folder) and its direct subfolders. If a pose
+    has a baked mesh but no preview, the preview is rendered from the mesh.
+
+    Args:
+      rootpath(str): path of the models folder
+
+    Returns:
+      : OrderedDict -- list of pose dictionaries (posename, robotpath, model_file, preview) per model
+
+    """
+    index = loadCatalogueIndex(rootpath)
+    dirs = scanDirectories(rootpath, index['dirs']) if os.path.isdir(rootpath) else {}
+    files = readPoseFiles(dirs, index['files'])
+    if dirs != index['dirs'] or files != index['files']:
+        index.update(dirs=dirs, files=files)
+        saveCatalogueIndex(index)
+
+    filemap = getFilenameMap(dirs)
+    catalogue = OrderedDict()
+    for smurfpath in sorted(files):
+        entry = files[smurfpath]
+        if not entry['posefiles']:
+            continue
+        modelname = entry['modelname']
+        robotpath = os.path.dirname(smurfpath)
+        searchpath = robotpath
+        if os.path.split(searchpath)[-1] == 'smurf':
+            searchpath = os.path.dirname(searchpath)
+
+        poses = catalogue.setdefault(modelname, [])
+        for file in sorted(entry['posefiles']):
+            for posename in entry['posefiles'][file]['poses']:
+                pose = {
+                    'posename': posename,
+                    'robotpath': robotpath,
+                    'model_file': '',
+                    'preview': '',
+                }
+                for filepath in filemap.get(modelname + '_' + posename, []):
+                    folder = os.path.dirname(filepath)
+                    if folder != searchpath and os.path.dirname(folder) != searchpath:
+                        continue
+                    extension = os.path.splitext(filepath)[-1].lower()
+                    if extension in BAKE_EXTENSIONS:
+                        pose['model_file'] = filepath
+                    elif extension == PREVIEW_EXTENSION:
+                        pose['preview'] = filepath
+                if pose['model_file'] and not pose['preview']:
+                    pose['preview'] = renderBakePreview(pose['model_file'])
+                poses.append(pose)
+    return catalogue
@@ -0,0 +1,395 @@
+#!/usr/bin/python3
+# coding=utf-8
+
+# -------------------------------------------------------------------------------
+# This file is part of Phobos, a Blender Add-On to edit robot models.
+# Copyright (C) 2020 University of Bremen & DFKI GmbH Robotics Innovation Center
+#
+# You should have received a copy of the 3-Clause BSD License in the LICENSE file.
+# If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+# -------------------------------------------------------------------------------
+
+"""
+Contains the functions for the binary glTF (.glb) mesh type.
+
+Meshes are written directly from their vertex and loop arrays as one indexed triangle primitive.
+Loops with the same position, normal and UV coordinates share one vertex in the vertex buffer.
+Optionally, positions and normals are quantized to 16 and 8 bit integers using the
+*KHR_mesh_quantization* extension.
+
+Like all glTF files, .glb meshes use Y as up axis, which is converted from and to Blender's Z up.
+"""
+
+import os
+import json
+import struct
+
+import numpy
+import bpy
+import bmesh
+import phobos.utils.io as ioUtils
+from phobos.phoboslog import log
+
+#: glTF component types mapped to numpy types.
+COMPONENT_TYPES = {
+    5120: numpy.int8,
+    5121: numpy.uint8,
+    5122: numpy.int16,
+    5123: numpy.uint16,
+    5125: numpy.uint32,
+    5126: numpy.float32,
+}
+
+#: Number of components of the glTF accessor types.
+ACCESSOR_SIZES = {'SCALAR': 1, 'VEC2': 2, 'VEC3': 3, 'VEC4': 4}
+
+#: Conversion of Blender coordinates (Z up) to glTF coordinates (Y up).
+BLENDER_TO_GLTF = numpy.array(((1, 0, 0), (0, 0, 1), (0, -1, 0)), dtype=float)
+
+
+def getMeshArrays(mesh):
+    """Returns the triangulated vertex arrays of a mesh with shared vertices deduplicated.
+
+    Args:
+      mesh(bpy.types.Mesh): mesh to convert
+
+    Returns:
+      : tuple -- position, normal and UV (or None) array per vertex and (m x 3) index array
+
+    """
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    bmesh.ops.triangulate(bm, faces=bm.faces)
+    trimesh = bpy.data.meshes.new('phobos_glb_tmp')
+    bm.to_mesh(trimesh)
+    bm.free()
+    trimesh.calc_normals_split()
+
+    vertices = numpy.empty(len(trimesh.vertices) * 3)
+    trimesh.vertices.foreach_get('co', vertices)
+    loopvertices = numpy.empty(len(trimesh.loops), dtype=numpy.int64)
+    trimesh.loops.foreach_get('vertex_index', loopvertices)
+    normals = numpy.empty(len(trimesh.loops) * 3)
+    trimesh.loops.foreach_get('normal', normals)
+    uvs = None
+    if trimesh.uv_layers.active:
+        uvs = numpy.empty(len(trimesh.loops) * 2)
+        trimesh.uv_layers.active.data.foreach_get('uv', uvs)
+        uvs = uvs.reshape(-1, 2)
+    bpy.data.meshes.remove(trimesh)
+
+    attributes = [vertices.reshape(-1, 3)[loopvertices], normals.reshape(-1, 3)]
+    if uvs is not None:
+        attributes.append(uvs)
+    loopdata = numpy.ascontiguousarray(numpy.hstack(attributes))
+    # identify identical loops by their raw bytes, which works with all numpy versions
+    rows = loopdata.view(numpy.dtype((numpy.void, loopdata.dtype.itemsize * loopdata.shape[1])))
+    _, first, inverse = numpy.unique(rows.ravel(), return_index=True, return_inverse=True)
+    vertexdata = loopdata[first]
+    return (
+        vertexdata[:, 0:3],
+        vertexdata[:, 3:6],
+        vertexdata[:, 6:8] if uvs is not None else None,
+        inverse.reshape(-1, 3),
+    )
+
+
+def writeGlb(filepath, positions, normals, uvs, indices, name='mesh', quantize=False):
+    """Writes a triangle mesh as binary glTF file.
+
+    Args:
+      filepath(str): path of the .glb file
+      positions(numpy.ndarray): (n x 3) vertex positions in Blender coordinates
+      normals(numpy.ndarray): (n x 3) vertex normals in Blender coordinates
+      uvs(numpy.ndarray): (n x 2) UV coordinates or None
+      indices(numpy.ndarray): (m x 3) vertex indices of the triangles
+      name(str, optional): name of the mesh (Default value = 'mesh')
+      quantize(bool, optional): store positions and normals as integers (Default value = False)
+
+    Returns:
+
+    """
+    positions = numpy.asarray(positions, dtype=float).dot(BLENDER_TO_GLTF.T)
+    normals = numpy.asarray(normals, dtype=float).dot(BLENDER_TO_GLTF.T)
+    gltf = {
+        'asset': {'version': '2.0', 'generator': 'Phobos'},
+        'scene': 0,
+        'scenes': [{'nodes': [0]}],
+        'nodes': [{'mesh': 0, 'name': name}],
+        'buffers': [],
+        'bufferViews': [],
+        'accessors': [],
+    }
+    buffer = bytearray()
+
+    def addAccessor(array, componenttype, accessortype, target, normalized=False):
+        """Appends an array as buffer view with accessor and returns the accessor index.
+
+        The elements are padded to multiples of 4 bytes, as required for vertex attributes.
+        """
+        count, components = array.shape
+        data = numpy.ascontiguousarray(array, dtype=COMPONENT_TYPES[componenttype])
+        itemsize = data.dtype.itemsize * components
+        stride = (itemsize + 3) // 4 * 4
+        if target == 34962 and stride != itemsize:
+            padding = (stride - itemsize) // data.dtype.itemsize
+            data = numpy.hstack((data, numpy.zeros((count, padding), dtype=data.dtype)))
+        view = {'buffer': 0, 'byteOffset': len(buffer), 'byteLength': data.nbytes, 'target': target}
+        if target == 34962 and stride != itemsize:
+            view['byteStride'] = stride
+        buffer.extend(data.tobytes())
+        buffer.extend(b'\0' * (-len(buffer) % 4))
+        accessor = {
+            'bufferView': len(gltf['bufferViews']),
+            'componentType': componenttype,
+            'count': count,
+            'type': accessortype,
+        }
+        if normalized:
+            accessor['normalized'] = True
+        gltf['bufferViews'].append(view)
+        gltf['accessors'].append(accessor)
+        return len(gltf['accessors']) - 1
+
+    attributes = {}
+    if quantize and len(positions):
+        low = positions.min(axis=0)
+        scale = (positions.max(axis=0) - low) / 65535
+        scale[scale == 0] = 1
+        quantized = numpy.round((positions - low) / scale)
+        attributes['POSITION'] = addAccessor(quantized, 5123, 'VEC3', 34962)
+        gltf['accessors'][-1]['min'] = quantized.min(axis=0).tolist()
+        gltf['accessors'][-1]['max'] = quantized.max(axis=0).tolist()
+        gltf['nodes'][0]['translation'] = low.tolist()
+        gltf['nodes'][0]['scale'] = scale.tolist()
+        # the node scale transforms normals by its inverse, so they are stored scaled
+        normals = normals * scale
+        lengths = numpy.linalg.norm(normals, axis=1, keepdims=True)
+        lengths[lengths == 0] = 1
+        attributes['NORMAL'] = addAccessor(
+            numpy.round(numpy.clip(normals / lengths, -1, 1) * 127),
+            5120,
+            'VEC3',
+            34962,
+            normalized=True,
+        )
+        gltf['extensionsUsed'] = ['KHR_mesh_quantization']
+        gltf['extensionsRequired'] = ['KHR_mesh_quantization']
+    else:
+        attributes['POSITION'] = addAccessor(positions, 5126, 'VEC3', 34962)
+        if len(positions):
+            gltf['accessors'][-1]['min'] = positions.min(axis=0).tolist()
+            gltf['accessors'][-1]['max'] = positions.max(axis=0).tolist()
+        attributes['NORMAL'] = addAccessor(normals, 5126, 'VEC3', 34962)
+    if uvs is not None:
+        # the V axis of glTF points down
+        uvs = numpy.column_stack((uvs[:, 0], 1 - uvs[:, 1]))
+        attributes['TEXCOORD_0'] = addAccessor(uvs, 5126, 'VEC2', 34962)
+
+    indextype = 5123 if len(positions) < 65536 else 5125
+    indexaccessor = addAccessor(numpy.asarray(indices).reshape(-1, 1), indextype, 'SCALAR', 34963)
+    gltf['meshes'] = [
+        {
+            'name': name,
+            'primitives': [{'attributes': attributes, 'indices': indexaccessor, 'mode': 4}],
+        }
+    ]
+    gltf['buffers'].append({'byteLength': len(buffer)})
+
+    jsonchunk = json.dumps(gltf, separators=(',', ':')).encode('utf-8')
+    jsonchunk += b' ' * (-len(jsonchunk) % 4)
+    length = 12 + 8 + len(jsonchunk) + 8 + len(buffer)
+    with open(filepath, 'wb') as glbfile:
+        glbfile.write(struct.pack('<4sII', b'glTF', 2, length))
+        glbfile.write(struct.pack('<I4s', len(jsonchunk), b'JSON'))
+        glbfile.write(jsonchunk)
+        glbfile.write(struct.pack('<I4s', len(buffer), b'BIN\0'))
+        glbfile.write(bytes(buffer))
+
+
+def readAccessor(gltf, binchunk, index):
+    """Returns the data of a glTF accessor as float or integer array.
+
+    Normalized integer components are converted to floats.
+
+    Args:
+      gltf(dict): glTF JSON content
+      binchunk(bytes): binary chunk of the .glb file
+      index(int): index of the accessor
+
+    Returns:
+      : numpy.ndarray -- (count x components) array
+
+    """
+    accessor = gltf['accessors'][index]
+    view = gltf['bufferViews'][accessor['bufferView']]
+    dtype = numpy.dtype(COMPONENT_TYPES[accessor['componentType']]).newbyteorder('<')
+    components = ACCESSOR_SIZES[accessor['type']]
+    stride = view.get('byteStride', dtype.itemsize * components)
+    data = numpy.ndarray(
+        shape=(accessor['count'], components),
+        dtype=dtype,
+        buffer=binchunk,
+        offset=view.get('byteOffset', 0) + accessor.get('byteOffset', 0),
+        strides=(stride, dtype.itemsize),
+    )
+    if accessor.get('normalized'):
+        maximum = numpy.iinfo(dtype).max
+        return numpy.maximum(data / maximum, -1.0)
+    return numpy.array(data)
+
+
+def getNodeMatrix(node):
+    """Returns the transformation matrix of a glTF node.
+
+    Args:
+      node(dict): glTF node
+
+    Returns:
+      : numpy.ndarray -- 4x4 transformation matrix
+
+    """
+    if 'matrix' in node:
+        return numpy.array(node['matrix'], dtype=float).reshape(4, 4).T
+    x, y, z, w = node.get('rotation', (0, 0, 0, 1))
+    rotation = numpy.array(
+        (
+            (1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)),
+            (2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)),
+            (2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)),
+        )
+    )
+    matrix = numpy.identity(4)
+    matrix[:3, :3] = rotation * numpy.array(node.get('scale', (1, 1, 1)))
+    matrix[:3, 3] = node.get('translation', (0, 0, 0))
+    return matrix
+
+
+def readGlb(filepath):
+    """Reads the triangles of all meshes of a binary glTF file.
+
+    The meshes are transformed by the first node referencing them, node hierarchies are ignored.
+
+    Args:
+      filepath(str): path of the .glb file
+
+    Returns:
+      : tuple -- position array, UV array (or None) and (m x 3) index array in Blender coordinates
+
+    """
+    with open(filepath, 'rb') as glbfile:
+        data = glbfile.read()
+    magic, version, length = struct.unpack('<4sII', data[:12])
+    if magic != b'glTF' or version != 2:
+        raise ValueError("No binary glTF 2.0 file: " + filepath)
+
+    gltf = None
+    binchunk = b''
+    offset = 12
+    while offset < length:
+        chunklength, chunktype = struct.unpack('<I4s', data[offset : offset + 8])
+        chunk = data[offset + 8 : offset + 8 + chunklength]
+        if chunktype == b'JSON':
+            gltf = json.loads(chunk.decode('utf-8'))
+        elif chunktype == b'BIN\0':
+            binchunk = chunk
+        offset += 8 + chunklength
+    if gltf is None:
+        raise ValueError("No JSON chunk in " + filepath)
+
+    meshmatrices = {}
+    for node in gltf.get('nodes', []):
+        if 'mesh' in node and node['mesh'] not in meshmatrices:
+            meshmatrices[node['mesh']] = getNodeMatrix(node)
+
+    positions = []
+    uvs = []
+    indices = []
+    count = 0
+    for meshindex, mesh in enumerate(gltf.get('meshes', [])):
+        matrix = meshmatrices.get(meshindex, numpy.identity(4))
+        for primitive in mesh['primitives']:
+            if primitive.get('mode', 4) != 4:
+                log("Skipping non-triangle primitive in " + filepath, 'WARNING')
+                continue
+            vertices = readAccessor(gltf, binchunk, primitive['attributes']['POSITION'])
+            vertices = vertices.dot(matrix[:3, :3].T) + matrix[:3, 3]
+            if 'indices' in primitive:
+                triangles = readAccessor(gltf, binchunk, primitive['indices']).reshape(-1, 3)
+            else:
+                triangles = numpy.arange(len(vertices)).reshape(-1, 3)
+            if 'TEXCOORD_0' in primitive['attributes']:
+                uv = readAccessor(gltf, binchunk, primitive['attributes']['TEXCOORD_0'])
+                uvs.append(numpy.column_stack((uv[:, 0], 1 - uv[:, 1])))
+            else:
+                uvs.append(numpy.zeros((len(vertices), 2)))
+            positions.append(vertices)
+            indices.append(triangles.astype(numpy.int64) + count)
+            count += len(vertices)
+
+    if not positions:
+        return numpy.zeros((0, 3)), None, numpy.zeros((0, 3), dtype=numpy.int64)
+    hasuvs = any('TEXCOORD_0' in p['attributes'] for m in gltf['meshes'] for p in m['primitives'])
+    return (
+        numpy.vstack(positions).dot(BLENDER_TO_GLTF),
+        numpy.vstack(uvs) if hasuvs else None,
+        numpy.vstack(indices),
+    )
+
+
+def importGlb(filepath):
+    """Imports a binary glTF file as mesh object into the scene.
+
+    Args:
+      filepath(str): path of the .glb file
+
+    Returns:
+      : bpy.types.Object -- the new mesh object
+
+    """
+    positions, uvs, indices = readGlb(filepath)
+    name = os.path.splitext(os.path.basename(filepath))[0]
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(positions))
+    mesh.vertices.foreach_set('co', positions.astype(numpy.float32).ravel())
+    mesh.loops.add(indices.size)
+    mesh.loops.foreach_set('vertex_index', indices.astype(numpy.int32).ravel())
+    mesh.polygons.add(len(indices))
+    mesh.polygons.foreach_set('loop_start', numpy.arange(0, indices.size, 3, dtype=numpy.int32))
+    mesh.polygons.foreach_set('loop_total', numpy.full(len(indices), 3, dtype=numpy.int32))
+    if uvs is not None:
+        mesh.uv_textures.new()
+        loopuvs = uvs[indices.ravel()].astype(numpy.float32)
+        mesh.uv_layers[0].data.foreach_set('uv', loopuvs.ravel())
+    mesh.update(calc_edges=True)
+    mesh.validate()
+
+    obj = bpy.data.objects.new(name, mesh)
+    bpy.context.scene.objects.link(obj)
+    return obj
+
+
+def exportGlb(obj, path):
+    """This function exports the mesh of a specific object to a chosen path as a .glb
+
+    Args:
+      path(str): The path you want the object exported to. *without filename!*
+      obj(bpy.types.Object): The blender object you want to export.
+
+    Returns:
+
+    """
+    positions, normals, uvs, indices = getMeshArrays(obj.data)
+    writeGlb(
+        os.path.join(path, obj.data.name + '.glb'),
+        positions,
+        normals,
+        uvs,
+        indices,
+        name=obj.data.name,
+        quantize=ioUtils.getExpSettings().glb_quantize,
+    )
+
+
+# registering mesh types with Phobos
+mesh_type_dict = {'glb': {'export': exportGlb, 'import': importGlb, 'extensions': ('glb',)}}
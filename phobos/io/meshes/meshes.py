@@ -75,15 +75,20 @@ def importMesh(filepath, meshtype):
 
     """
     # DOCU add some docstring
+    from phobos.io.meshes import mesh_types
+
     # tag all objects
     for obj in bpy.data.objects:
         obj['phobosTag'] = True
 
-    # import mesh
+    # import mesh with any registered mesh type
     try:
-        mesh_type_dict[meshtype]['import'](filepath)
+        importfunction = mesh_types[meshtype]['import']
     except KeyError:
+        importfunction = None
         log('Unknown mesh type: ' + meshtype, 'ERROR')
+    if importfunction:
+        importfunction(filepath)
 
     # find the newly imported obj
     newgeom = None
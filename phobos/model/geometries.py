@@ -10,6 +10,9 @@
 # -------------------------------------------------------------------------------
 
 import os
+import hashlib
+
+import numpy
 import bpy
 import mathutils
 import phobos.defs as defs
@@ -87,6 +90,39 @@ def deriveGeometry(obj, adjust=False, **kwargs):
     return geometry
 
 
+def getMeshHash(mesh):
+    """Returns a hash of the geometry of a mesh datablock.
+
+    The hash covers the vertex coordinates, the faces and the UV coordinates of the mesh, but not
+    its name or the transform of the objects using it. Meshes with the same hash are exported to
+    identical files.
+
+    Args:
+      mesh(bpy.types.Mesh): mesh datablock to hash
+
+    Returns:
+      : str -- hex digest of the mesh content
+
+    """
+    vertices = numpy.empty(len(mesh.vertices) * 3, dtype=numpy.float32)
+    mesh.vertices.foreach_get('co', vertices)
+    loops = numpy.empty(len(mesh.loops), dtype=numpy.int32)
+    mesh.loops.foreach_get('vertex_index', loops)
+    looptotals = numpy.empty(len(mesh.polygons), dtype=numpy.int32)
+    mesh.polygons.foreach_get('loop_total', looptotals)
+
+    sha = hashlib.sha1()
+    sizes = numpy.array([len(vertices), len(loops), len(looptotals)], dtype=numpy.int64)
+    sha.update(sizes.tobytes())
+    for array in (vertices, loops, looptotals):
+        sha.update(array.tobytes())
+    for uvlayer in mesh.uv_layers:
+        uvs = numpy.empty(len(uvlayer.data) * 2, dtype=numpy.float32)
+        uvlayer.data.foreach_get('uv', uvs)
+        sha.update(uvs.tobytes())
+    return sha.hexdigest()
+
+
 def deriveScale(obj):
     """Returns the scale of the specified object.
     
@@ -503,84 +503,143 @@ def inertiaMatrixToList(im):
 
 def fuse_inertia_data(inertials):
     """Computes combined mass, center of mass and inertia given a list of inertial objects.
-    Computation based on Modern Robotics, Lynch & Park, p. 287 .
-    
-    If no inertials are found (None, None, None) is returned.
-    
-    If successful, the tuple contains this information:
-        *mass*: float
-        *com*: mathutils.Vector(3)
-        *inertia*: mathutils.Matrix(3)
+
+    The inertials are expected in the frame of their parent (see :func:`fuseLinkInertias`).
+
+    If no inertials are found, a mass and principal inertias of 1e-3 are returned.
 
     Args:
       inertials(list): the alist of objects relevant for the inertia of a link
 
     Returns:
-      3: tuple of mass, COM and inertia or None(3) if no inertials are found
+      3: tuple of mass, COM and inertia
 
     """
+    return fuseLinkInertias([(None, inertials)])[0]
 
-    from phobos.utils.io import getExpSettings
 
-    expsetting = 10**(-getExpSettings().decimalPlaces)
-
-    # Find objects who have some inertial data
-    for obj in inertials:
-        if not any([True for key in obj.keys() if key.startswith('inertial/')]):
-            inertials.remove(obj)
-
-    # Check for an empty list -> No inertials to fuse
-    if not inertials:
-        return 1e-3, [0.0, 0.0, 0.0], numpy.diag([1e-3, 1e-3, 1e-3])
-
-    fused_inertia = numpy.zeros((3, 3))
-    fused_com = numpy.zeros((1, 3))
-    fused_mass = 0.0
-
-    # Calculate the fused mass and center of mass
-    fused_mass, fused_com = combine_com_3x3(inertials)
-
-    # Check for conformity
-    if fused_mass <= expsetting:
-        log(" Correcting fused mass : negative semidefinite value.", 'WARNING')
-        fused_mass = expsetting if fused_mass < expsetting else fused_mass
-
-    # TODO Maybe we can reuse the functions defined here.
-    # Calculate the fused inertias
-    for obj in inertials:
-        # Get the rotation of the inertia
-        current_Rotation = numpy.array(obj.matrix_local.to_3x3())
-        current_Inertia = numpy.array(inertiaListToMatrix(obj['inertial/inertia']))
-        # Rotate the inertia into the current frame
-        current_Inertia = numpy.dot(
-            numpy.dot(current_Rotation.T, current_Inertia), current_Rotation
-        )
-        # Move the inertia to the center of mass
-        # Get the current relative position of the center of mass
-        relative_position = numpy.array(obj.matrix_local.translation) - fused_com
-        # Calculate the translational influence
-        current_Inertia += obj['inertial/mass'] * (
-            relative_position.T * relative_position * numpy.eye(3)
-            - numpy.outer(relative_position, relative_position)
+def fuseInertiaArrays(masses, coms, inertias, rotations, segments, count, minimum):
+    """Fuses the inertias of rigid bodies into one inertia per segment (e.g. link).
+
+    Computation based on Modern Robotics, Lynch & Park, p. 287. The inertias of all bodies are
+    rotated into their segment frame and shifted to the common center of mass of their segment with
+    the parallel axis theorem in one go. Fused masses up to the minimum are raised to the minimum
+    and fused inertias are repaired to be positive definite by raising their eigenvalues to the
+    minimum.
+
+    Segments without bodies get a mass and principal inertias of 1e-3.
+
+    Args:
+      masses(numpy.ndarray): masses of the bodies (N)
+      coms(numpy.ndarray): centers of mass of the bodies in their segment frame (N x 3)
+      inertias(numpy.ndarray): inertia tensors of the bodies in their own frame (N x 3 x 3)
+      rotations(numpy.ndarray): rotations from the body frames to the segment frames (N x 3 x 3)
+      segments(numpy.ndarray): segment index of every body (N)
+      count(int): number of segments
+      minimum(float): minimal mass and eigenvalue of the fused inertias
+
+    Returns:
+      : tuple -- masses (M), centers of mass (M x 3), inertias (M x 3 x 3) and boolean arrays (M)
+      marking the corrected masses and inertias
+
+    """
+    masses = numpy.asarray(masses, dtype=float)
+    coms = numpy.asarray(coms, dtype=float).reshape(-1, 3)
+    inertias = numpy.asarray(inertias, dtype=float).reshape(-1, 3, 3)
+    rotations = numpy.asarray(rotations, dtype=float).reshape(-1, 3, 3)
+    segments = numpy.asarray(segments, dtype=int)
+
+    # combine masses and centers of mass per segment
+    filled = numpy.bincount(segments, minlength=count) > 0
+    fusedmasses = numpy.bincount(segments, weights=masses, minlength=count).astype(float)
+    moments = numpy.zeros((count, 3))
+    numpy.add.at(moments, segments, masses[:, None] * coms)
+    fusedcoms = numpy.zeros((count, 3))
+    nonzero = fusedmasses != 0
+    fusedcoms[nonzero] = moments[nonzero] / fusedmasses[nonzero, None]
+
+    # rotate the inertias into the segment frames and shift them to the common center of mass
+    rotated = numpy.einsum('nij,njk,nlk->nil', rotations, inertias, rotations)
+    offsets = coms - fusedcoms[segments]
+    steiner = (
+        numpy.einsum('ni,ni->n', offsets, offsets)[:, None, None] * numpy.eye(3)
+        - offsets[:, :, None] * offsets[:, None, :]
+    )
+    fusedinertias = numpy.zeros((count, 3, 3))
+    numpy.add.at(fusedinertias, segments, rotated + masses[:, None, None] * steiner)
+
+    fusedmasses[~filled] = 1e-3
+    fusedinertias[~filled] = 1e-3 * numpy.eye(3)
+
+    # repair masses and inertias which are not positive definite
+    massfixes = fusedmasses <= minimum
+    fusedmasses[massfixes] = minimum
+    eigenvalues, eigenvectors = numpy.linalg.eigh(fusedinertias)
+    inertiafixes = numpy.any(eigenvalues <= minimum, axis=1)
+    if numpy.any(inertiafixes):
+        eigenvalues = numpy.maximum(eigenvalues[inertiafixes], minimum)
+        eigenvectors = eigenvectors[inertiafixes]
+        fusedinertias[inertiafixes] = numpy.einsum(
+            'mij,mj,mkj->mik', eigenvectors, eigenvalues, eigenvectors
         )
-        fused_inertia += numpy.dot(numpy.dot(current_Rotation.T, current_Inertia), current_Rotation)
-
-    # Check the inertia
-    if any(element <= expsetting for element in fused_inertia.diagonal()):
-        log(" Correting fused inertia : negative semidefinite diagonal entries.", 'WARNING')
-        for i in range(3):
-            fused_inertia[i, i] = expsetting if fused_inertia[i, i] <= expsetting else fused_inertia[i, i]
-
-    if any(element <= expsetting for element in numpy.linalg.eigvals(fused_inertia)):
-        log(" Correcting fused inertia : negative semidefinite eigenvalues", 'WARNING')
-        S, V = numpy.linalg.eig(fused_inertia)
-        S[S <= expsetting] = expsetting
-        fused_inertia = V.dot(numpy.diag(S).dot(V.T))
-        # Add minimum value for the inertia
-        for i in range(3):
-            fused_inertia[i, i] += expsetting if fused_inertia[i, i] <= expsetting else fused_inertia[i, i]
-
-    return fused_mass, fused_com, fused_inertia
+    return fusedmasses, fusedcoms, fusedinertias, massfixes & filled, inertiafixes & filled
+
+
+def fuseLinkInertias(linkinertials):
+    """Computes mass, center of mass and inertia of links from their inertial objects.
+
+    The inertial objects of all links are fused in one call of :func:`fuseInertiaArrays`. Their
+    poses are combined up to the link (see :func:`phobos.utils.editing.getCombinedTransform`) or
+    taken from their parent if the link is None. Inertial objects without mass or inertia are
+    ignored.
+
+    If a link has no inertials, a mass and principal inertias of 1e-3 are returned.
+
+    Args:
+      linkinertials(list): tuples of a link object (or None) and the list of its inertial objects
+
+    Returns:
+      : list -- tuple of mass (float), center of mass (list) and inertia (numpy.ndarray) per link
+
+    """
+    from phobos.utils.io import getExpSettings
+
+    minimum = 10 ** (-getExpSettings().decimalPlaces)
+
+    masses, coms, inertias, rotations, segments = [], [], [], [], []
+    for index, (link, inertials) in enumerate(linkinertials):
+        for obj in inertials:
+            if 'inertial/mass' not in obj or 'inertial/inertia' not in obj:
+                continue
+            matrix = eUtils.getCombinedTransform(obj, link) if link else obj.matrix_local
+            masses.append(obj['inertial/mass'])
+            coms.append(matrix.to_translation())
+            rotations.append(matrix.to_quaternion().to_matrix())
+            inertias.append(inertiaListToMatrix(obj['inertial/inertia']))
+            segments.append(index)
+
+    fusedmasses, fusedcoms, fusedinertias, massfixes, inertiafixes = fuseInertiaArrays(
+        masses, coms, inertias, rotations, segments, len(linkinertials), minimum
+    )
+
+    for index, (link, _) in enumerate(linkinertials):
+        linkname = link.name if link else 'link'
+        if massfixes[index]:
+            log(
+                " Correcting fused mass of {}: negative semidefinite value.".format(linkname),
+                'WARNING',
+            )
+        if inertiafixes[index]:
+            log(
+                " Correcting fused inertia of {}: negative semidefinite eigenvalues.".format(
+                    linkname
+                ),
+                'WARNING',
+            )
+    return [
+        (float(mass), list(com), inertia)
+        for mass, com, inertia in zip(fusedmasses, fusedcoms, fusedinertias)
+    ]
 
 
 def combine_com_3x3(objects):
@@ -16,6 +16,7 @@ import yaml
 
 import bpy
 import mathutils
+from bpy.app.handlers import persistent
 
 import phobos.defs as defs
 import phobos.model.links as linkmodel
@@ -29,14 +30,16 @@ import phobos.model.materials as matmodel
 import phobos.model.poses as poses
 import phobos.utils.naming as nUtils
 import phobos.utils.selection as sUtils
+import phobos.utils.hierarchy as hierarchy
 import phobos.utils.blender as bUtils
 import phobos.utils.editing as eUtils
 import phobos.utils.io as ioUtils
+import phobos.utils.profiling as profiling
 from phobos.utils.validation import validate
 from phobos.phoboslog import log
-from phobos.utils.general import roundFloatsInDict, sortListsInDict
+from phobos.utils.general import roundFloatsInDict, sortListsInDict, getPropertyHash
 from phobos.model.poses import deriveObjectPose
-from phobos.model.geometries import deriveGeometry
+from phobos.model.geometries import deriveGeometry, getMeshHash
 from phobos.defs import linkobjignoretypes
 
 
@@ -60,7 +63,7 @@ def collectMaterials(objectlist):
             mat = obj.active_material
             if mat:
                 if mat.name not in materials:
-                    materials[mat.name] = deriveMaterial(mat)
+                    materials[mat.name] = deriveCachedMaterial(mat)
                     materials[mat.name]['users'] = 1
                 else:
                     materials[mat.name]['users'] += 1
@@ -156,8 +159,9 @@ def deriveMaterial(mat, logging=False, errors=None):
     return material
 
 
+@profiling.profiled(item=lambda linkobj, *args, **kwargs: linkobj.name)
 @validate('link')
-def deriveLink(linkobj, objectlist=[], logging=False, errors=None):
+def deriveLink(linkobj, objectlist=[], logging=False, errors=None, fusedinertia=None):
     """Derives a dictionary for the link represented by the provided obj.
     
     If objectlist is provided, only objects contained in the list are taken into account
@@ -180,6 +184,7 @@ def deriveLink(linkobj, objectlist=[], logging=False, errors=None):
     .. seealso deriveInertial (Default value = [])
       logging: (Default value = False)
       errors: (Default value = None)
+      fusedinertia(tuple, optional): mass, center of mass and inertia of the link if already fused (Default value = None)
 
     Returns:
 
@@ -221,10 +226,12 @@ def deriveLink(linkobj, objectlist=[], logging=False, errors=None):
                 props[obj.phobostype][nUtils.getObjectName(obj)] = deriveDictEntry(obj)
 
     # gather the inertials for fusing the link inertia
-    inertials = inertiamodel.gatherInertialChilds(linkobj, objectlist)
+    if fusedinertia is None:
+        inertials = inertiamodel.gatherInertialChilds(linkobj, objectlist)
+        fusedinertia = inertiamodel.fuseLinkInertias([(linkobj, inertials)])[0]
 
     # get inertia data
-    mass, com, inertia = inertiamodel.fuse_inertia_data(inertials)
+    mass, com, inertia = fusedinertia
 
     if not any([mass, com, inertia]):
         if logging:
@@ -530,6 +537,66 @@ def deriveLight(obj):
     return light
 
 
+#: Phobostypes of the (phobostype, object) references replaced in derived dictionaries.
+REFERENCE_TYPES = frozenset(['joint'] + [enum[0] for enum in defs.phobostypes])
+
+#: Parsed custom property layouts per key set, phobostype and ignored types.
+propertylayouts = {}
+
+
+def getPropertyLayout(keys, phobostype=None, ignoretypes=()):
+    """Returns the dictionary slots of custom property keys as parsed by :func:`initObjectProperties`.
+
+    The parsed layout is cached for every unique set of keys, so the keys of objects with the same
+    properties are only parsed once.
+
+    Args:
+      keys(tuple(str)): custom property keys of an object
+      phobostype(str, optional): limit parsing of data fields to this phobostype (Default value = None)
+      ignoretypes(list, optional): property categories which are ignored (Default value = ())
+
+    Returns:
+      : tuple -- (category, specifier) of every key or None for ignored keys, where category is
+      None for keys of the top level
+
+    """
+    if isinstance(ignoretypes, (set, frozenset)):
+        ignorekey = frozenset(ignoretypes)
+    elif isinstance(ignoretypes, list):
+        ignorekey = tuple(ignoretypes)
+    else:
+        ignorekey = ignoretypes
+    cachekey = (keys, phobostype, ignorekey)
+    if cachekey in propertylayouts:
+        return propertylayouts[cachekey]
+
+    layout = []
+    prefix = phobostype + '/' if phobostype else None
+    for key in keys:
+        slot = None
+        # if no phobostype is defined, everything is parsed
+        if not phobostype:
+            slot = (None, key)
+        # remove phobostype namespaces for the object
+        elif key.startswith(prefix):
+            levels = key.count('/')
+            if levels == 1:
+                slot = (None, key[len(prefix) :])
+            # TODO make this work for all levels of hierarchy
+            elif levels == 2:
+                category, specifier = key.split('/')[1:]
+                slot = ('$' + category, specifier)
+        # ignore two-level specifiers if phobostype is not present
+        elif key.count('/') == 1:
+            category, specifier = key.split('/')
+            if category not in ignoretypes:
+                slot = ('$' + category, specifier)
+        layout.append(slot)
+
+    layout = propertylayouts[cachekey] = tuple(layout)
+    return layout
+
+
 def recursive_dictionary_cleanup(dictionary):
     """Recursively enrich the dictionary and replace object links with names etc.
     
@@ -557,7 +624,7 @@ def recursive_dictionary_cleanup(dictionary):
                 if (
                     len(item) == 2
                     and isinstance(item[0], str)
-                    and (item[0] in ['joint'] + [enum[0] for enum in defs.phobostypes])
+                    and item[0] in REFERENCE_TYPES
                     and isinstance(item[1], bpy.types.Object)
                 ):
                     itemlist.append(
@@ -597,36 +664,22 @@ def initObjectProperties(
     # allow duplicated names differentiated by types
     props = {} if ignorename else {'name': nUtils.getObjectName(obj, phobostype)}
 
-    # if no phobostype is defined, everything is parsed
-    if not phobostype:
-        for key, value in obj.items():
-            props[key] = value
-
-    # search for type-specific properties if phobostype is defined
-    else:
-        for key, value in obj.items():
-            # transform Blender id_arrays into lists
-            if hasattr(value, 'to_list'):
-                value = list(value)
-
-            # remove phobostype namespaces for the object
-            if key.startswith(phobostype + '/'):
-                if key.count('/') == 1:
-                    props[key.replace(phobostype + '/', '')] = value
-                # TODO make this work for all levels of hierarchy
-                elif key.count('/') == 2:
-                    category, specifier = key.split('/')[1:]
-                    if '$' + category not in props:
-                        props['$' + category] = {}
-                    props['$' + category][specifier] = value
-
-            # ignore two-level specifiers if phobostype is not present
-            elif key.count('/') == 1:
-                category, specifier = key.split('/')
-                if category not in ignoretypes:
-                    if '$' + category not in props:
-                        props['$' + category] = {}
-                    props['$' + category][specifier] = value
+    # map the custom properties into the dictionary as parsed for their set of keys
+    items = obj.items()
+    layout = getPropertyLayout(tuple(key for key, _ in items), phobostype, ignoretypes)
+    for (key, value), slot in zip(items, layout):
+        if slot is None:
+            continue
+        category, specifier = slot
+        # transform Blender id_arrays into lists
+        if phobostype and hasattr(value, 'to_list'):
+            value = value.to_list()
+        if category is None:
+            props[specifier] = value
+        elif category in props:
+            props[category][specifier] = value
+        else:
+            props[category] = {specifier: value}
 
     # collect phobostype specific annotations from child objects
     if includeannotations:
@@ -746,27 +799,21 @@ def deriveChainEntry(obj):
     returnchains = []
     if 'endChain' in obj:
         chainlist = obj['endChain']
+    ancestors = hierarchy.getLinkTree([obj.name]).getAncestors(obj.name)
     for chainName in chainlist:
-        chainclosed = False
-        parent = obj
         chain = {'name': chainName, 'start': '', 'end': nUtils.getObjectName(obj), 'elements': []}
-        while not chainclosed:
-            # FIXME: use effectiveParent
-            if parent.parent is None:
-                log("Unclosed chain, aborting parsing chain " + chainName, "ERROR")
-                chain = None
+        chain['elements'].append(obj.name)
+        for name in ancestors:
+            parent = bpy.data.objects[name]
+            if 'startChain' in parent and chainName in parent['startChain']:
+                chain['start'] = nUtils.getObjectName(parent)
+                chain['elements'].append(nUtils.getObjectName(parent))
                 break
             chain['elements'].append(parent.name)
-            # FIXME: use effectiveParent
-            parent = parent.parent
-            if 'startChain' in parent:
-                startchain = parent['startChain']
-                if chainName in startchain:
-                    chain['start'] = nUtils.getObjectName(parent)
-                    chain['elements'].append(nUtils.getObjectName(parent))
-                    chainclosed = True
-        if chain is not None:
-            returnchains.append(chain)
+        else:
+            log("Unclosed chain, aborting parsing chain " + chainName, "ERROR")
+            continue
+        returnchains.append(chain)
     return returnchains
 
 
@@ -947,6 +994,387 @@ def namespaced(name, namespace):
     return namespace + '_' + name
 
 
+#: Derived link entries per root and export selection (see :func:`deriveLinkEntries`).
+derivationcache = {}
+
+#: Derived materials and their state per material name.
+materialcache = {}
+
+#: Content hashes of meshes and their state per mesh name.
+meshhashcache = {}
+
+#: Names of the materials and meshes updated since they were derived.
+dirtydata = {'materials': set(), 'meshes': set()}
+
+#: Number of scene updates which updated objects, the generation of new link entries.
+updategeneration = 0
+
+#: Generation in which every updated object was last updated.
+objectgenerations = {}
+
+
+def isDerivationCacheEnabled():
+    """Returns whether derived data can be cached, i.e. whether updates are tracked.
+
+    Args:
+
+    Returns:
+      : bool -- True if :func:`updateDerivationCache` is registered
+
+    """
+    return updateDerivationCache in bpy.app.handlers.scene_update_post
+
+
+def getObjectState(obj, listed):
+    """Returns the state of an object which invalidates the derived link it belongs to.
+
+    Args:
+      obj(bpy.types.Object): object to get the state of
+      listed(set): names of the objects the model is derived from
+
+    Returns:
+      : tuple -- identity, hierarchy, transform, visibility, data and custom properties of the
+      object
+
+    """
+    return (
+        obj.as_pointer(),
+        obj.name,
+        obj.phobostype,
+        obj.parent.name if obj.parent else None,
+        tuple(tuple(row) for row in obj.matrix_local),
+        obj.select,
+        obj.hide,
+        obj.name in listed,
+        obj.data.name if obj.data else None,
+        obj.active_material.name if obj.active_material else None,
+        getPropertyHash(obj),
+    )
+
+
+def getEffectiveLink(obj, selectedonly):
+    """Returns the effective parent of an object like :func:`phobos.utils.selection.getEffectiveParent`.
+
+    Other than the selection utility this does not test the membership in a list of all objects,
+    so the effective parents of all objects are found in linear time.
+
+    Args:
+      obj(bpy.types.Object): object to find the effective parent of
+      selectedonly(bool): whether unselected links are skipped
+
+    Returns:
+      : bpy.types.Object -- the first visible (and selected) link above the object or None
+
+    """
+    parent = obj.parent
+    while parent and (
+        parent.hide or (not parent.select and selectedonly) or parent.phobostype != 'link'
+    ):
+        parent = parent.parent
+    return parent
+
+
+def getLinkStates(linklist, objectlist, selectedonly):
+    """Returns the states of the link objects and all objects whose derived data they contain.
+
+    Args:
+      linklist(list(bpy.types.Object)): links to get the states for
+      objectlist(list(bpy.types.Object)): objects the model is derived from
+      selectedonly(bool): whether only selected objects are exported
+
+    Returns:
+      : tuple -- dictionary of the state per link name and of the dependent object names per link
+
+    """
+    listed = set(obj.name for obj in objectlist)
+    members = {link.name: [] for link in linklist}
+    for obj in bpy.data.objects:
+        if obj.phobostype != 'link':
+            parent = getEffectiveLink(obj, selectedonly)
+            if parent and parent.name in members:
+                members[parent.name].append(obj)
+
+    states = {}
+    for link in linklist:
+        parent = getEffectiveLink(link, selectedonly)
+        states[link.name] = (
+            getObjectState(link, listed),
+            nUtils.getObjectName(parent) if parent else None,
+            tuple(
+                (child.name, child.name in listed)
+                for child in link.children
+                if child.phobostype == 'link'
+            ),
+            tuple(sorted(getObjectState(obj, listed) for obj in members[link.name])),
+        )
+        members[link.name] = set(obj.name for obj in members[link.name])
+        members[link.name].add(link.name)
+    return states, members
+
+
+def deriveLinkEntry(link, objectlist, fusedinertia=None):
+    """Derives the link, joint and motors represented by a link object.
+
+    Args:
+      link(bpy.types.Object): link object to derive the entries from
+      objectlist(list(bpy.types.Object)): objects the model is derived from
+      fusedinertia(tuple, optional): fused inertia of the link (see :func:`deriveLink`) (Default value = None)
+
+    Returns:
+      : tuple -- link dictionary, joint dictionary (None for a root) and motor dictionaries
+
+    """
+    # parse link information (including inertia)
+    linkdict = deriveLink(link, logging=True, objectlist=objectlist, fusedinertia=fusedinertia)
+    jointdict = None
+    motors = {}
+
+    # parse joint and motor information
+    if sUtils.getEffectiveParent(link):
+        # joint may be None if link is a root
+        # to prevent confusion links are always defining also joints
+        jointdict = deriveJoint(link, logging=True, adjust=True)
+        log("  Setting joint type '{}' for link.".format(jointdict['type']), 'DEBUG')
+        # first check if we have motor information in the joint properties
+        # if so they can be extended/overwritten by motor objects later on
+        if '$motor' in jointdict:
+            motordict = jointdict['$motor']
+            # at least we need a type property
+            if 'type' in motordict:
+                # if no name is given derive it from the joint
+                if not 'name' in motordict:
+                    motordict["name"] = jointdict['name']
+                motors[motordict['name']] = motordict
+                # link the joint by name:
+                motordict['joint'] = jointdict['name']
+            del jointdict['$motor']
+
+        for mot in [child for child in link.children if child.phobostype == 'motor']:
+            motordict = motormodel.deriveMotor(mot, jointdict)
+            # motor may be None if no motor is attached
+            if motordict:
+                log("  Added motor {} to link.".format(motordict['name']), 'DEBUG')
+                if motordict['name'] in motors:
+                    motors[motordict['name']].update(motordict)
+                else:
+                    motors[motordict['name']] = motordict
+    return linkdict, jointdict, motors
+
+
+def fuseInertias(linklist, objectlist):
+    """Returns the fused inertias of links, fused in one call for all links.
+
+    Args:
+      linklist(list(bpy.types.Object)): links to fuse the inertias for
+      objectlist(list(bpy.types.Object)): objects the model is derived from
+
+    Returns:
+      : list -- mass, center of mass and inertia per link
+
+    """
+    return inertiamodel.fuseLinkInertias(
+        [(link, inertiamodel.gatherInertialChilds(link, objectlist)) for link in linklist]
+    )
+
+
+def copyLinkEntry(entry):
+    """Returns a copy of a derived link entry, so that cached entries are not altered.
+
+    Args:
+      entry(tuple): link dictionary, joint dictionary and motor dictionaries
+
+    Returns:
+      : tuple -- the copied entry
+
+    """
+    linkdict, jointdict, motors = entry
+    return (
+        ioUtils.copy_model(linkdict),
+        ioUtils.copy_model(jointdict) if jointdict is not None else None,
+        ioUtils.copy_model(motors),
+    )
+
+
+def deriveLinkEntries(root, linklist, objectlist):
+    """Derives the link entries (see :func:`deriveLinkEntry`) of all links of a model.
+
+    The entries are cached per root and export selection. An entry is only derived again if one
+    of the objects it depends on (the link and all objects it is the effective parent of) was
+    updated after the entry was derived or changed its state (see :func:`getLinkStates`).
+
+    Args:
+      root(bpy.types.Object): root object of the model
+      linklist(list(bpy.types.Object)): links of the model
+      objectlist(list(bpy.types.Object)): objects the model is derived from
+
+    Returns:
+      : list -- link dictionary, joint dictionary and motor dictionaries per link
+
+    """
+    if not isDerivationCacheEnabled():
+        return [
+            deriveLinkEntry(link, objectlist, fusedinertia)
+            for link, fusedinertia in zip(linklist, fuseInertias(linklist, objectlist))
+        ]
+
+    selectedonly = ioUtils.getExpSettings().selectedOnly
+    states, members = getLinkStates(linklist, objectlist, selectedonly)
+    rootcache = derivationcache.get((root.name, selectedonly), {})
+    newcache = {}
+    for link in linklist:
+        cached = rootcache.get(link.name)
+        if (
+            cached
+            and cached['state'] == states[link.name]
+            and all(
+                objectgenerations.get(name, 0) <= cached['generation']
+                for name in members[link.name]
+            )
+        ):
+            newcache[link.name] = cached
+
+    # fuse the inertias of all links derived again at once
+    stale = [link for link in linklist if link.name not in newcache]
+    fusedinertias = dict(zip([link.name for link in stale], fuseInertias(stale, objectlist)))
+
+    entries = []
+    for link in linklist:
+        if link.name in newcache:
+            entries.append(copyLinkEntry(newcache[link.name]['entry']))
+        else:
+            entry = deriveLinkEntry(link, objectlist, fusedinertias[link.name])
+            entries.append(entry)
+            newcache[link.name] = {
+                'state': states[link.name],
+                'generation': updategeneration,
+                'entry': copyLinkEntry(entry),
+            }
+    log("  Derived {} of {} links again.".format(len(stale), len(linklist)), 'DEBUG')
+    derivationcache[(root.name, selectedonly)] = newcache
+    return entries
+
+
+def deriveCachedMaterial(mat):
+    """Returns the derived material (see :func:`deriveMaterial`), derived again only if updated.
+
+    Args:
+      mat(bpy.types.Material): Blender material to derive a Phobos description from
+
+    Returns:
+      : dict -- Phobos representation of the material
+
+    """
+    if not isDerivationCacheEnabled():
+        return deriveMaterial(mat)
+
+    state = (mat.as_pointer(), getPropertyHash(mat))
+    cached = materialcache.get(mat.name)
+    if not cached or cached[0] != state or mat.name in dirtydata['materials']:
+        cached = materialcache[mat.name] = (state, deriveMaterial(mat))
+        dirtydata['materials'].discard(mat.name)
+    return ioUtils.copy_model(cached[1])
+
+
+def getCachedMeshHash(mesh):
+    """Returns the content hash of a mesh (see :func:`getMeshHash`), hashed again only if updated.
+
+    Args:
+      mesh(bpy.types.Mesh): mesh to hash
+
+    Returns:
+      : str -- content hash of the mesh
+
+    """
+    if not isDerivationCacheEnabled():
+        return getMeshHash(mesh)
+
+    state = (mesh.as_pointer(), len(mesh.vertices), len(mesh.loops), len(mesh.polygons))
+    cached = meshhashcache.get(mesh.name)
+    if not cached or cached[0] != state or mesh.name in dirtydata['meshes']:
+        cached = meshhashcache[mesh.name] = (state, getMeshHash(mesh))
+        dirtydata['meshes'].discard(mesh.name)
+    return cached[1]
+
+
+@persistent
+def updateDerivationCache(scene):
+    """Marks updated objects, materials and meshes as dirty for the next model derivation.
+
+    This is called after scene updates.
+
+    Args:
+      scene(bpy.types.Scene): the updated scene
+
+    Returns:
+
+    """
+    global updategeneration
+    if bpy.data.objects.is_updated:
+        updategeneration += 1
+        for obj in scene.objects:
+            if obj.is_updated or obj.is_updated_data:
+                objectgenerations[obj.name] = updategeneration
+                if obj.is_updated_data and obj.type == 'MESH':
+                    dirtydata['meshes'].add(obj.data.name)
+    if bpy.data.materials.is_updated:
+        dirtydata['materials'].update(mat.name for mat in bpy.data.materials if mat.is_updated)
+    if bpy.data.meshes.is_updated:
+        dirtydata['meshes'].update(mesh.name for mesh in bpy.data.meshes if mesh.is_updated)
+
+
+@persistent
+def clearDerivationCache(*args):
+    """Discards all cached derived data, e.g. after loading a file or undoing.
+
+    Args:
+      *args: arguments passed by the handler
+
+    Returns:
+
+    """
+    derivationcache.clear()
+    materialcache.clear()
+    meshhashcache.clear()
+    objectgenerations.clear()
+    for names in dirtydata.values():
+        names.clear()
+
+
+def replaceMeshReferences(model, meshnames):
+    """Replaces the mesh names in the geometries of a model with the names of their unique meshes.
+
+    The mesh filenames of the visual and collision geometries and of the visual LODs are changed
+    to the name of the mesh exported in their place.
+
+    Args:
+      model(dict): model dictionary to update
+      meshnames(dict): mesh datablock names mapped to the name of the identical exported mesh
+
+    Returns:
+
+    """
+    meshtype = ioUtils.getOutputMeshtype()
+    duplicates = {name: unique for name, unique in meshnames.items() if name != unique}
+    if not duplicates:
+        return
+    log("Found {} duplicate meshes.".format(len(duplicates)), 'INFO')
+
+    lodfiles = {
+        os.path.join('meshes', name + meshtype): os.path.join('meshes', unique + meshtype)
+        for name, unique in duplicates.items()
+    }
+    for link in model['links'].values():
+        for elementtype in ('visual', 'collision'):
+            for element in link.get(elementtype, {}).values():
+                geometry = element.get('geometry', {})
+                if geometry.get('filename') in duplicates:
+                    geometry['filename'] = duplicates[geometry['filename']]
+                for lod in element.get('lod', []):
+                    if lod['filename'] in lodfiles:
+                        lod['filename'] = lodfiles[lod['filename']]
+
+
+@profiling.profiled()
 def deriveModelDictionary(root, name='', objectlist=[]):
     """Returns a dictionary representation of a Phobos model.
     
@@ -1014,53 +1442,28 @@ def deriveModelDictionary(root, name='', objectlist=[]):
 
     # digest all the links to derive link and joint information
     log("Parsing links, joints and motors... " + (str(len(linklist))) + " total.", "INFO")
-    for link in linklist:
-        # parse link information (including inertia)
-        model['links'][nUtils.getObjectName(link, 'link')] = deriveLink(
-            link, logging=True, objectlist=objectlist
-        )
-
-        # parse joint and motor information
-        if sUtils.getEffectiveParent(link):
-            # joint may be None if link is a root
-            # to prevent confusion links are always defining also joints
-            jointdict = deriveJoint(link, logging=True, adjust=True)
-            log("  Setting joint type '{}' for link.".format(jointdict['type']), 'DEBUG')
-            # first check if we have motor information in the joint properties
-            # if so they can be extended/overwritten by motor objects later on
-            if '$motor' in jointdict:
-                motordict = jointdict['$motor']
-                # at least we need a type property
-                if 'type' in motordict:
-                    # if no name is given derive it from the joint
-                    if not 'name' in motordict:
-                        motordict["name"] = jointdict['name']
-                    model['motors'][motordict['name']] = motordict
-                    # link the joint by name:
-                    motordict['joint'] = jointdict['name']
-                del jointdict['$motor']
-
+    profiling.phase('links')
+    for linkdict, jointdict, motors in deriveLinkEntries(root, linklist, objectlist):
+        model['links'][linkdict['name']] = linkdict
+        if jointdict is not None:
             model['joints'][jointdict['name']] = jointdict
-
-            for mot in [child for child in link.children if child.phobostype == 'motor']:
-                motordict = motormodel.deriveMotor(mot, jointdict)
-                # motor may be None if no motor is attached
-                if motordict:
-                    log("  Added motor {} to link.".format(motordict['name']), 'DEBUG')
-                    if motordict['name'] in model["motors"]:
-                        model['motors'][motordict['name']].update(motordict)
-                    else:
-                        model['motors'][motordict['name']] = motordict
+        for motorname, motordict in motors.items():
+            if motorname in model['motors']:
+                model['motors'][motorname].update(motordict)
+            else:
+                model['motors'][motorname] = motordict
 
     # parse sensors and controllers
     sencons = [obj for obj in objectlist if obj.phobostype in ['sensor', 'controller']]
     log("Parsing sensors and controllers... {} total.".format(len(sencons)), 'INFO')
+    profiling.phase('sensors')
     for obj in sencons:
         props = deriveDictEntry(obj, names=True, objectlist=objectlist)
         model[obj.phobostype + 's'][nUtils.getObjectName(obj)] = props
 
     # parse materials
     log("Parsing materials...", 'INFO')
+    profiling.phase('materials')
     model['materials'] = collectMaterials(objectlist)
     for obj in objectlist:
         if obj.phobostype == 'visual':
@@ -1075,24 +1478,32 @@ def deriveModelDictionary(root, name='', objectlist=[]):
                         'material'
                     ] = mat.name
 
-    # identify unique meshes
+    # identify unique meshes by their content, so that identical meshes are only exported once
     log("Parsing meshes...", "INFO")
+    profiling.phase('meshes')
+    meshhashes = {}
+    meshnames = {}
     for obj in objectlist:
         try:
-            if (
-                (obj.phobostype == 'visual' or obj.phobostype == 'collision')
-                and (obj['geometry/type'] == 'mesh')
-                and (obj.data.name not in model['meshes'])
+            if (obj.phobostype == 'visual' or obj.phobostype == 'collision') and (
+                obj['geometry/type'] == 'mesh'
             ):
-                model['meshes'][obj.data.name] = obj
-                for lod in obj.lod_levels:
-                    if lod.object.data.name not in model['meshes']:
-                        model['meshes'][lod.object.data.name] = lod.object
+                for meshobj in [obj] + [lod.object for lod in obj.lod_levels]:
+                    if meshobj.data.name in meshnames:
+                        continue
+                    meshname = meshhashes.setdefault(
+                        getCachedMeshHash(meshobj.data), meshobj.data.name
+                    )
+                    meshnames[meshobj.data.name] = meshname
+                    if meshname == meshobj.data.name:
+                        model['meshes'][meshname] = meshobj
         except KeyError:
             log("Undefined geometry type in object " + obj.name, "ERROR")
+    replaceMeshReferences(model, meshnames)
 
     # gather information on groups of objects
     log("Parsing groups...", 'INFO')
+    profiling.phase('groups')
     # TODO: get rid of the "data" part and check for relation to robot
     for group in bpy.data.groups:
         # skip empty groups
@@ -1109,6 +1520,7 @@ def deriveModelDictionary(root, name='', objectlist=[]):
 
     # gather information on chains of objects
     log("Parsing chains...", "INFO")
+    profiling.phase('chains')
     chains = []
     for obj in objectlist:
         if obj.phobostype == 'link' and 'endChain' in obj:
@@ -1118,12 +1530,14 @@ def deriveModelDictionary(root, name='', objectlist=[]):
 
     # gather information on lights
     log("Parsing lights...", "INFO")
+    profiling.phase('lights')
     for obj in objectlist:
         if obj.phobostype == 'light':
             model['lights'][nUtils.getObjectName(obj)] = deriveLight(obj)
 
     # gather submechanism information from links
     log("Parsing submechanisms...", "INFO")
+    profiling.phase('submechanisms')
 
     def getSubmechanisms(link):
         """
@@ -1165,17 +1579,24 @@ def deriveModelDictionary(root, name='', objectlist=[]):
     model['submechanisms'] = getSubmechanisms(root)
 
     # add additional data to model
+    profiling.phase('textdata')
     model.update(deriveTextData(model['name']))
 
     # shorten numbers in dictionary to n decimalPlaces and return it
     log("Rounding numbers to {} digits.".format(ioUtils.getExpSettings().decimalPlaces), 'INFO')
+    profiling.phase('postprocessing')
     model = roundFloatsInDict(model, ioUtils.getExpSettings().decimalPlaces)
     log("Sorting objects.", 'DEBUG')
     model = sortListsInDict(model)
 
+    # index the annotations once, so that exporters do not need to search the model
+    profiling.phase('annotations')
+    model['annotationindex'] = indexAnnotations(model)
+
     return model
 
 
+@profiling.profiled()
 def buildModelFromDictionary(model):
     """Creates the Blender representation of the imported model, using a model dictionary.
 
@@ -1188,12 +1609,14 @@ def buildModelFromDictionary(model):
     log("Creating Blender model...", 'INFO', prefix='\n' + '-' * 25 + '\n')
 
     log("  Initializing materials... ({} total)".format(len(model['materials'])), 'INFO')
+    profiling.phase('materials')
     for mat in model['materials']:
         matmodel.createMaterial(model['materials'][mat], logging=True, adjust=True)
         # ['name'], tuple(mat['color'][0:3]), (1, 1, 1), mat['color'][-1])
 
     newobjects = []
     log("  Creating links... ({} total)".format(len(model['links'])), 'INFO')
+    profiling.phase('links')
     for lnk in model['links']:
         link = model['links'][lnk]
         model['links'][lnk]['object'] = linkmodel.createLink(link)
@@ -1201,6 +1624,7 @@ def buildModelFromDictionary(model):
         newobjects.extend(model['links'][lnk]['object'].children)
 
     log("Setting parent-child relationships", 'INFO', prefix='\n')
+    profiling.phase('parenting')
     bUtils.toggleLayer(defs.layerTypes['link'], True)
     for lnk in model['links']:
         parent = model['links'][lnk]
@@ -1213,6 +1637,7 @@ def buildModelFromDictionary(model):
 
     # set transformations
     log("Transforming links...  ({} total)".format(len(model['links'])), 'INFO', prefix='\n')
+    profiling.phase('transformations')
     for lnk in model['links']:
         if 'parent' not in model['links'][lnk]:
             root = model['links'][lnk]
@@ -1220,6 +1645,7 @@ def buildModelFromDictionary(model):
     linkmodel.setLinkTransformations(model, root)
 
     log("Creating joints... ({} total)".format(len(model['joints'])), 'INFO', prefix='\n')
+    profiling.phase('joints')
     for j in model['joints']:
         joint = model['joints'][j]
         jointmodel.createJoint(joint, links=model['links'])
@@ -1234,6 +1660,7 @@ def buildModelFromDictionary(model):
 
     # TODO make sure this works
     log("Creating sensors...", 'INFO')
+    profiling.phase('sensors')
     if 'sensors' in model and model['sensors']:
         for sen in model['sensors']:
             sensormodel.createSensor(model['sensors'][sen], model['sensors'][sen]['parent'])
@@ -1242,6 +1669,7 @@ def buildModelFromDictionary(model):
 
     # TODO make sure this works
     log("Creating motors...", 'INFO')
+    profiling.phase('motors')
     if 'motors' in model and model['motors']:
         for motor in model['motors']:
             eUtils.setProperties(
@@ -1254,6 +1682,7 @@ def buildModelFromDictionary(model):
 
     # TODO make sure this works
     log("Creating groups...", 'INFO')
+    profiling.phase('groups')
     if 'groups' in model and model['groups']:
         for group in model['groups']:
             createGroup(model['groups'][group])
@@ -1262,6 +1691,7 @@ def buildModelFromDictionary(model):
 
     # TODO make sure this works
     log("Creating chains...", 'INFO')
+    profiling.phase('chains')
     if 'chains' in model and model['chains']:
         for ch in model['chains']:
             createChain(model['chains'][ch])
@@ -1270,6 +1700,7 @@ def buildModelFromDictionary(model):
 
     # TODO make sure this works
     log("Creating lights...", 'INFO')
+    profiling.phase('lights')
     if 'lights' in model and model['lights']:
         for light in model['lights']:
             lightmodel.createLight(model['lights'][light])
@@ -1277,6 +1708,7 @@ def buildModelFromDictionary(model):
         log("  No lights in model.", 'INFO')
 
     # display new objects after import
+    profiling.phase('display')
     sUtils.selectObjects(newobjects, clear=True, active=0)
     eUtils.sortObjectsToLayers(newobjects)
     for obj in newobjects:
@@ -1288,69 +1720,82 @@ def buildModelFromDictionary(model):
     bUtils.update()
 
 
-def gatherAnnotations(model):
-    """Gathers custom properties annotating elements of the robot
-    across the model. These annotations were created in the model.py
-    module and are marked with a leading '$'.
+def indexAnnotations(model):
+    """Collects the custom properties annotating elements of the model into an index.
+
+    The annotations are created in :func:`initObjectProperties` and are marked with a leading '$'.
+    The index maps the category, the element type and the element name to a copy of the annotation
+    including the name of the element. The model is not changed.
 
     Args:
       model(dict): The robot model dictionary.
-      ignore_keys(list): Ignored annotation categories (Default value = [])
 
     Returns:
-      : dict -- A dictionary of the gathered annotations.
+      : dict -- annotations per category, element type and element name
 
     """
-    # TODO check this stuff
-    annotations = {}
-    elementlist = []
-    types = ('links', 'joints', 'sensors', 'motors', 'controllers', 'materials')
     # gather information from directly accessible types
-    for objtype in types:
-        for elementname in model[objtype]:
-            tmpdict = model[objtype][elementname]
-            tmpdict['temp_type'] = objtype[:-1]
-            elementlist.append(tmpdict)
+    elements = []
+    for objtype in ('links', 'joints', 'sensors', 'motors', 'controllers', 'materials'):
+        for elementname, element in model[objtype].items():
+            elements.append((objtype[:-1], element.get('name', elementname), element))
 
     # add information from types hidden in links
-    for linkname in model['links']:
+    for linkname, link in model['links'].items():
         for objtype in ('collision', 'visual'):
-            if objtype in model['links'][linkname]:
-                for elementname in model['links'][linkname][objtype]:
-                    tmpdict = model['links'][linkname][objtype][elementname]
-                    tmpdict['temp_type'] = objtype
-                    elementlist.append(tmpdict)
-        if 'inertial' in model['links'][linkname]:
-            tmpdict = model['links'][linkname]['inertial']
-            tmpdict['temp_type'] = 'inertial'
-            elementlist.append(tmpdict)
-
-    # loop through the list of annotated elements and categorize the data
-    for element in elementlist:
-        delkeys = []
-        for key in element.keys():
-            if key.startswith('$'):
-                category = key[1:]
-                # ignore motor properties for link and joint types
-                if category == "motor":
-                    if element['temp_type'] == "link" or element['temp_type'] == "joint":
-                        continue
-                if category not in annotations:
-                    annotations[category] = {}
-                if element['temp_type'] not in annotations[category]:
-                    annotations[category][element['temp_type']] = []
-                tmpdict = {k: element[key][k] for k in element[key]}
-                tmpdict['name'] = element['name']
-                annotations[category][element['temp_type']].append(tmpdict)
-                delkeys.append(key)
-        delkeys.append('temp_type')
-        for key in delkeys:
-            if key in element:
-                del element[key]
+            for elementname, element in link.get(objtype, {}).items():
+                elements.append((objtype, element.get('name', elementname), element))
+        if link.get('inertial'):
+            elements.append(('inertial', link['inertial'].get('name', linkname), link['inertial']))
 
+    # categorize the annotated data
+    annotations = {}
+    for elementtype, elementname, element in elements:
+        for key, value in element.items():
+            if not key.startswith('$'):
+                continue
+            category = key[1:]
+            # ignore motor properties for link and joint types
+            if category == 'motor' and elementtype in ('link', 'joint'):
+                continue
+            annotation = dict(value)
+            annotation['name'] = elementname
+            typeannotations = annotations.setdefault(category, {}).setdefault(elementtype, {})
+            typeannotations[elementname] = annotation
     return annotations
 
 
+def getAnnotationIndex(model):
+    """Returns the annotation index of a model (see :func:`indexAnnotations`).
+
+    Derived models contain the index created during the derivation, it is only created for other
+    (e.g. imported) models.
+
+    Args:
+      model(dict): The robot model dictionary.
+
+    Returns:
+      : dict -- annotations per category, element type and element name
+
+    """
+    if 'annotationindex' in model:
+        return model['annotationindex']
+    return indexAnnotations(model)
+
+
+def removeAnnotations(element):
+    """Returns a copy of an element dictionary without its '$' annotation keys.
+
+    Args:
+      element(dict): element of the model dictionary
+
+    Returns:
+      : dict -- the element without annotations
+
+    """
+    return {key: value for key, value in element.items() if not key.startswith('$')}
+
+
 def replace_object_links(dictionary):
     """Replaces object links in a dictionary with object names.
     
@@ -1413,3 +1858,24 @@ def createChain(group):
     """
     # TODO lots of code missing here... make it a dev branch
     pass
+
+
+def register():
+    """Adds the handlers tracking the updates for the derivation cache."""
+    bpy.app.handlers.scene_update_post.append(updateDerivationCache)
+    bpy.app.handlers.load_post.append(clearDerivationCache)
+    bpy.app.handlers.undo_post.append(clearDerivationCache)
+    bpy.app.handlers.redo_post.append(clearDerivationCache)
+
+
+def unregister():
+    """Removes the handlers tracking the updates for the derivation cache."""
+    for handlers, handler in (
+        (bpy.app.handlers.scene_update_post, updateDerivationCache),
+        (bpy.app.handlers.load_post, clearDerivationCache),
+        (bpy.app.handlers.undo_post, clearDerivationCache),
+        (bpy.app.handlers.redo_post, clearDerivationCache),
+    ):
+        if handler in handlers:
+            handlers.remove(handler)
+    clearDerivationCache()
@@ -14,14 +14,19 @@ Contains all functions to model poses in Blender.
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
+
 import yaml
+import numpy
 import bpy
+import bmesh
 import phobos.utils.selection as sUtils
 import phobos.utils.editing as eUtils
 import phobos.utils.naming as nUtils
 import phobos.utils.blender as bUtils
 import phobos.utils.general as gUtils
 import phobos.utils.io as ioUtils
+import phobos.utils.rendering as rendering
 from phobos.utils.validation import validate
 from phobos.phoboslog import log
 from phobos.utils.io import securepath
@@ -71,18 +76,13 @@ def deriveObjectPose(obj, logging=False, adjust=False, errors=None):
     return pose
 
 
-def bakeModel(objlist, modelname, posename="", decimate_type='COLLAPSE', decimate_parameter=0.1):
-    """This function gets a list of objects and creates a single, simplified mesh from it and exports it to .stl.
+def getBakePath():
+    """Returns the folder baked poses are written to according to the export settings.
 
     Args:
-      objlist(list: list): The list of blender objects to join and export as simplified stl file.
-      modelname(str): The new models name and filename.
-      posename: (Default value = "")
-      decimate_type: (Default value = 'COLLAPSE')
-      decimate_parameter: (Default value = 0.1)
-      objlist: 
 
     Returns:
+      : str -- path of the bake folder
 
     """
     if bpy.context.scene.phobosexportsettings.relativePath:
@@ -96,63 +96,413 @@ def bakeModel(objlist, modelname, posename="", decimate_type='COLLAPSE', decimat
         # CHECK careful with path consistency (Windows)
         outpath = securepath(os.path.expanduser(bpy.context.scene.phobosexportsettings.path))
 
-    # TODO delete me?
-    # bake_outpath = securepath(os.path.join(outpath, modelname) if savetosubfolder else outpath)
-    bake_outpath = outpath
-
     if bpy.context.scene.phobosexportsettings.structureExport:
-        securepath(os.path.join(bake_outpath, 'bakes'))
-        bake_outpath = os.path.join(bake_outpath, 'bakes/')
+        outpath = securepath(os.path.join(outpath, 'bakes'))
+    return outpath
 
-    export_name = modelname + '_' + posename
 
-    visuals = [o for o in objlist if ("phobostype" in o and o.phobostype == "visual")]
-    if len(visuals) > 0:
-
-        log("Baking model to " + bake_outpath, "INFO")
-        sUtils.selectObjects(visuals, active=0)
-        log("Copying objects for joining...", "INFO")
-        bpy.ops.object.duplicate(linked=False, mode='TRANSLATION')
-        log("Joining...", "INFO")
-        bpy.ops.object.join()
-        obj = bpy.context.active_object
-        log("Deleting vertices...", "INFO")
-        bpy.ops.object.editmode_toggle()
-        bpy.ops.mesh.select_all(action='TOGGLE')
-        bpy.ops.mesh.select_all(action='TOGGLE')
-        bpy.ops.mesh.remove_doubles()
-        bpy.ops.object.editmode_toggle()
-        log("Adding modifier...", "INFO")
-
-        bpy.ops.object.modifier_add(type='DECIMATE')
-        bpy.context.object.modifiers["Decimate"].decimate_type = decimate_type
+def createBakeMeshes(visuals, decimate_type='COLLAPSE', decimate_parameter=0.1):
+    """Creates the merged and decimated meshes of the links of a model for baking.
+
+    The visuals of every link are joined, their doubles removed and the result decimated and
+    triangulated once. The vertices are stored relative to the first visual of the link, which
+    moves rigidly with the other visuals of the link when a pose is applied. The material colour of
+    this visual is used for the preview of the link.
+
+    Args:
+      visuals(list of bpy.types.Object): visual objects to bake
+      decimate_type(str, optional): type of the decimate modifier (Default value = 'COLLAPSE')
+      decimate_parameter(float, optional): ratio, iterations or angle limit of the decimation (Default value = 0.1)
+
+    Returns:
+      : list -- (reference visual, vertex array, triangle array, colour) tuple for every link
+
+    """
+    scene = bpy.context.scene
+    linkvisuals = {}
+    for visual in visuals:
+        link = sUtils.getEffectiveParent(visual, ignore_selection=True, include_hidden=True)
+        linkvisuals.setdefault(link.name if link else '', []).append(visual)
+
+    bakemeshes = []
+    for linkname, objects in sorted(linkvisuals.items()):
+        reference = objects[0]
+        inverse = reference.matrix_world.inverted()
+        bm = bmesh.new()
+        for visual in objects:
+            mesh = visual.to_mesh(scene, True, 'PREVIEW')
+            mesh.transform(inverse * visual.matrix_world)
+            bm.from_mesh(mesh)
+            bpy.data.meshes.remove(mesh)
+        bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=0.0001)
+        joined = bpy.data.meshes.new('phobos_bake_tmp')
+        bm.to_mesh(joined)
+        bm.free()
+
+        tmpobject = bpy.data.objects.new('phobos_bake_tmp', joined)
+        modifier = tmpobject.modifiers.new('Decimate', 'DECIMATE')
+        modifier.decimate_type = decimate_type
         if decimate_type == 'COLLAPSE':
-            bpy.context.object.modifiers["Decimate"].ratio = decimate_parameter
+            modifier.ratio = decimate_parameter
         elif decimate_type == 'UNSUBDIV':
-            bpy.context.object.modifiers["Decimate"].iterations = decimate_parameter
+            modifier.iterations = decimate_parameter
         elif decimate_type == 'DISSOLVE':
-            bpy.context.object.modifiers["Decimate"].angle_limit = decimate_parameter
+            modifier.angle_limit = decimate_parameter
+        decimated = tmpobject.to_mesh(scene, True, 'PREVIEW')
+        bpy.data.objects.remove(tmpobject)
+        bpy.data.meshes.remove(joined)
+
+        bm = bmesh.new()
+        bm.from_mesh(decimated)
+        bmesh.ops.triangulate(bm, faces=bm.faces)
+        bm.to_mesh(decimated)
+        bm.free()
+        vertices = numpy.empty(len(decimated.vertices) * 3)
+        decimated.vertices.foreach_get('co', vertices)
+        triangles = numpy.empty(len(decimated.polygons) * 3, dtype=numpy.int64)
+        decimated.polygons.foreach_get('vertices', triangles)
+        bpy.data.meshes.remove(decimated)
+        material = reference.active_material
+        color = tuple(material.diffuse_color) if material else rendering.DEFAULT_COLOR
+        bakemeshes.append((reference, vertices.reshape(-1, 3), triangles.reshape(-1, 3), color))
+    return bakemeshes
+
+
+def poseBakeMeshes(bakemeshes):
+    """Transforms the bake meshes of the links to their current world pose and merges them.
 
-        log("Applying modifier...", "INFO")
-        bpy.ops.object.modifier_apply(apply_as='DATA', modifier="Decimate")
-        obj.name = export_name + ".obj"
+    Args:
+      bakemeshes(list): link meshes as returned by :func:`createBakeMeshes`
 
-        # TODO use_selection might cause bugs, depending on Blender version
-        bpy.ops.export_scene.obj(filepath=os.path.join(bake_outpath, obj.name), use_selection=True)
+    Returns:
+      : tuple -- vertex, triangle and triangle colour array of the posed model
 
-        obj.hide_render = True
-        previewfile = export_name
-        bUtils.createPreview(
-            visuals, export_path=bake_outpath, modelname=modelname, previewfile=previewfile
-        )
+    """
+    vertices = []
+    triangles = []
+    colors = []
+    offset = 0
+    for reference, linkvertices, linktriangles, color in bakemeshes:
+        matrix = numpy.array(reference.matrix_world)
+        vertices.append(linkvertices.dot(matrix[:3, :3].T) + matrix[:3, 3])
+        triangles.append(linktriangles + offset)
+        colors.append(numpy.tile(color, (len(linktriangles), 1)))
+        offset += len(linkvertices)
+    if not vertices:
+        return numpy.zeros((0, 3)), numpy.zeros((0, 3), dtype=numpy.int64), numpy.zeros((0, 3))
+    return numpy.vstack(vertices), numpy.vstack(triangles), numpy.vstack(colors)
+
+
+def writeBakedMesh(filepath, vertices, triangles):
+    """Writes a baked mesh as .obj file with the Y axis pointing up (as the Blender obj exporter).
+
+    This only uses numpy and can be called from a worker thread.
 
-        obj.select = True
+    Args:
+      filepath(str): path of the .obj file
+      vertices(numpy.ndarray): vertex coordinates in Blender's world frame
+      triangles(numpy.ndarray): vertex indices of the triangles
 
-        bpy.ops.object.delete()
-        log("Done baking...", "INFO")
+    Returns:
 
-    else:
+    """
+    with open(filepath, 'w') as objfile:
+        objfile.write('# Phobos pose bake\no {}\n'.format(os.path.basename(filepath)))
+        numpy.savetxt(objfile, vertices[:, (0, 2, 1)] * (1, 1, -1), fmt='v %.6f %.6f %.6f')
+        numpy.savetxt(objfile, triangles + 1, fmt='f %d %d %d')
+
+
+def bakePoses(
+    objlist,
+    modelname,
+    posenames,
+    decimate_type='COLLAPSE',
+    decimate_parameter=0.1,
+    progress=None,
+    load=True,
+):
+    """Bakes stored poses of a model to simplified .obj meshes with previews.
+
+    The merged and decimated link meshes are only created once. For every pose, the links are
+    moved by loading the pose and the cached meshes transformed to the resulting link poses. The
+    meshes are written and their previews rendered (see :mod:`phobos.utils.rendering`) by worker
+    threads while the next pose is processed.
+
+    Args:
+      objlist(list of bpy.types.Object): objects of the model, only the visuals are baked
+      modelname(str): name of the model
+      posenames(list of str): names of the stored poses to bake
+      decimate_type(str, optional): type of the decimate modifier (Default value = 'COLLAPSE')
+      decimate_parameter(float, optional): ratio, iterations or angle limit of the decimation (Default value = 0.1)
+      progress(function, optional): called with the fraction of baked poses (Default value = None)
+      load(bool, optional): whether to load the poses, otherwise the current pose is baked (Default value = True)
+
+    Returns:
+      : list -- paths of the baked meshes
+
+    """
+    visuals = [o for o in objlist if ("phobostype" in o and o.phobostype == "visual")]
+    if not visuals:
         log("No visuals to bake!", "WARNING")
+        return []
+
+    bake_outpath = getBakePath()
+    log("Baking {} poses of {} to {}".format(len(posenames), modelname, bake_outpath), "INFO")
+    bakemeshes = createBakeMeshes(visuals, decimate_type, decimate_parameter)
+
+    bakefiles = []
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        writers = []
+        for i, posename in enumerate(posenames):
+            if load:
+                loadPose(modelname, posename)
+            bpy.context.scene.update()
+            export_name = modelname + '_' + posename
+            filepath = os.path.join(bake_outpath, export_name + '.obj')
+            previewpath = os.path.join(bake_outpath, export_name + '.png')
+            vertices, triangles, colors = poseBakeMeshes(bakemeshes)
+            writer = executor.submit(writeBakedMesh, filepath, vertices, triangles)
+            writers.append((filepath, writer))
+            writer = executor.submit(
+                rendering.writeThumbnail, previewpath, vertices, triangles, colors
+            )
+            writers.append((previewpath, writer))
+            if progress:
+                progress((i + 1) / len(posenames))
+
+        for filepath, writer in writers:
+            try:
+                writer.result()
+                if filepath.endswith('.obj'):
+                    bakefiles.append(filepath)
+            except OSError as error:
+                log("Could not write {}: {}".format(filepath, str(error)), "ERROR")
+    log("Done baking...", "INFO")
+    return bakefiles
+
+
+def bakeModel(objlist, modelname, posename="", decimate_type='COLLAPSE', decimate_parameter=0.1):
+    """Creates a single, simplified mesh of the model's visuals in its current pose and exports it to .obj.
+
+    Args:
+      objlist(list of bpy.types.Object): objects of the model, only the visuals are baked
+      modelname(str): The new models name and filename.
+      posename: (Default value = "")
+      decimate_type: (Default value = 'COLLAPSE')
+      decimate_parameter: (Default value = 0.1)
+
+    Returns:
+
+    """
+    bakePoses(objlist, modelname, [posename], decimate_type, decimate_parameter, load=False)
+
+
+class PoseLibrary(object):
+    """The stored poses of a model as array of joint positions.
+
+    The positions are stored as (poses x joints) array, the rows and columns are looked up by the
+    pose and joint names. Joints which are not defined by a pose are stored as NaN.
+
+    The library is persisted as YAML in the *<model>::poses* text file and only parsed again if
+    this text changed (see :func:`getPoseLibrary`).
+    """
+
+    def __init__(self, posedict=None, source=None):
+        """Creates the library from a pose dictionary as stored in the *<model>::poses* text file.
+
+        Args:
+          posedict(dict, optional): pose names mapped to their name and joint positions (Default value = None)
+          source(str, optional): text the pose dictionary was parsed from (Default value = None)
+
+        Returns:
+
+        """
+        self.source = source
+        self.posenames = []
+        self.jointnames = []
+        self.poseindex = {}
+        self.jointindex = {}
+        self.positions = numpy.zeros((0, 0))
+
+        if not posedict:
+            return
+        for posename, pose in posedict.items():
+            for jointname in pose['joints']:
+                if jointname not in self.jointindex:
+                    self.jointindex[jointname] = len(self.jointnames)
+                    self.jointnames.append(jointname)
+        self.positions = numpy.full((len(posedict), len(self.jointnames)), numpy.nan)
+        for row, (posename, pose) in enumerate(posedict.items()):
+            self.poseindex[posename] = row
+            self.posenames.append(posename)
+            for jointname, position in pose['joints'].items():
+                self.positions[row, self.jointindex[jointname]] = float(position)
+
+    def setPose(self, posename, joints):
+        """Stores the joint positions of a pose, overwriting an existing pose of the same name.
+
+        Args:
+          posename(str): name of the pose
+          joints(dict): joint names mapped to their positions
+
+        Returns:
+
+        """
+        newjoints = [jointname for jointname in joints if jointname not in self.jointindex]
+        for jointname in newjoints:
+            self.jointindex[jointname] = len(self.jointnames)
+            self.jointnames.append(jointname)
+        if newjoints:
+            self.positions = numpy.hstack(
+                (self.positions, numpy.full((len(self.posenames), len(newjoints)), numpy.nan))
+            )
+
+        if posename not in self.poseindex:
+            self.poseindex[posename] = len(self.posenames)
+            self.posenames.append(posename)
+            self.positions = numpy.vstack(
+                (self.positions, numpy.full((1, len(self.jointnames)), numpy.nan))
+            )
+        row = self.positions[self.poseindex[posename]]
+        row[:] = numpy.nan
+        for jointname, position in joints.items():
+            row[self.jointindex[jointname]] = position
+
+    def getPositions(self, posename):
+        """Returns the joint positions of a pose.
+
+        Args:
+          posename(str): name of the pose
+
+        Returns:
+          : numpy.ndarray -- position of every joint of the library, NaN if not defined by the pose
+
+        """
+        return self.positions[self.poseindex[posename]]
+
+    def interpolate(self, startpose, endpose, factor):
+        """Linearly interpolates the joint positions between two poses.
+
+        Joints which are only defined by one of the poses keep the position of this pose.
+
+        Args:
+          startpose(str): name of the pose at factor 0
+          endpose(str): name of the pose at factor 1
+          factor(float): interpolation factor
+
+        Returns:
+          : numpy.ndarray -- position of every joint of the library, NaN if defined by neither pose
+
+        """
+        start = self.getPositions(startpose)
+        end = self.getPositions(endpose)
+        positions = start + (end - start) * factor
+        positions = numpy.where(numpy.isnan(start), end, positions)
+        return numpy.where(numpy.isnan(end), start, positions)
+
+    def toDictionary(self):
+        """Returns the poses as dictionary in the format of the *<model>::poses* text file.
+
+        Args:
+
+        Returns:
+          : dict -- pose names mapped to their name and joint positions
+
+        """
+        posedict = {}
+        for posename, positions in zip(self.posenames, self.positions):
+            posedict[posename] = {
+                'name': posename,
+                'joints': {
+                    jointname: float(position)
+                    for jointname, position in zip(self.jointnames, positions)
+                    if not numpy.isnan(position)
+                },
+            }
+        return posedict
+
+
+#: Pose libraries of the models, reparsed only if their text file changed.
+poselibraries = {}
+
+#: Link objects of the models' joints as (joint names, object names) tuples.
+_jointobjects = {}
+
+
+def getPoseLibrary(modelname):
+    """Returns the pose library of a model, parsing its *<model>::poses* text file if it changed.
+
+    Args:
+      modelname(str): the model's name
+
+    Returns:
+      : PoseLibrary -- the stored poses of the model (empty if there are none)
+
+    """
+    text = bpy.data.texts.get(modelname + '::poses')
+    source = text.as_string() if text else ''
+    library = poselibraries.get(modelname)
+    if library is None or library.source != source:
+        posedict = yaml.load(source, Loader=yaml.Loader) if source.strip() else {}
+        library = PoseLibrary(posedict, source)
+        poselibraries[modelname] = library
+    return library
+
+
+def getJointObjects(modelname, jointnames):
+    """Returns the link objects of a model's joints.
+
+    The objects are looked up once for each model and set of joints and only searched again if
+    one of them was renamed or deleted.
+
+    Args:
+      modelname(str): the model's name
+      jointnames(list of str): names of the joints
+
+    Returns:
+      : list -- link object (or None if not in the scene) of every joint
+
+    """
+    jointnames = tuple(jointnames)
+    cached = _jointobjects.get(modelname)
+    if cached and cached[0] == jointnames:
+        objects = [bpy.data.objects.get(name) if name else None for name in cached[1]]
+        if all(
+            obj is not None and nUtils.getObjectName(obj, 'joint') == jointname
+            for obj, jointname, name in zip(objects, jointnames, cached[1])
+            if name
+        ):
+            return objects
+
+    root = sUtils.getObjectByProperty('model/name', modelname)
+    if root:
+        links = sUtils.getChildren(root, ('link',))
+    else:
+        links = sUtils.getObjectsByPhobostypes(['link'])
+    linksbyjoint = {nUtils.getObjectName(link, 'joint'): link for link in links}
+    objects = [linksbyjoint.get(jointname) for jointname in jointnames]
+    _jointobjects[modelname] = (jointnames, [obj.name if obj else None for obj in objects])
+    return objects
+
+
+def applyJointPositions(objects, positions):
+    """Sets the bone rotations of link objects to the given joint positions in one pass.
+
+    Joints with a position of NaN or without link object are left unchanged.
+
+    Args:
+      objects(list): link objects as returned by :func:`getJointObjects`
+      positions(iterable): joint position of every link object
+
+    Returns:
+
+    """
+    for obj, position in zip(objects, positions):
+        if obj is None or numpy.isnan(position):
+            continue
+        bone = obj.pose.bones['Bone']
+        bone.rotation_mode = 'XYZ'
+        bone.rotation_euler.y = position
 
 
 def storePose(root, posename):
@@ -169,27 +519,22 @@ def storePose(root, posename):
 
     """
     if root:
-        filename = nUtils.getModelName(root) + '::poses'
-        posedict = yaml.load(bUtils.readTextFile(filename))
-        if not posedict:
-            posedict = {posename: {'name': posename, 'joints': {}}}
-        else:
-            posedict[posename] = {'name': posename, 'joints': {}}
-        links = sUtils.getChildren(root, ('link',), True, False)
-        sUtils.selectObjects([root] + links, clear=True, active=0)
-        bpy.ops.object.mode_set(mode='POSE')
-        for link in (
-            link
-            for link in links
-            if 'joint/type' in link and link['joint/type'] not in ['fixed', 'floating']
-        ):
-            link.pose.bones['Bone'].rotation_mode = 'XYZ'
-            posedict[posename]['joints'][nUtils.getObjectName(link, 'joint')] = link.pose.bones[
-                'Bone'
-            ].rotation_euler.y
-        bpy.ops.object.mode_set(mode='OBJECT')
-        posedict = gUtils.roundFloatsInDict(posedict, ioUtils.getExpSettings().decimalPlaces)
-        bUtils.updateTextFile(filename, yaml.dump(posedict, default_flow_style=False))
+        modelname = nUtils.getModelName(root)
+        library = getPoseLibrary(modelname)
+        joints = {}
+        for link in sUtils.getChildren(root, ('link',), True, False):
+            if 'joint/type' in link and link['joint/type'] not in ['fixed', 'floating']:
+                bone = link.pose.bones['Bone']
+                bone.rotation_mode = 'XYZ'
+                joints[nUtils.getObjectName(link, 'joint')] = bone.rotation_euler.y
+        library.setPose(posename, joints)
+        posedict = gUtils.roundFloatsInDict(
+            library.toDictionary(), ioUtils.getExpSettings().decimalPlaces
+        )
+        bUtils.updateTextFile(modelname + '::poses', yaml.dump(posedict, default_flow_style=False))
+        # keep the library in line with the rounded positions of the text
+        source = bpy.data.texts[modelname + '::poses'].as_string()
+        poselibraries[modelname] = PoseLibrary(posedict, source)
     else:
         log("No model root provided to store the pose for", "ERROR")
 
@@ -204,33 +549,38 @@ def loadPose(modelname, posename):
     Returns:
 
     """
-
-    load_file = bUtils.readTextFile(modelname + '::poses')
-    if load_file == '':
+    library = getPoseLibrary(modelname)
+    if not library.posenames:
         log('No poses stored.', 'ERROR')
         return
-
-    loadedposes = yaml.load(load_file)
-    if posename not in loadedposes:
+    if posename not in library.poseindex:
         log('No pose with name ' + posename + ' stored for model ' + modelname, 'ERROR')
         return
-    prev_mode = bpy.context.mode
-    pose = loadedposes[posename]
 
-    # apply rotations to all joints defined by the pose
-    try:
-        bpy.ops.object.mode_set(mode='POSE')
-        for obj in sUtils.getObjectsByPhobostypes(['link']):
-            if nUtils.getObjectName(obj, 'joint') in pose['joints']:
-                obj.pose.bones['Bone'].rotation_mode = 'XYZ'
-                obj.pose.bones['Bone'].rotation_euler.y = float(
-                    pose['joints'][nUtils.getObjectName(obj, 'joint')]
-                )
-    except KeyError as error:
-        log("Could not apply the pose: " + str(error), 'ERROR')
-    finally:
-        # restore previous mode
-        bpy.ops.object.mode_set(mode=prev_mode)
+    objects = getJointObjects(modelname, library.jointnames)
+    applyJointPositions(objects, library.getPositions(posename))
+
+
+def interpolatePoses(modelname, startpose, endpose, factor):
+    """Applies a linear interpolation between two of a robot's stored poses.
+
+    Args:
+      modelname(str): the model's name
+      startpose(str): the name of the pose at factor 0
+      endpose(str): the name of the pose at factor 1
+      factor(float): interpolation factor between the poses
+
+    Returns:
+
+    """
+    library = getPoseLibrary(modelname)
+    for posename in (startpose, endpose):
+        if posename not in library.poseindex:
+            log('No pose with name ' + posename + ' stored for model ' + modelname, 'ERROR')
+            return
+
+    objects = getJointObjects(modelname, library.jointnames)
+    applyJointPositions(objects, library.interpolate(startpose, endpose, factor))
 
 
 def getPoses(modelname):
@@ -243,8 +593,130 @@ def getPoses(modelname):
       : A list containing the poses' names.
 
     """
-    load_file = bUtils.readTextFile(modelname + '::poses')
-    if load_file == '':
-        return []
-    poses = yaml.load(load_file)
-    return poses.keys()
+    return list(getPoseLibrary(modelname).posenames)
+
+
+#: Data path of the joint rotation in the actions of link objects.
+JOINT_DATA_PATH = 'pose.bones["Bone"].rotation_euler'
+
+
+def readTrajectory(filepath):
+    """Reads a joint trajectory from a CSV file with a header row of column names.
+
+    The columns may be separated by commas, semicolons, tabs or whitespace.
+
+    Args:
+      filepath(str): path of the trajectory file
+
+    Returns:
+      : tuple -- list of column names and (samples x columns) array of the values
+
+    """
+    with open(filepath, 'r') as trajectoryfile:
+        header = trajectoryfile.readline()
+    delimiter = None
+    for candidate in (',', ';', '\t'):
+        if candidate in header:
+            delimiter = candidate
+            break
+    columns = [column.strip() for column in header.split(delimiter)]
+    values = numpy.loadtxt(filepath, delimiter=delimiter, skiprows=1, ndmin=2)
+    if values.shape[1] != len(columns):
+        raise ValueError(
+            "Trajectory has {} columns, but {} column names.".format(values.shape[1], len(columns))
+        )
+    return columns, values
+
+
+def setJointKeyframes(obj, frames, positions):
+    """Replaces the keyframes of the joint rotation of a link object.
+
+    All keyframes are added at once and their coordinates set in bulk.
+
+    Args:
+      obj(bpy.types.Object): link object to animate
+      frames(numpy.ndarray): frame of every keyframe
+      positions(numpy.ndarray): joint position of every keyframe
+
+    Returns:
+
+    """
+    if not obj.animation_data:
+        obj.animation_data_create()
+    if not obj.animation_data.action:
+        obj.animation_data.action = bpy.data.actions.new(obj.name + '_trajectory')
+    action = obj.animation_data.action
+
+    fcurve = action.fcurves.find(JOINT_DATA_PATH, index=1)
+    if fcurve:
+        action.fcurves.remove(fcurve)
+    fcurve = action.fcurves.new(JOINT_DATA_PATH, index=1, action_group='Bone')
+
+    obj.pose.bones['Bone'].rotation_mode = 'XYZ'
+    fcurve.keyframe_points.add(len(frames))
+    fcurve.keyframe_points.foreach_set('co', numpy.column_stack((frames, positions)).ravel())
+    fcurve.update()
+
+
+def importTrajectory(modelname, filepath, timecolumn='time', step=1, startframe=None):
+    """Imports a joint trajectory as animation of a model's joints.
+
+    The columns of the trajectory are mapped to the joints by their joint names (as used in
+    :func:`storePose`). If the trajectory has a time column, it is converted to frames using the
+    frame rate of the scene, otherwise every sample is one frame. Only every *step*-th sample
+    (and the last one) is keyed.
+
+    Args:
+      modelname(str): the model's name
+      filepath(str): path of the trajectory file (see :func:`readTrajectory`)
+      timecolumn(str, optional): name of the time column (Default value = 'time')
+      step(int, optional): decimation of the samples (Default value = 1)
+      startframe(int, optional): frame of the first sample, defaults to the scene start (Default value = None)
+
+    Returns:
+      : int -- number of animated joints
+
+    """
+    try:
+        columns, values = readTrajectory(filepath)
+    except (OSError, ValueError) as error:
+        log("Could not read trajectory {}: {}".format(filepath, str(error)), 'ERROR')
+        return 0
+    if not len(values):
+        log("Trajectory {} contains no samples.".format(filepath), 'WARNING')
+        return 0
+
+    samples = numpy.arange(0, len(values), max(int(step), 1))
+    if samples[-1] != len(values) - 1:
+        samples = numpy.append(samples, len(values) - 1)
+    values = values[samples]
+
+    scene = bpy.context.scene
+    if startframe is None:
+        startframe = scene.frame_start
+    if timecolumn in columns:
+        times = values[:, columns.index(timecolumn)]
+        fps = scene.render.fps / scene.render.fps_base
+        frames = startframe + (times - times[0]) * fps
+    else:
+        frames = startframe + samples.astype(float)
+
+    jointcolumns = [i for i, column in enumerate(columns) if column != timecolumn]
+    jointnames = [columns[i] for i in jointcolumns]
+    objects = getJointObjects(modelname, jointnames)
+    missing = [name for name, obj in zip(jointnames, objects) if obj is None]
+    if missing:
+        log("No joints found for trajectory columns: " + ', '.join(missing), 'WARNING')
+
+    animated = 0
+    for column, obj in zip(jointcolumns, objects):
+        if obj is not None:
+            setJointKeyframes(obj, frames, values[:, column])
+            animated += 1
+
+    scene.frame_end = max(scene.frame_end, int(numpy.ceil(frames[-1])))
+    log(
+        "Imported {} samples of {} joints from {}.".format(len(frames), animated, filepath),
+        'INFO',
+    )
+    return animated
@@ -21,6 +21,7 @@ import sys
 from datetime import datetime
 
 import bpy
+import numpy
 import mathutils
 from bpy.types import Operator
 from bpy.props import (
@@ -36,6 +37,7 @@ from bpy.props import (
 import phobos.defs as defs
 import phobos.display as display
 import phobos.model.inertia as inertialib
+import phobos.model.models as models
 import phobos.utils.selection as sUtils
 import phobos.utils.general as gUtils
 import phobos.utils.io as ioUtils
@@ -43,6 +45,8 @@ import phobos.utils.blender as bUtils
 import phobos.utils.naming as nUtils
 import phobos.utils.editing as eUtils
 import phobos.utils.validation as vUtils
+import phobos.utils.kinematics as kinematics
+import phobos.utils.dynamics as dynamics
 import phobos.model.joints as jUtils
 import phobos.model.links as modellinks
 import phobos.model.motors as modelmotors
@@ -3512,13 +3516,20 @@ class ValidateOperator(Operator):
         """
         messages = {}
         root = sUtils.getRoot(context.selected_objects[0])
-        model, objectlist = models.deriveModelDictionary(root)
+        model = models.deriveModelDictionary(root)
         vUtils.check_dict(model, defs.definitions['model'], messages)
+        # reuse the cached results of the background validation
+        for obj in sUtils.getChildren(root):
+            for error in vUtils.getValidationMessages(obj):
+                vUtils.add_message(messages, obj.name, error.message)
         vUtils.checkMessages = messages if len(list(messages.keys())) > 0 else {"NoObject": []}
         for entry in messages:
             log("Errors in object " + entry + ":", 'INFO')
             for error in messages[entry]:
                 log(error, 'INFO')
+        validator = vUtils.getCompiledValidator(defs.definitions['model'])
+        for rule, duration in validator.timings.items():
+            log("Validated {} in {:.2f} ms.".format(rule, duration * 1000), 'DEBUG')
         return {'FINISHED'}
 
 
@@ -3568,6 +3579,236 @@ class CalculateMassOperator(Operator):
         self.layout.label("Sum of masses: " + str(self.mass))
 
 
+class AnalyzeMassPropertiesOperator(Operator):
+    """Compute the center of mass and inertia of the model for sampled joint configurations"""
+
+    bl_idname = "phobos.analyze_mass_properties"
+    bl_label = "Analyze Mass Properties"
+    bl_options = {'REGISTER'}
+
+    configurations = IntProperty(
+        name="Configurations",
+        default=1000,
+        min=1,
+        description="Number of joint configurations sampled within the joint limits",
+    )
+
+    seed = IntProperty(name="Seed", default=0, min=0, description="Seed of the sampling")
+
+    storedata = BoolProperty(
+        name="Store As Model Data",
+        default=False,
+        description="Store the summary as model data text, which is exported with SMURF",
+    )
+
+    def execute(self, context):
+        """
+
+        Args:
+          context: 
+
+        Returns:
+
+        """
+        root = sUtils.getRoot(context.active_object)
+        model = models.deriveModelDictionary(root)
+        tree = kinematics.KinematicTree(model)
+        configurations = tree.sampleConfigurations(self.configurations, seed=self.seed)
+        properties = kinematics.computeMassProperties(tree, configurations)
+        summary = kinematics.summarizeProperties(properties)
+        log(
+            "Mass of {}: {:.4f}, center of mass between {} and {} (mean {}).".format(
+                model['name'],
+                summary['mass'],
+                [round(value, 4) for value in summary['com_min']],
+                [round(value, 4) for value in summary['com_max']],
+                [round(value, 4) for value in summary['com_mean']],
+            ),
+            'INFO',
+        )
+        if self.storedata:
+            summary['name'] = model['name']
+            bUtils.updateTextFile(
+                model['name'] + '::massproperties',
+                yaml.dump({model['name']: summary}, default_flow_style=False),
+            )
+        return {'FINISHED'}
+
+    @classmethod
+    def poll(cls, context):
+        """
+
+        Args:
+          context: 
+
+        Returns:
+
+        """
+        return context.active_object is not None and sUtils.isRoot(
+            sUtils.getRoot(context.active_object)
+        )
+
+
+class CheckMotorLimitsOperator(Operator):
+    """Check the motor limits against the gravity loads of sampled joint configurations"""
+
+    bl_idname = "phobos.check_motor_limits"
+    bl_label = "Check Motor Limits"
+    bl_options = {'REGISTER'}
+
+    configurations = IntProperty(
+        name="Configurations",
+        default=1000,
+        min=1,
+        description="Number of joint configurations sampled within the joint limits",
+    )
+
+    seed = IntProperty(name="Seed", default=0, min=0, description="Seed of the sampling")
+
+    def execute(self, context):
+        """
+
+        Args:
+          context: 
+
+        Returns:
+
+        """
+        root = sUtils.getRoot(context.active_object)
+        model = models.deriveModelDictionary(root)
+        tree = kinematics.KinematicTree(model)
+        positions = tree.sampleConfigurations(self.configurations, seed=self.seed)
+        stillstand = numpy.zeros(positions.shape)
+        exceeded = dynamics.checkMotorLimits(model, positions, stillstand, stillstand, tree=tree)
+        for entry in exceeded:
+            log(
+                "Holding effort {:.3f} of joint {} exceeds the limit {:.3f} of motor {}.".format(
+                    entry['effort'], entry['joint'], entry['maxEffort'], entry['motor']
+                ),
+                'WARNING',
+            )
+        if not exceeded:
+            log("All motors of " + model['name'] + " hold the sampled configurations.", 'INFO')
+        return {'FINISHED'}
+
+    @classmethod
+    def poll(cls, context):
+        """
+
+        Args:
+          context: 
+
+        Returns:
+
+        """
+        return context.active_object is not None and sUtils.isRoot(
+            sUtils.getRoot(context.active_object)
+        )
+
+
+class ComputeWorkspaceOperator(Operator):
+    """Sample the positions reachable by the active link and show them as point cloud"""
+
+    bl_idname = "phobos.compute_workspace"
+    bl_label = "Compute Workspace"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    chain = StringProperty(
+        name="Chain", default='', description="Sample the joints of this chain instead"
+    )
+
+    samples = IntProperty(
+        name="Samples", default=100000, min=1, description="Number of sampled configurations"
+    )
+
+    voxelsize = FloatProperty(
+        name="Voxel Size",
+        default=0.02,
+        min=0.0001,
+        unit='LENGTH',
+        description="Edge length of the voxels collecting the reached positions",
+    )
+
+    manipulability = BoolProperty(
+        name="Manipulability", default=False, description="Compute the manipulability per voxel"
+    )
+
+    orientation = BoolProperty(
+        name="Orientation",
+        default=False,
+        description="Include the orientation in the manipulability",
+    )
+
+    pointcloud = BoolProperty(
+        name="Point Cloud", default=True, description="Add the reached voxels as point cloud"
+    )
+
+    filepath = StringProperty(
+        name="File", default='', subtype='FILE_PATH', description="Store the workspace as .npz"
+    )
+
+    def execute(self, context):
+        """
+
+        Args:
+          context: 
+
+        Returns:
+
+        """
+        root = sUtils.getRoot(context.active_object)
+        model = models.deriveModelDictionary(root)
+        endlink = nUtils.getObjectName(context.active_object)
+        startlink = None
+        if self.chain:
+            if self.chain not in model['chains']:
+                log("There is no chain " + self.chain + " in the model.", 'ERROR')
+                return {'CANCELLED'}
+            endlink = model['chains'][self.chain]['end']
+            startlink = model['chains'][self.chain]['start']
+
+        workspace = kinematics.computeWorkspace(
+            model,
+            endlink,
+            startlink=startlink,
+            samples=self.samples,
+            voxelsize=self.voxelsize,
+            manipulability=self.manipulability,
+            orientation=self.orientation,
+        )
+        log(
+            "{} reaches {} voxels moving the joints {}.".format(
+                endlink, len(workspace['voxels']), workspace['jointnames']
+            ),
+            'INFO',
+        )
+        if self.filepath:
+            kinematics.saveWorkspace(bpy.path.abspath(self.filepath), workspace)
+
+        if self.pointcloud:
+            centers = kinematics.getVoxelCenters(workspace)
+            mesh = bpy.data.meshes.new(endlink + '_workspace')
+            mesh.vertices.add(len(centers))
+            mesh.vertices.foreach_set('co', centers.astype(numpy.float32).ravel())
+            mesh.update()
+            pointcloud = bpy.data.objects.new(endlink + '_workspace', mesh)
+            context.scene.objects.link(pointcloud)
+            pointcloud.matrix_world = root.matrix_world
+        return {'FINISHED'}
+
+    @classmethod
+    def poll(cls, context):
+        """
+
+        Args:
+          context: 
+
+        Returns:
+
+        """
+        return context.active_object is not None and context.active_object.phobostype == 'link'
+
+
 class MeasureDistanceOperator(Operator):
     """Show distance between two selected objects in world coordinates"""
 
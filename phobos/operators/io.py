@@ -20,7 +20,6 @@ import inspect
 
 import bpy
 import bgl
-import glob
 from bpy.types import Operator
 from bpy.props import EnumProperty, StringProperty, FloatProperty, IntProperty, BoolProperty
 
@@ -28,12 +27,14 @@ import phobos.defs as defs
 import phobos.display as display
 from phobos.phoboslog import log
 import phobos.model.models as models
+import phobos.model.poses as poses
 import phobos.model.links as links
 import phobos.utils.selection as sUtils
 import phobos.utils.editing as eUtils
 import phobos.utils.io as ioUtils
 import phobos.utils.blender as bUtils
 import phobos.utils.naming as nUtils
+import phobos.utils.profiling as profiling
 from phobos.utils.io import securepath
 import phobos.io.entities as entity_io
 from phobos.io.entities import entity_types
@@ -178,25 +179,33 @@ class ExportModelOperator(Operator):
                 )
                 return {'CANCELLED'}
 
-        for root in roots:
-            # setup paths
-            exportpath = ioUtils.getExportPath()
-            if not securepath(exportpath):
-                log("Could not secure path to export to.", "ERROR")
-                continue
-            log("Export path: " + exportpath, "DEBUG")
-            ioUtils.exportModel(models.deriveModelDictionary(root), exportpath)
+        # the background export only derives the models here and writes them in modal()
+        background = ioUtils.getExpSettings().backgroundExport and not bpy.app.background
+        if background:
+            self._export = ioUtils.BackgroundExport()
 
-        # select all exported models after export is done
-        if ioUtils.getExpSettings().selectedOnly:
-            for root in roots:
-                objectlist = sUtils.getChildren(root, selected_only=True, include_hidden=False)
-                sUtils.selectObjects(objectlist, clear=False)
-        else:
-            bpy.ops.object.select_all(action='DESELECT')
+        with profiling.profile('ExportModelOperator'):
             for root in roots:
-                sUtils.selectObjects(list([root]), False)
-            bpy.ops.phobos.select_model()
+                # setup paths
+                exportpath = ioUtils.getExportPath()
+                if not securepath(exportpath):
+                    log("Could not secure path to export to.", "ERROR")
+                    continue
+                log("Export path: " + exportpath, "DEBUG")
+                if background:
+                    self._export.add(models.deriveModelDictionary(root), exportpath)
+                else:
+                    ioUtils.exportModel(models.deriveModelDictionary(root), exportpath)
+
+        self.selectExportedModels(roots)
+
+        if background:
+            log("Writing {} export tasks in background...".format(self._export.total), 'INFO')
+            self._export.start()
+            wm = context.window_manager
+            self._timer = wm.event_timer_add(0.1, context.window)
+            wm.modal_handler_add(self)
+            return {'RUNNING_MODAL'}
 
         # TODO: Move mesh export to individual formats? This is practically SMURF
         # export meshes in selected formats
@@ -234,6 +243,49 @@ class ExportModelOperator(Operator):
         log("Export successful.", "INFO", end="\n\n")
         return {'FINISHED'}
 
+    def modal(self, context, event):
+        """Runs the next step of a background export on every timer event.
+
+        Args:
+          context: 
+          event: 
+
+        Returns:
+
+        """
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        if not self._export.step():
+            return {'PASS_THROUGH'}
+
+        context.window_manager.event_timer_remove(self._timer)
+        if self._export.errors:
+            log("Export finished with {} errors.".format(self._export.errors), "ERROR")
+        else:
+            log("Export successful.", "INFO", end="\n\n")
+        return {'FINISHED'}
+
+    @staticmethod
+    def selectExportedModels(roots):
+        """Selects all exported models after the export is done.
+
+        Args:
+          roots(list): root objects of the exported models
+
+        Returns:
+
+        """
+        if ioUtils.getExpSettings().selectedOnly:
+            for root in roots:
+                objectlist = sUtils.getChildren(root, selected_only=True, include_hidden=False)
+                sUtils.selectObjects(objectlist, clear=False)
+        else:
+            bpy.ops.object.select_all(action='DESELECT')
+            for root in roots:
+                sUtils.selectObjects(list([root]), False)
+            bpy.ops.phobos.select_model()
+
 
 class ImportModelOperator(bpy.types.Operator):
     """Import robot model file from various formats"""
@@ -278,9 +330,12 @@ class ImportModelOperator(bpy.types.Operator):
 
         """
         log("Importing " + self.filepath + ' as ' + self.entitytype, "INFO")
-        model = entity_io.entity_types[self.entitytype]['import'](self.filepath)
-        # bUtils.cleanScene()
-        models.buildModelFromDictionary(model)
+        with profiling.profile('importModel', os.path.basename(self.filepath)):
+            profiling.phase(self.entitytype)
+            model = entity_io.entity_types[self.entitytype]['import'](self.filepath)
+            # bUtils.cleanScene()
+            profiling.phase('build')
+            models.buildModelFromDictionary(model)
         for layer in ['link', 'inertial', 'visual', 'collision', 'sensor']:
             bUtils.toggleLayer(defs.layerTypes[layer], True)
         return {'FINISHED'}
@@ -329,34 +384,24 @@ def generateLibEntries(param1, param2):
 
 
 def loadModelsAndPoses():
-    """TODO Missing documentation"""
-    # DOCU add some docstring
+    """Fills the models and poses list of the Phobos preferences from the pose catalogue.
+
+    The catalogue of the models folder is refreshed incrementally (see
+    :func:`phobos.io.libraries.poses.getPoseCatalogue`).
+
+    Args:
+
+    Returns:
+
+    """
+    import phobos.io.libraries.poses as poselibrary
+
     if bUtils.getPhobosPreferences().modelsfolder:
         modelsfolder = os.path.abspath(bUtils.getPhobosPreferences().modelsfolder)
     else:
         modelsfolder = ''
     modelsPosesColl = bUtils.getPhobosPreferences().models_poses
-    robots_found = []
-    print(modelsfolder)
-    for root, dirs, files in os.walk(modelsfolder):
-        for file in files:
-            if os.path.splitext(file)[-1] == '.smurf':
-                robots_found.append(os.path.join(root, file))
-    robots_dict = dict()
-    for robot in robots_found:
-        with open(robot, 'r') as robot_smurf:
-            robot_yml = yaml.load(robot_smurf)
-            model_name = robot_yml["modelname"]
-            robot_files = robot_yml["files"]
-            for file in robot_files:
-                if file.split('_')[-1] == "poses.yml":
-                    if model_name not in robots_dict:
-                        robots_dict[model_name] = []
-                    with open(os.path.join(os.path.dirname(robot), file)) as poses:
-                        poses_yml = yaml.load(poses)
-                        for pose in poses_yml['poses']:
-                            robots_dict[model_name].append({"posename": pose['name']})
-                            robots_dict[model_name][-1]["robotpath"] = os.path.dirname(robot)
+    robots_dict = poselibrary.getPoseCatalogue(modelsfolder)
 
     modelsPosesColl.clear()
     for model_name in robots_dict.keys():
@@ -379,19 +424,11 @@ def loadModelsAndPoses():
             item.type = "robot_pose"
             item.robot_name = model_name
             item.icon = "X_VEC"
-            search_path = pose["robotpath"]
-            if os.path.split(search_path)[-1] == "smurf":
-                search_path = os.path.dirname(search_path)
-            for file in glob.glob(
-                search_path + "/**/" + model_name + "_" + pose['posename'] + ".*"
-            ) + glob.glob(search_path + "/" + model_name + "_" + pose['posename'] + ".*"):
-                if (os.path.splitext(file)[-1].lower() == ".stl") or (
-                    os.path.splitext(file)[-1].lower() == ".obj"
-                ):
-                    item.model_file = os.path.join(search_path, file)
-                if os.path.splitext(file)[-1].lower() == ".png":
-                    item.preview = os.path.join(search_path, file)
-                    item.name = os.path.split(file)[-1]
+            if pose['model_file']:
+                item.model_file = pose['model_file']
+            if pose['preview']:
+                item.preview = pose['preview']
+                item.name = os.path.split(pose['preview'])[-1]
 
 
 class ReloadModelsAndPosesOperator(bpy.types.Operator):
@@ -778,16 +815,15 @@ class ExportCurrentPoseOperator(Operator):
 
         objectlist = sUtils.getChildren(root, selected_only=True, include_hidden=False)
         sUtils.selectObjects([root] + objectlist, clear=True, active=0)
-        models.loadPose(selected_robot.robot_name, selected_robot.label)
         parameter = self.decimate_ratio
         if self.decimate_type == 'UNSUBDIV':
             parameter = self.decimate_iteration
         elif self.decimate_type == 'DISSOLVE':
             parameter = self.decimate_angle_limit
-        exporter.bakeModel(
+        poses.bakePoses(
             objectlist,
             root['model/name'],
-            selected_robot.label,
+            [selected_robot.label],
             decimate_type=self.decimate_type,
             decimate_parameter=parameter,
         )
@@ -899,26 +935,19 @@ class ExportAllPosesOperator(Operator):
         """
         root = sUtils.getRoot(context.selected_objects[0])
         objectlist = sUtils.getChildren(root, selected_only=True, include_hidden=False)
-        sUtils.selectObjects(objectlist)
-        poses = models.getPoses(root['model/name'])
-        i = 1
-        for pose in poses:
-            sUtils.selectObjects([root] + objectlist, clear=True, active=0)
-            models.loadPose(root['model/name'], pose)
-            parameter = self.decimate_ratio
-            if self.decimate_type == 'UNSUBDIV':
-                parameter = self.decimate_iteration
-            elif self.decimate_type == 'DISSOLVE':
-                parameter = self.decimate_angle_limit
-            exporter.bakeModel(
-                objectlist,
-                root['model/name'],
-                pose,
-                decimate_type=self.decimate_type,
-                decimate_parameter=parameter,
-            )
-            display.setProgress(i / len(poses))
-            i += 1
+        parameter = self.decimate_ratio
+        if self.decimate_type == 'UNSUBDIV':
+            parameter = self.decimate_iteration
+        elif self.decimate_type == 'DISSOLVE':
+            parameter = self.decimate_angle_limit
+        poses.bakePoses(
+            objectlist,
+            root['model/name'],
+            poses.getPoses(root['model/name']),
+            decimate_type=self.decimate_type,
+            decimate_parameter=parameter,
+            progress=display.setProgress,
+        )
         sUtils.selectObjects([root] + objectlist, clear=True, active=0)
         bpy.ops.scene.reload_models_and_poses_operator()
         return {'FINISHED'}
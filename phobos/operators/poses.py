@@ -19,7 +19,13 @@ import inspect
 import bpy
 import blf
 import bgl
-from bpy.props import StringProperty, FloatProperty, FloatVectorProperty, EnumProperty
+from bpy.props import (
+    StringProperty,
+    FloatProperty,
+    FloatVectorProperty,
+    EnumProperty,
+    IntProperty,
+)
 from bpy.types import Operator
 from phobos.phoboslog import log
 import phobos.utils.selection as sUtils
@@ -203,6 +209,103 @@ class LoadPoseOperator(Operator):
         return {'FINISHED'}
 
 
+class InterpolatePosesOperator(Operator):
+    """Apply an interpolation between two stored poses of one of the scene's robots"""
+
+    bl_idname = 'phobos.interpolate_poses'
+    bl_label = "Interpolate Poses"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    robot_name = EnumProperty(
+        items=get_robot_names, name="Robot Name", description="Robot to interpolate the poses for"
+    )
+
+    start_pose = EnumProperty(
+        items=get_pose_names, name="Start Pose", description="Pose at an interpolation factor of 0"
+    )
+
+    end_pose = EnumProperty(
+        items=get_pose_names, name="End Pose", description="Pose at an interpolation factor of 1"
+    )
+
+    factor = FloatProperty(
+        name="Factor",
+        default=0.5,
+        min=0.0,
+        max=1.0,
+        subtype='FACTOR',
+        description="Interpolation factor between the start and end pose",
+    )
+
+    def execute(self, context):
+        """
+
+        Args:
+          context: 
+
+        Returns:
+
+        """
+        global current_robot_name
+        current_robot_name = self.robot_name
+        poses.interpolatePoses(self.robot_name, self.start_pose, self.end_pose, self.factor)
+        return {'FINISHED'}
+
+
+class ImportTrajectoryOperator(Operator):
+    """Import a joint trajectory from a CSV file as animation of one of the scene's robots"""
+
+    bl_idname = 'phobos.import_trajectory'
+    bl_label = "Import Trajectory"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filepath = StringProperty(subtype='FILE_PATH')
+
+    filter_glob = StringProperty(default='*.csv;*.txt', options={'HIDDEN'})
+
+    robot_name = EnumProperty(
+        items=get_robot_names, name="Robot Name", description="Robot to animate"
+    )
+
+    time_column = StringProperty(
+        name="Time Column",
+        default='time',
+        description="Column of the sample times in seconds, otherwise one sample per frame",
+    )
+
+    step = IntProperty(
+        name="Step", default=1, min=1, description="Only key every n-th sample of the trajectory"
+    )
+
+    def execute(self, context):
+        """
+
+        Args:
+          context: 
+
+        Returns:
+
+        """
+        if not poses.importTrajectory(
+            self.robot_name, self.filepath, timecolumn=self.time_column, step=self.step
+        ):
+            return {'CANCELLED'}
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        """
+
+        Args:
+          context: 
+          event: 
+
+        Returns:
+
+        """
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+
 # show robot model on 3dview
 def draw_preview_callback(self):
     """TODO Missing documentation"""
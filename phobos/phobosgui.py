@@ -30,10 +30,12 @@ from phobos.io import entities
 from phobos.io import meshes
 from phobos.io import scenes
 from phobos.io import libraries
+from phobos.model import models
 from phobos.model.models import deriveDictEntry
 from phobos.model.models import get_link_information
 from phobos.phoboslog import LOGLEVELS
 import phobos.utils.validation as validation
+import phobos.utils.hierarchy as hierarchy
 import phobos.utils.io as ioUtils
 import phobos.utils.naming as nUtils
 
@@ -115,6 +117,19 @@ class PhobosPrefs(AddonPreferences):
 
     logtoterminal = BoolProperty(name="logtoterminal", default=True)
 
+    profiling = BoolProperty(
+        name="profiling",
+        default=False,
+        description="Record timing and memory profiles of model derivation, export and import",
+    )
+
+    profilefolder = StringProperty(
+        name="profilefolder",
+        subtype="DIR_PATH",
+        description="Folder for the profile reports (defaults to the Phobos config folder)",
+        default='',
+    )
+
     models_poses = CollectionProperty(type=ModelPoseProp)
 
     def draw(self, context):
@@ -147,6 +162,12 @@ class PhobosPrefs(AddonPreferences):
         box.prop(self, "logtofile", text="write to logfile")
         box.prop(self, "logtoterminal", text="write to terminal")
         box.prop(self, "loglevel", text="log level")
+        layout.separator()
+
+        box = layout.box()
+        box.label(text="Profiling")
+        box.prop(self, "profiling", text="record profiles")
+        box.prop(self, "profilefolder", text="profile folder")
 
 
 prev_collections = {}
@@ -192,6 +213,11 @@ class PhobosExportSettings(bpy.types.PropertyGroup):
         name="decimals", description="Number of " + "decimal places to export", default=5, min=3
     )
     exportTextures = BoolProperty(name='Export textures', default=True)
+    backgroundExport = BoolProperty(
+        name='Export in background',
+        default=False,
+        description="Write the exported files in the background, while Blender stays responsive",
+    )
     outputMeshtype = EnumProperty(
         items=getMeshTypeListForEnumProp,
         name='link',
@@ -213,6 +239,13 @@ class PhobosExportSettings(bpy.types.PropertyGroup):
         items=axis_up_items, name='Up', description="Up axis of the obj export.", default='Y'
     )
 
+    # glb optional information
+    glb_quantize = BoolProperty(
+        name='Quantize',
+        default=False,
+        description="Store glb positions and normals as integers (KHR_mesh_quantization).",
+    )
+
     export_sdf_mesh_type = EnumProperty(
         items=getMeshTypeListForEnumProp,
         name='SDF mesh type',
@@ -712,8 +745,8 @@ class PhobosModelWarningsPanel(bpy.types.Panel):
         layout = self.layout
         obj = context.active_object
 
-        # show naming errors in the UI
-        errors = validation.validateObjectNames(obj)
+        # show the cached validation errors in the UI
+        errors = validation.getValidationMessages(obj)
         if errors:
             layout.separator()
             errorname = ""
@@ -732,7 +765,10 @@ class PhobosModelWarningsPanel(bpy.types.Panel):
                     col1.label(icon='QUESTION')
 
                 col2.label(text=error.message)
-                col3.operator(error.operator, text="Fix")
+                if error.operator:
+                    col3.operator(error.operator, text="Fix")
+                else:
+                    col3.label(text="")
 
 
 ignoredProps = set(
@@ -1057,6 +1093,8 @@ class PhobosModelPanel(bpy.types.Panel):
         mc2.label(text='Poses', icon='POSE_HLT')
         mc2.operator('phobos.store_pose')
         mc2.operator('phobos.load_pose')
+        mc2.operator('phobos.interpolate_poses')
+        mc2.operator('phobos.import_trajectory')
 
         # Hardware
         layout.separator()
@@ -1073,6 +1111,9 @@ class PhobosModelPanel(bpy.types.Panel):
         mc1 = minlayout.column(align=True)
         mc1.label(text="Masses & Inertia", icon='PHYSICS')
         mc1.operator('phobos.calculate_mass')
+        mc1.operator('phobos.analyze_mass_properties')
+        mc1.operator('phobos.check_motor_limits')
+        mc1.operator('phobos.compute_workspace')
         mc1.operator('phobos.generate_inertial_objects')
         mc1.operator('phobos.edit_inertial_data')
 
@@ -1184,6 +1225,7 @@ class PhobosExportPanel(bpy.types.Panel):
         # g1.prop(expsets, "relativePaths")
         g1.prop(expsets, "exportTextures")
         g1.prop(expsets, "selectedOnly")
+        g1.prop(expsets, "backgroundExport")
         g2 = ginlayout.column(align=True)
         g2.prop(expsets, "decimalPlaces")
 
@@ -1219,6 +1261,11 @@ class PhobosExportPanel(bpy.types.Panel):
             box.label('OBJ axis')
             box.prop(ioUtils.getExpSettings(), 'obj_axis_forward')
             box.prop(ioUtils.getExpSettings(), 'obj_axis_up')
+        if getattr(bpy.context.scene, 'export_mesh_glb', False):
+            layout.separator()
+            box = layout.box()
+            box.label('GLB export')
+            box.prop(ioUtils.getExpSettings(), 'glb_quantize')
         if getattr(bpy.context.scene, 'export_entity_sdf', False):
             layout.separator()
             box = layout.box()
@@ -1607,12 +1654,22 @@ def register():
     # loadModelsAndPoses()
     libraries.register()
 
+    # validate changed objects in the background
+    validation.register()
+
+    # track changed objects for the derivation of models
+    models.register()
+    hierarchy.register()
+
     print('  ... successful.')
 
 
 def unregister():
     """TODO Missing documentation"""
     print("Unregistering phobosgui...")
+    hierarchy.unregister()
+    models.unregister()
+    validation.unregister()
     libraries.unregister()
 
     display.unregister()
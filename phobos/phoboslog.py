@@ -10,6 +10,7 @@
 # -------------------------------------------------------------------------------
 
 import inspect
+import threading
 from datetime import datetime
 from enum import Enum
 from types import SimpleNamespace
@@ -24,6 +25,9 @@ LOGLEVELS = ('NONE', 'ERROR', 'WARNING', 'INFO', 'DEBUG')
 #: Calling functions that will never be logged to the GUI of Blender.
 FUNCTION_BLACKLIST = 'register'
 
+#: Per thread log redirection, worker threads must not access Blender (see :func:`log`).
+threadlog = threading.local()
+
 
 class Col(Enum):
     """Provides the color ids for different terminal messages."""
@@ -81,6 +85,12 @@ def log(message, level="INFO", prefix="", guionly=False, logfile=True, end='\n')
     Returns:
 
     """
+    # worker threads put their messages into a queue, which is logged on the main thread
+    messages = getattr(threadlog, 'messages', None)
+    if messages is not None:
+        messages.put((message, level))
+        return
+
     frame = inspect.stack()[1][0]
     info = inspect.getframeinfo(frame)
     originname = '{0} - {1} (l{2})'.format(
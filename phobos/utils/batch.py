@@ -0,0 +1,292 @@
+#!/usr/bin/python3
+# coding=utf-8
+
+# -------------------------------------------------------------------------------
+# This file is part of Phobos, a Blender Add-On to edit robot models.
+# Copyright (C) 2020 University of Bremen & DFKI GmbH Robotics Innovation Center
+#
+# You should have received a copy of the 3-Clause BSD License in the LICENSE file.
+# If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+# -------------------------------------------------------------------------------
+
+"""
+Contains the helpers for running Phobos batch jobs in a pool of background Blender processes.
+
+This module does not depend on Blender, so that command line scripts (like *phobos-convert*) can
+load it directly from file, as the *setup.py* does with :mod:`phobos.phobossystem`. The worker side
+(running inside Blender) uses :func:`readWorkerJobs` and :func:`writeWorkerReport` to exchange the
+jobs and results with the calling script.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+#: Default command line options for a background Blender worker with Phobos enabled.
+BLENDER_WORKER_ARGS = ['--addons', 'phobos', '--factory-startup', '-noaudio', '-b']
+
+#: Number of output lines of a crashed worker which are added to the report.
+WORKER_OUTPUT_TAIL = 20
+
+
+def getFileHash(filepath, cachedir=None):
+    """Returns the SHA1 hash of the content of a file.
+
+    If a cache directory is provided, the hash is stored with a key derived from the real path,
+    size and modification time of the file. Concurrent workers can share the same cache directory,
+    as every entry is written atomically.
+
+    Args:
+      filepath(str): path of the file to hash
+      cachedir(str, optional): directory of the shared hash cache (Default value = None)
+
+    Returns:
+      : str -- hex digest of the file content
+
+    """
+    stat = os.stat(filepath)
+    keyfile = None
+    if cachedir:
+        key = hashlib.sha1(
+            '{0}|{1}|{2}'.format(
+                os.path.realpath(filepath), stat.st_size, stat.st_mtime_ns
+            ).encode('utf-8')
+        ).hexdigest()
+        keyfile = os.path.join(cachedir, 'keys', key)
+        if os.path.isfile(keyfile):
+            with open(keyfile, 'r') as cachefile:
+                return cachefile.read().strip()
+
+    sha = hashlib.sha1()
+    with open(filepath, 'rb') as hashfile:
+        for block in iter(lambda: hashfile.read(1 << 20), b''):
+            sha.update(block)
+    digest = sha.hexdigest()
+
+    if keyfile:
+        writeAtomic(keyfile, digest)
+    return digest
+
+
+def writeAtomic(filepath, text):
+    """Writes a text file so that concurrent readers never see a partially written file.
+
+    Args:
+      filepath(str): path of the file to write
+      text(str): content of the file
+
+    Returns:
+
+    """
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    tmppath = '{0}.{1}.tmp'.format(filepath, os.getpid())
+    with open(tmppath, 'w') as tmpfile:
+        tmpfile.write(text)
+    os.replace(tmppath, filepath)
+
+
+def linkOrCopy(source, target):
+    """Hard links a file to the target path and falls back to copying it.
+
+    An existing target file is replaced.
+
+    Args:
+      source(str): path of the existing file
+      target(str): path of the new file
+
+    Returns:
+
+    """
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if os.path.exists(target):
+        os.remove(target)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def splitJobs(jobs, chunksize):
+    """Splits a list of jobs into chunks which are processed by a single worker each.
+
+    Args:
+      jobs(list): jobs to split
+      chunksize(int): maximum number of jobs per chunk
+
+    Returns:
+      : list -- list of job lists
+
+    """
+    chunksize = max(1, chunksize)
+    return [jobs[i : i + chunksize] for i in range(0, len(jobs), chunksize)]
+
+
+def getWorkerCommand(blender, pythonexpr, jobfile, reportfile, blendfile=None):
+    """Returns the command line for a background Blender worker.
+
+    Args:
+      blender(str): Blender executable
+      pythonexpr(str): python expression which runs the worker inside Blender
+      jobfile(str): path of the JSON file containing the jobs of the worker
+      reportfile(str): path of the JSON file the worker writes its results to
+      blendfile(str, optional): .blend file to open in the worker (Default value = None)
+
+    Returns:
+      : list -- command line arguments
+
+    """
+    command = [blender] + BLENDER_WORKER_ARGS
+    if blendfile:
+        command.append(blendfile)
+    return command + ['--python-expr', pythonexpr, '--', jobfile, reportfile]
+
+
+def runWorker(blender, pythonexpr, chunk, settings, blendfile=None):
+    """Runs a single background Blender worker on a chunk of jobs and returns its results.
+
+    If the worker does not produce a report (e.g. Blender crashed), every job of the chunk is
+    reported as failed together with the end of the worker output.
+
+    Args:
+      blender(str): Blender executable
+      pythonexpr(str): python expression which runs the worker inside Blender
+      chunk(list): list of job dictionaries
+      settings(dict): settings shared by all jobs
+      blendfile(str, optional): .blend file to open in the worker (Default value = None)
+
+    Returns:
+      : list -- result dictionaries of the jobs
+
+    """
+    with tempfile.TemporaryDirectory(prefix='phobos_') as tmpdir:
+        jobfile = os.path.join(tmpdir, 'jobs.json')
+        reportfile = os.path.join(tmpdir, 'report.json')
+        with open(jobfile, 'w') as jsonfile:
+            json.dump({'jobs': chunk, 'settings': settings}, jsonfile)
+
+        process = subprocess.run(
+            getWorkerCommand(blender, pythonexpr, jobfile, reportfile, blendfile),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,
+        )
+
+        if os.path.isfile(reportfile):
+            with open(reportfile, 'r') as jsonfile:
+                return json.load(jsonfile)
+
+    output = process.stdout.splitlines()[-WORKER_OUTPUT_TAIL:]
+    results = []
+    for job in chunk:
+        result = dict(job)
+        result['status'] = 'failed'
+        result['timings'] = {}
+        result['errors'] = [
+            'Worker exited with code {0} without report.'.format(process.returncode)
+        ] + output
+        results.append(result)
+    return results
+
+
+def runWorkerPool(blender, pythonexpr, chunks, settings, workers=None, callback=None):
+    """Distributes chunks of jobs onto a pool of background Blender workers.
+
+    Each chunk is a tuple of a job list and an optional .blend file the worker opens. The results
+    of all workers are collected in the order of the chunks.
+
+    Args:
+      blender(str): Blender executable
+      pythonexpr(str): python expression which runs the worker inside Blender
+      chunks(list): list of (jobs, blendfile) tuples
+      settings(dict): settings shared by all jobs
+      workers(int, optional): number of parallel workers, defaults to the CPU count (Default value = None)
+      callback(function, optional): called with the results of every finished chunk (Default value = None)
+
+    Returns:
+      : list -- result dictionaries of all jobs
+
+    """
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(runWorker, blender, pythonexpr, jobs, settings, blendfile)
+            for jobs, blendfile in chunks
+        ]
+        results = []
+        for future in futures:
+            chunkresults = future.result()
+            if callback:
+                callback(chunkresults)
+            results.extend(chunkresults)
+    return results
+
+
+def readWorkerJobs(argv=None):
+    """Reads the jobs and settings of a worker from the command line arguments behind '--'.
+
+    Args:
+      argv(list, optional): command line arguments, defaults to sys.argv (Default value = None)
+
+    Returns:
+      : tuple -- list of jobs, shared settings dictionary and path of the report file
+
+    """
+    argv = sys.argv if argv is None else argv
+    jobfile, reportfile = argv[argv.index('--') + 1 :][:2]
+    with open(jobfile, 'r') as jsonfile:
+        data = json.load(jsonfile)
+    return data['jobs'], data['settings'], reportfile
+
+
+def writeWorkerReport(reportfile, results):
+    """Writes the results of a worker to its report file.
+
+    Args:
+      reportfile(str): path of the report file
+      results(list): result dictionaries of the jobs
+
+    Returns:
+
+    """
+    writeAtomic(reportfile, json.dumps(results, indent=2, sort_keys=True))
+
+
+def formatReport(results, key='file'):
+    """Creates a human readable summary of batch results.
+
+    Args:
+      results(list): result dictionaries of the jobs
+      key(str, optional): entry of the results used as job name (Default value = 'file')
+
+    Returns:
+      : str -- report with one line per job and a summary line
+
+    """
+    lines = []
+    failed = 0
+    total = 0.0
+    for result in results:
+        timings = result.get('timings', {})
+        duration = sum(timings.values())
+        total += duration
+        if result.get('status') != 'ok':
+            failed += 1
+        lines.append(
+            '{0:7s} {1:8.3f}s {2} ({3})'.format(
+                result.get('status', 'failed'),
+                duration,
+                result.get(key, '?'),
+                ', '.join('{0} {1:.3f}s'.format(name, t) for name, t in sorted(timings.items())),
+            )
+        )
+        for error in result.get('errors', []):
+            lines.append('        ' + str(error))
+    lines.append(
+        '{0} jobs, {1} failed, {2:.3f}s processing time.'.format(len(results), failed, total)
+    )
+    return '\n'.join(lines)
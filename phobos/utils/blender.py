@@ -14,14 +14,16 @@ Contains all utility functions that are connected to Blender functionality first
 """
 
 import os
+import numpy
 import bpy
+import bmesh
 import mathutils
 import phobos.defs as defs
 import phobos.model.materials as materials
 from phobos.phoboslog import log
 from phobos.phobossystem import getConfigPath
-from . import selection as sUtils
 from . import naming as nUtils
+from . import rendering
 
 
 def update():
@@ -364,20 +366,79 @@ def cleanScene():
         bpy.data.lamps.remove(lamp)
 
 
+def getTriangleArrays(objects):
+    """Returns the triangulated meshes of objects in world coordinates with their material colours.
+
+    Args:
+      objects(list of bpy.types.Object): objects to collect the triangles of, non-mesh objects are skipped
+
+    Returns:
+      : tuple -- (n x 3) vertex, (m x 3) triangle and (m x 3) colour array
+
+    """
+    vertices = []
+    triangles = []
+    colors = []
+    offset = 0
+    for obj in objects:
+        if obj.type != 'MESH':
+            continue
+        mesh = obj.to_mesh(bpy.context.scene, True, 'PREVIEW')
+        mesh.transform(obj.matrix_world)
+        bm = bmesh.new()
+        bm.from_mesh(mesh)
+        bmesh.ops.triangulate(bm, faces=bm.faces)
+        bm.to_mesh(mesh)
+        bm.free()
+
+        meshvertices = numpy.empty(len(mesh.vertices) * 3)
+        mesh.vertices.foreach_get('co', meshvertices)
+        meshtriangles = numpy.empty(len(mesh.polygons) * 3, dtype=numpy.int64)
+        mesh.polygons.foreach_get('vertices', meshtriangles)
+        materialindices = numpy.empty(len(mesh.polygons), dtype=numpy.int64)
+        mesh.polygons.foreach_get('material_index', materialindices)
+        bpy.data.meshes.remove(mesh)
+
+        slotcolors = [
+            tuple(slot.material.diffuse_color) if slot.material else rendering.DEFAULT_COLOR
+            for slot in obj.material_slots
+        ]
+        slotcolors = numpy.array(slotcolors or [rendering.DEFAULT_COLOR]).reshape(-1, 3)
+        vertices.append(meshvertices.reshape(-1, 3))
+        triangles.append(meshtriangles.reshape(-1, 3) + offset)
+        colors.append(slotcolors[numpy.clip(materialindices, 0, len(slotcolors) - 1)])
+        offset += len(vertices[-1])
+    if not vertices:
+        return numpy.zeros((0, 3)), numpy.zeros((0, 3), dtype=numpy.int64), numpy.zeros((0, 3))
+    return numpy.vstack(vertices), numpy.vstack(triangles), numpy.vstack(colors)
+
+
 def createPreview(objects, export_path, modelname, render_resolution=256, opengl=False):
     """Creates a thumbnail of the given objects.
 
+    By default, the thumbnail is rendered by the software renderer of
+    :mod:`phobos.utils.rendering`, which also works in background mode without display.
+
     Args:
       objects(list of bpy.types.Object): list of objects for the thumbnail
       export_path(str): folder to export image to
       modelname(str): name of model (used as file name)
       render_resolution(int, optional): side length of resulting image in pixels (Default value = 256)
-      opengl(bool, optional): whether to use opengl rendering or not (Default value = False)
+      opengl(bool, optional): whether to use the viewport rendering or not (Default value = False)
 
     Returns:
 
     """
     log("Creating thumbnail of model: " + modelname, "INFO")
+    filepath = os.path.join(export_path, modelname + '.png')
+
+    if not opengl:
+        vertices, triangles, colors = getTriangleArrays(objects)
+        log("Saving model preview to: " + filepath, "INFO")
+        rendering.writeThumbnail(
+            filepath, vertices, triangles, colors, resolution=render_resolution
+        )
+        return
 
     # render presets
     bpy.context.scene.render.image_settings.file_format = 'PNG'
@@ -391,34 +452,13 @@ def createPreview(objects, export_path, modelname, render_resolution=256, opengl
             ob.hide_render = True
             ob.hide = True
 
-    # render the preview
-    if opengl:  # use the viewport representation to create preview
-        bpy.ops.view3d.view_selected()
-        bpy.ops.render.opengl(view_context=True)
-    else:  # use real rendering
-        # create camera
-        bpy.ops.object.camera_add(view_align=True)
-        cam = bpy.context.scene.objects.active
-        bpy.data.cameras[cam.data.name].type = 'ORTHO'
-        bpy.data.scenes[0].camera = cam  # set camera as active camera
-
-        sUtils.selectObjects(objects, True, 0)
-        bpy.ops.view3d.camera_to_view_selected()
-        # create light
-        bpy.ops.object.lamp_add(type='SUN', radius=1)
-        light = bpy.context.scene.objects.active
-        light.matrix_world = cam.matrix_world
-        # set background
-        oldcolor = bpy.data.worlds[0].horizon_color.copy()
-        bpy.data.worlds[0].horizon_color = mathutils.Color((1.0, 1.0, 1.0))
-        bpy.ops.render.render()
-        bpy.data.worlds[0].horizon_color = oldcolor
-        sUtils.selectObjects([cam, light], True, 0)
-        bpy.ops.object.delete()
+    # use the viewport representation to create preview
+    bpy.ops.view3d.view_selected()
+    bpy.ops.render.opengl(view_context=True)
 
     # safe render and reset the scene
-    log("Saving model preview to: " + os.path.join(export_path, modelname + '.png'), "INFO")
-    bpy.data.images['Render Result'].save_render(os.path.join(export_path, modelname + '.png'))
+    log("Saving model preview to: " + filepath, "INFO")
+    bpy.data.images['Render Result'].save_render(filepath)
 
     # make all objects visible again
     for ob in bpy.data.objects:
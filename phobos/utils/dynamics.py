@@ -0,0 +1,236 @@
+#!/usr/bin/python3
+# coding=utf-8
+
+# -------------------------------------------------------------------------------
+# This file is part of Phobos, a Blender Add-On to edit robot models.
+# Copyright (C) 2020 University of Bremen & DFKI GmbH Robotics Innovation Center
+#
+# You should have received a copy of the 3-Clause BSD License in the LICENSE file.
+# If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+# -------------------------------------------------------------------------------
+
+"""
+Contains the inverse dynamics of derived models for checking motor limits.
+"""
+
+import numpy
+
+import phobos.utils.kinematics as kinematics
+
+#: Default gravity in the root frame.
+GRAVITY = (0.0, 0.0, -9.81)
+
+
+def differentiateTrajectory(positions, timestep):
+    """Returns the joint velocities and accelerations of sampled joint trajectories.
+
+    The derivatives are approximated with central differences along the samples.
+
+    Args:
+      positions(numpy.ndarray): ... x samples x joints array of joint values
+      timestep(float): time between two samples
+
+    Returns:
+      : tuple(numpy.ndarray) -- joint velocities and accelerations in the shape of positions
+
+    """
+    positions = numpy.asarray(positions, dtype=float)
+    velocities = numpy.gradient(positions, timestep, axis=-2)
+    accelerations = numpy.gradient(velocities, timestep, axis=-2)
+    return velocities, accelerations
+
+
+def inverseDynamics(
+    model,
+    positions,
+    velocities,
+    accelerations,
+    gravity=GRAVITY,
+    chunksize=kinematics.CONFIGURATION_CHUNK,
+):
+    """Computes the joint efforts required for the given joint motions.
+
+    Efforts are torques for revolute and forces for prismatic joints. The samples are evaluated
+    in chunks of *chunksize*.
+
+    Args:
+      model(dict or KinematicTree): model dictionary or its kinematic tree
+      positions(numpy.ndarray): ... x joints array of joint values in the order of
+        :attr:`KinematicTree.jointnames`
+      velocities(numpy.ndarray): joint velocities in the shape of positions
+      accelerations(numpy.ndarray): joint accelerations in the shape of positions
+      gravity(iterable, optional): gravity in the root frame (Default value = GRAVITY)
+      chunksize(int, optional): number of samples evaluated at once
+
+    Returns:
+      : numpy.ndarray -- joint efforts in the shape of positions
+
+    """
+    tree = model if isinstance(model, kinematics.KinematicTree) else kinematics.KinematicTree(model)
+    positions = numpy.asarray(positions, dtype=float)
+    shape = positions.shape
+    positions = positions.reshape(-1, len(tree.jointnames))
+    velocities = numpy.asarray(velocities, dtype=float).reshape(positions.shape)
+    accelerations = numpy.asarray(accelerations, dtype=float).reshape(positions.shape)
+    efforts = numpy.zeros(positions.shape)
+    for start in range(0, len(positions), chunksize):
+        chunk = slice(start, start + chunksize)
+        efforts[chunk] = computeEfforts(
+            tree, positions[chunk], velocities[chunk], accelerations[chunk], gravity
+        )
+    return efforts.reshape(shape)
+
+
+def computeEfforts(tree, positions, velocities, accelerations, gravity):
+    """Runs the recursive Newton-Euler algorithm for one chunk of samples.
+
+    Args:
+      tree(KinematicTree): kinematic tree of the model
+      positions(numpy.ndarray): samples x joints array of joint values
+      velocities(numpy.ndarray): samples x joints array of joint velocities
+      accelerations(numpy.ndarray): samples x joints array of joint accelerations
+      gravity(iterable): gravity in the root frame
+
+    Returns:
+      : numpy.ndarray -- samples x joints array of joint efforts
+
+    """
+    count = len(positions)
+    links = len(tree.linknames)
+    transforms = tree.forwardKinematics(positions)
+    rotations = transforms[..., :3, :3]
+    origins = transforms[..., :3, 3]
+    axes = numpy.einsum('klij,lj->kli', rotations, tree.axes)
+    comoffsets = numpy.einsum('klij,lj->kli', rotations, tree.coms)
+    inertias = numpy.einsum('klij,ljm,klnm->klin', rotations, tree.inertias, rotations)
+
+    # forward pass: velocities and accelerations of the links, gravity as base acceleration
+    omegas = numpy.zeros((count, links, 3))
+    alphas = numpy.zeros((count, links, 3))
+    originaccs = numpy.tile(-numpy.asarray(gravity, dtype=float), (count, links, 1))
+    forces = numpy.zeros((count, links, 3))
+    moments = numpy.zeros((count, links, 3))
+    for i in range(links):
+        parent = tree.parents[i]
+        if parent >= 0:
+            omega = omegas[:, parent]
+            alpha = alphas[:, parent]
+            offset = origins[:, i] - origins[:, parent]
+            originaccs[:, i] = (
+                originaccs[:, parent]
+                + numpy.cross(alpha, offset)
+                + numpy.cross(omega, numpy.cross(omega, offset))
+            )
+            variable = tree.variables[i]
+            if variable >= 0:
+                velocity = axes[:, i] * velocities[:, variable, None]
+                acceleration = axes[:, i] * accelerations[:, variable, None]
+                if tree.prismatic[i]:
+                    originaccs[:, i] += acceleration + 2.0 * numpy.cross(omega, velocity)
+                else:
+                    alpha = alpha + acceleration + numpy.cross(omega, velocity)
+                    omega = omega + velocity
+            omegas[:, i] = omega
+            alphas[:, i] = alpha
+        comacc = (
+            originaccs[:, i]
+            + numpy.cross(alphas[:, i], comoffsets[:, i])
+            + numpy.cross(omegas[:, i], numpy.cross(omegas[:, i], comoffsets[:, i]))
+        )
+        forces[:, i] = tree.masses[i] * comacc
+        momentum = numpy.einsum('kij,kj->ki', inertias[:, i], omegas[:, i])
+        moments[:, i] = (
+            numpy.einsum('kij,kj->ki', inertias[:, i], alphas[:, i])
+            + numpy.cross(omegas[:, i], momentum)
+            + numpy.cross(comoffsets[:, i], forces[:, i])
+        )
+
+    # backward pass: accumulate forces and moments about the joint origins towards the root
+    efforts = numpy.zeros(positions.shape)
+    for i in range(links - 1, -1, -1):
+        parent = tree.parents[i]
+        if parent >= 0:
+            forces[:, parent] += forces[:, i]
+            moments[:, parent] += moments[:, i] + numpy.cross(
+                origins[:, i] - origins[:, parent], forces[:, i]
+            )
+        variable = tree.variables[i]
+        if variable >= 0:
+            load = forces[:, i] if tree.prismatic[i] else moments[:, i]
+            efforts[:, variable] = numpy.einsum('ki,ki->k', axes[:, i], load)
+    return efforts
+
+
+def getMotorLimits(model, tree=None):
+    """Returns the effort and speed limits of the movable joints of a model.
+
+    The limits are taken from the motor of a joint (*maxEffort*, *maxSpeed*) and default to the
+    joint limits (*effort*, *velocity*). Missing limits are infinite.
+
+    Args:
+      model(dict): model dictionary
+      tree(KinematicTree, optional): kinematic tree of the model (Default value = None)
+
+    Returns:
+      : tuple -- motor names, effort limits and speed limits in the order of the joint variables
+
+    """
+    tree = tree if tree is not None else kinematics.KinematicTree(model)
+    motorsbyjoint = {motor.get('joint'): motor for motor in model.get('motors', {}).values()}
+    names = []
+    efforts = numpy.full(len(tree.jointnames), numpy.inf)
+    speeds = numpy.full(len(tree.jointnames), numpy.inf)
+    for i, jointname in enumerate(tree.jointnames):
+        limits = model['joints'][jointname].get('limits', {})
+        motor = motorsbyjoint.get(jointname, {})
+        names.append(motor.get('name'))
+        efforts[i] = motor.get('maxEffort', limits.get('effort', numpy.inf))
+        speeds[i] = motor.get('maxSpeed', limits.get('velocity', numpy.inf))
+    return names, efforts, speeds
+
+
+def checkMotorLimits(
+    model, positions, velocities, accelerations, gravity=GRAVITY, tree=None, efforts=None
+):
+    """Checks the required efforts and speeds of joint motions against the motor limits.
+
+    Args:
+      model(dict): model dictionary
+      positions(numpy.ndarray): ... x joints array of joint values in the order of
+        :attr:`KinematicTree.jointnames`
+      velocities(numpy.ndarray): joint velocities in the shape of positions
+      accelerations(numpy.ndarray): joint accelerations in the shape of positions
+      gravity(iterable, optional): gravity in the root frame (Default value = GRAVITY)
+      tree(KinematicTree, optional): kinematic tree of the model (Default value = None)
+      efforts(numpy.ndarray, optional): precomputed joint efforts (Default value = None)
+
+    Returns:
+      : list(dict) -- joint, motor, peak effort and speed and limits of every exceeded joint
+
+    """
+    tree = tree if tree is not None else kinematics.KinematicTree(model)
+    if efforts is None:
+        efforts = inverseDynamics(tree, positions, velocities, accelerations, gravity)
+    jointcount = len(tree.jointnames)
+    # the zero rows keep the maxima defined for empty trajectories
+    efforts = numpy.vstack((numpy.zeros(jointcount), numpy.reshape(efforts, (-1, jointcount))))
+    velocities = numpy.vstack(
+        (numpy.zeros(jointcount), numpy.reshape(velocities, (-1, jointcount)))
+    )
+    peakefforts = numpy.abs(efforts).max(axis=0)
+    peakspeeds = numpy.abs(velocities).max(axis=0)
+    motornames, maxefforts, maxspeeds = getMotorLimits(model, tree)
+
+    exceeded = []
+    for i in numpy.flatnonzero((peakefforts > maxefforts) | (peakspeeds > maxspeeds)):
+        exceeded.append(
+            {
+                'joint': tree.jointnames[i],
+                'motor': motornames[i],
+                'effort': float(peakefforts[i]),
+                'maxEffort': float(maxefforts[i]),
+                'speed': float(peakspeeds[i]),
+                'maxSpeed': float(maxspeeds[i]),
+            }
+        )
+    return exceeded
@@ -18,6 +18,7 @@ import mathutils
 import math
 from phobos.phoboslog import log
 import phobos.utils.selection as sUtils
+import phobos.utils.hierarchy as hierarchy
 import phobos.utils.naming as nUtils
 import phobos.utils.blender as bUtils
 import phobos.utils.io as ioUtils
@@ -219,43 +220,35 @@ def parentObjectsTo(objects, parent, clear=False):
         bpy.ops.object.parent_set(type='BONE_RELATIVE')
     else:
         bpy.ops.object.parent_set(type='OBJECT')
+    hierarchy.invalidateLinkTree()
 
 
 def getNearestCommonParent(objs):
-    """Returns hierarchically lowest common parent of the provided objects
+    """Returns hierarchically lowest common parent of the provided links
+
+    The links between the provided links and their common parent are returned as well.
 
     Args:
-      objs: list of objects (bpy_types.Object)
+      objs: list of links (bpy_types.Object)
 
     Returns:
+      : tuple -- the common parent and the list of links between it and the provided links or
+      None if the links have no common parent
 
     """
-    anchor = objs[0]  # pick one link as the anchor link
-    rest = objs[1:]  # get other links to iterate over
-    in_all = False  # this will be true if all 'rest' branches have parent as a common parent
-    parent = anchor  # the candidate for common parent
-    inter_objects = set()
-    while not in_all and parent.parent:
-        in_all = True
-        parent = parent.parent  # go up the anchor branch
-        inter_objects.add(parent)
-        for obj in rest:  # start at base of each rest branch
-            o = obj
-            while (
-                o.parent and o.parent != parent
-            ):  # as long as there is a parent that is not the candidate parent
-                o = o.parent
-                inter_objects.add(o)
-            if (
-                o.parent != parent
-            ):  # check which break condition happened, break if not arrived at parent
-                in_all = False
-                break
-    if not in_all:  # this is only true if none of the branches set it to False and broke afterwards
+    tree = hierarchy.getLinkTree([obj.name for obj in objs])
+    parents = [tree.parents[obj.name] for obj in objs]
+    if None in parents:
         return None
-    else:
-        inter_objects.remove(parent)
-        return parent, list(inter_objects)
+    parent = parents[0]
+    for name in parents[1:]:
+        parent = tree.getCommonAncestor(parent, name)
+        if parent is None:
+            return None
+    inter_objects = set()
+    for name in parents:
+        inter_objects.update(tree.getPath(name, parent)[:-1])
+    return bpy.data.objects[parent], [bpy.data.objects[name] for name in inter_objects]
 
 
 def instantiateSubmodel(submodelname, instancename, size=1.0):
@@ -246,6 +246,30 @@ def calculateSum(objects, numeric_prop):
     return numsum
 
 
+def getPropertyHash(idblock):
+    """Returns a hash of the custom properties of a Blender ID block.
+
+    Changes of custom properties made by scripts do not tag the ID block as updated, so caches
+    of derived data compare the hash of the properties, too.
+
+    Args:
+      idblock(bpy.types.ID): object or material to hash the properties of
+
+    Returns:
+      : int -- hash of the custom properties
+
+    """
+    properties = []
+    for key, value in sorted(idblock.items(), key=lambda item: item[0]):
+        # transform Blender id_groups and id_arrays into comparable values
+        if hasattr(value, 'to_dict'):
+            value = value.to_dict()
+        elif hasattr(value, 'to_list'):
+            value = value.to_list()
+        properties.append((key, repr(value)))
+    return hash(tuple(properties))
+
+
 # TODO is this still needed?
 def datetimeFromIso(iso):
     """Accepts a date-time string in ISO format and returns a datetime object.
@@ -0,0 +1,328 @@
+#!/usr/bin/python3
+# coding=utf-8
+
+# -------------------------------------------------------------------------------
+# This file is part of Phobos, a Blender Add-On to edit robot models.
+# Copyright (C) 2020 University of Bremen & DFKI GmbH Robotics Innovation Center
+#
+# You should have received a copy of the 3-Clause BSD License in the LICENSE file.
+# If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+# -------------------------------------------------------------------------------
+
+"""
+Contains the index of the kinematic tree formed by the link objects.
+
+The index stores the links in depth-first order (Euler tour), so whether a link is part of the
+subtree of another one is answered in constant time, and the ancestors of every link in powers of
+two (binary lifting), so the nearest common parent of links is found in logarithmic time.
+
+The index is built on demand and discarded when links are parented differently. The Phobos
+editing functions discard it when they change the parenting, changes made in Blender are detected
+after scene updates. Links which are renamed or replaced without an update of the index are
+detected when they are looked up.
+"""
+
+import bisect
+
+import bpy
+from bpy.app.handlers import persistent
+
+#: Index of the link objects, None if it has to be built again.
+linktree = None
+
+#: Number of objects when the index was built, to detect added and removed objects.
+objectcount = 0
+
+#: Pointer of every link object when the index was built, to detect renamed links.
+linkpointers = {}
+
+
+class LinkTree(object):
+    """Index of the trees formed by links and their parent links.
+
+    Args:
+      parents(dict): name of the parent link of every link, None for root links
+
+    """
+
+    def __init__(self, parents):
+        #: name of the parent of every link, None for root links
+        self.parents = {}
+        #: names of the child links of every link
+        self.children = {name: [] for name in parents}
+        roots = []
+        for name in sorted(parents):
+            parent = parents[name]
+            if parent in self.children:
+                self.children[parent].append(name)
+                self.parents[name] = parent
+            else:
+                roots.append(name)
+                self.parents[name] = None
+
+        #: names of the links in depth-first order
+        self.order = []
+        #: position of every link in the depth-first order
+        self.entry = {}
+        #: position of the last link of the subtree of every link in the depth-first order
+        self.exit = {}
+        #: ancestors of every link at distances 1, 2, 4, 8, ...
+        self.ancestors = {}
+        stack = list(reversed(roots))
+        while stack:
+            name = stack.pop()
+            self.entry[name] = len(self.order)
+            self.order.append(name)
+            ancestors = []
+            ancestor = self.parents[name]
+            while ancestor is not None:
+                ancestors.append(ancestor)
+                jumps = self.ancestors[ancestor]
+                ancestor = jumps[len(ancestors) - 1] if len(jumps) >= len(ancestors) else None
+            self.ancestors[name] = ancestors
+            stack.extend(reversed(self.children[name]))
+        for name in reversed(self.order):
+            children = self.children[name]
+            self.exit[name] = self.exit[children[-1]] if children else self.entry[name]
+
+        #: names of the links without children in depth-first order
+        self.leaves = [name for name in self.order if not self.children[name]]
+        self.leafentries = [self.entry[name] for name in self.leaves]
+
+    def isAncestor(self, ancestor, name):
+        """Returns whether a link is part of the subtree of another link (including itself).
+
+        Args:
+          ancestor(str): name of the subtree root
+          name(str): name of the link
+
+        Returns:
+          : bool -- True if the link is in the subtree of the ancestor
+
+        """
+        return self.entry[ancestor] <= self.entry[name] <= self.exit[ancestor]
+
+    def getCommonAncestor(self, first, second):
+        """Returns the nearest link whose subtree contains both links.
+
+        Args:
+          first(str): name of the first link
+          second(str): name of the second link
+
+        Returns:
+          : str -- name of the common ancestor or None if the links are in different trees
+
+        """
+        if self.isAncestor(first, second):
+            return first
+        if self.isAncestor(second, first):
+            return second
+        name = first
+        for level in reversed(range(len(self.ancestors[first]))):
+            jumps = self.ancestors[name]
+            if level < len(jumps) and not self.isAncestor(jumps[level], second):
+                name = jumps[level]
+        return self.parents[name]
+
+    def getAncestors(self, name):
+        """Returns the ancestors of a link, beginning with its parent.
+
+        Args:
+          name(str): name of the link
+
+        Returns:
+          : list(str) -- names of the ancestors up to the root link
+
+        """
+        ancestors = []
+        name = self.parents[name]
+        while name is not None:
+            ancestors.append(name)
+            name = self.parents[name]
+        return ancestors
+
+    def getPath(self, first, second):
+        """Returns the links on the path between two links through their common ancestor.
+
+        Args:
+          first(str): name of the first link
+          second(str): name of the second link
+
+        Returns:
+          : list(str) -- names of the links from first to second or None if they are not connected
+
+        """
+        common = self.getCommonAncestor(first, second)
+        if common is None:
+            return None
+        paths = []
+        for name in (first, second):
+            path = [name]
+            while name != common:
+                name = self.parents[name]
+                path.append(name)
+            paths.append(path)
+        return paths[0] + list(reversed(paths[1][:-1]))
+
+    def getSubtree(self, name):
+        """Returns the links of the subtree of a link (including the link) in depth-first order.
+
+        Args:
+          name(str): name of the subtree root
+
+        Returns:
+          : list(str) -- names of the links in the subtree
+
+        """
+        return self.order[self.entry[name] : self.exit[name] + 1]
+
+    def getLeaves(self, name, include=None):
+        """Returns the leaves of the subtree of a link in depth-first order.
+
+        If *include* is provided, the subtrees of the links it rejects are left out, so a link
+        whose children are all rejected is a leaf.
+
+        Args:
+          name(str): name of the subtree root
+          include(function, optional): returns whether a link is part of the tree
+            (Default value = None)
+
+        Returns:
+          : list(str) -- names of the leaves
+
+        """
+        if include is None:
+            first = bisect.bisect_left(self.leafentries, self.entry[name])
+            last = bisect.bisect_right(self.leafentries, self.exit[name])
+            return self.leaves[first:last]
+
+        leaves = []
+        position = self.entry[name]
+        while position <= self.exit[name]:
+            current = self.order[position]
+            if current != name and not include(current):
+                position = self.exit[current] + 1
+                continue
+            if not any(include(child) for child in self.children[current]):
+                leaves.append(current)
+            position += 1
+        return leaves
+
+
+def getParentLink(obj):
+    """Returns the first link ascending the object tree from an object.
+
+    Args:
+      obj(bpy.types.Object): object to find the parent link for
+
+    Returns:
+      : bpy.types.Object -- the parent link or None if there is none
+
+    """
+    parent = obj.parent
+    while parent and parent.phobostype != 'link':
+        parent = parent.parent
+    return parent
+
+
+def isLinkTreeCurrent(names):
+    """Returns whether the index of the links contains the current link objects of the names.
+
+    Only the names are checked, changes of the parenting are detected by :func:`updateLinkTree`.
+
+    Args:
+      names(iterable): names of the links to look up
+
+    Returns:
+      : bool -- True if all names belong to the same link objects as when the index was built
+
+    """
+    for name in names:
+        obj = bpy.data.objects.get(name)
+        if obj is None or obj.phobostype != 'link' or linkpointers.get(name) != obj.as_pointer():
+            return False
+    return True
+
+
+def getLinkTree(names=()):
+    """Returns the index of all link objects, building it if necessary.
+
+    The index is built again as well, if one of the links to look up is not the link object of
+    this name in the index, e.g. after renaming links.
+
+    Args:
+      names(iterable, optional): names of the links which are looked up (Default value = ())
+
+    Returns:
+      : LinkTree -- the index of the links
+
+    """
+    global linktree, objectcount, linkpointers
+    if linktree is None or objectcount != len(bpy.data.objects) or not isLinkTreeCurrent(names):
+        parents = {}
+        linkpointers = {}
+        for obj in bpy.data.objects:
+            if obj.phobostype == 'link':
+                parent = getParentLink(obj)
+                parents[obj.name] = parent.name if parent else None
+                linkpointers[obj.name] = obj.as_pointer()
+        linktree = LinkTree(parents)
+        objectcount = len(bpy.data.objects)
+    return linktree
+
+
+@persistent
+def invalidateLinkTree(*args):
+    """Discards the index of the links, e.g. after changing the parenting of links.
+
+    Args:
+      *args: arguments passed by the handler
+
+    Returns:
+
+    """
+    global linktree
+    linktree = None
+
+
+@persistent
+def updateLinkTree(scene):
+    """Discards the index of the links if links have been parented differently or renamed.
+
+    This is called after scene updates.
+
+    Args:
+      scene(bpy.types.Scene): the updated scene
+
+    Returns:
+
+    """
+    if linktree is None or not bpy.data.objects.is_updated:
+        return
+    for obj in scene.objects:
+        if obj.is_updated and obj.phobostype == 'link':
+            parent = getParentLink(obj)
+            if linktree.parents.get(obj.name, False) != (parent.name if parent else None):
+                invalidateLinkTree()
+                return
+
+
+def register():
+    """Adds the handlers keeping the index of the links up to date."""
+    bpy.app.handlers.scene_update_post.append(updateLinkTree)
+    bpy.app.handlers.load_post.append(invalidateLinkTree)
+    bpy.app.handlers.undo_post.append(invalidateLinkTree)
+    bpy.app.handlers.redo_post.append(invalidateLinkTree)
+
+
+def unregister():
+    """Removes the handlers keeping the index of the links up to date."""
+    for handlers, handler in (
+        (bpy.app.handlers.scene_update_post, updateLinkTree),
+        (bpy.app.handlers.load_post, invalidateLinkTree),
+        (bpy.app.handlers.undo_post, invalidateLinkTree),
+        (bpy.app.handlers.redo_post, invalidateLinkTree),
+    ):
+        if handler in handlers:
+            handlers.remove(handler)
+    invalidateLinkTree()
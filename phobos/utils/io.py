@@ -12,11 +12,14 @@
 import shutil
 import sys
 import os
+import queue
+import threading
+from collections import namedtuple
 import bpy
 
 from phobos import defs
 from phobos import display
-from phobos.phoboslog import log
+from phobos.phoboslog import log, threadlog
 
 from phobos.io.entities import entity_types
 from phobos.io.meshes import mesh_types
@@ -25,8 +28,15 @@ from phobos.io.scenes import scene_types
 from phobos.utils import selection as sUtils
 from phobos.utils import naming as nUtils
 from phobos.utils import blender as bUtils
+from phobos.utils import profiling
 
 
+#: Export data stored for exporters running outside the main thread (see :class:`BackgroundExport`).
+exportsnapshot = {'texts': {}}
+
+#: A single step of a model export as returned by :func:`getExportTasks`.
+ExportTask = namedtuple('ExportTask', ['info', 'phase', 'item', 'function', 'args', 'threadsafe'])
+
 indent = '  '
 xmlHeader = '<?xml version="1.0"?>\n<!-- created with Phobos ' + defs.version + ' -->\n'
 
@@ -184,6 +194,8 @@ def getDictFromYamlDefs(phobostype, defname, name):
 
 def getOutputMeshtype():
     """Returns the mesh type to be used in exported files as specified in the GUI"""
+    if 'outputMeshtype' in exportsnapshot:
+        return exportsnapshot['outputMeshtype']
     return str(getExpSettings().outputMeshtype)
 
 
@@ -459,8 +471,94 @@ def copy_model(model):
     )
 
 
-def exportModel(model, exportpath='.', entitytypes=None):
-    """Exports model to a given path in the provided formats.
+def getModelTexts(modelname):
+    """Returns the content of all Blender text files belonging to a model.
+
+    Text files belong to a model if their name starts with the model name. If the texts were
+    stored with :func:`snapshotModelTexts` (e.g. for a background export), the stored content is
+    returned instead of accessing Blender data.
+
+    Args:
+      modelname(str): name of the model
+
+    Returns:
+      : dict -- text file names mapped to their content
+
+    """
+    if modelname in exportsnapshot['texts']:
+        return exportsnapshot['texts'][modelname]
+    return {
+        text.name: text.as_string()
+        for text in bpy.data.texts
+        if text.name.startswith(modelname)
+    }
+
+
+def snapshotModelTexts(modelname):
+    """Stores the text files of a model, so that exporters can access them outside the main thread.
+
+    Args:
+      modelname(str): name of the model
+
+    Returns:
+
+    """
+    exportsnapshot['texts'].pop(modelname, None)
+    exportsnapshot['texts'][modelname] = getModelTexts(modelname)
+
+
+def exportTextures(model, exportpath):
+    """Copies the textures of the model materials to the export path and updates their paths.
+
+    Args:
+      model(dict): dictionary of model to export
+      exportpath(str): path to export root
+
+    Returns:
+
+    """
+    # TODO: Move texture export to individual formats? This is practically SMURF
+    # TODO: Also, this does not properly take care of textures embedded in a .blend file
+    path = os.path
+    for materialname in model['materials']:
+        mat = model['materials'][materialname]
+        for texturetype in ['diffuseTexture', 'normalTexture', 'displacementTexture']:
+            # skip materials without texture
+            if texturetype not in mat:
+                continue
+
+            sourcepath = path.join(path.expanduser(bpy.path.abspath('//')), mat[texturetype])
+            if path.isfile(sourcepath):
+                texture_path = securepath(path.join(exportpath, 'textures'))
+                log(
+                    "Exporting texture {} of material {} to {}.".format(
+                        texturetype, mat[texturetype], texture_path
+                    ),
+                    'INFO',
+                )
+                try:
+                    shutil.copy(
+                        sourcepath, path.join(texture_path, path.basename(mat[texturetype]))
+                    )
+                except shutil.SameFileError:
+                    log(
+                        "{} of material {} already in place.".format(texturetype, materialname),
+                        'WARNING',
+                    )
+
+                # update the texture path in the model
+                mat[texturetype] = 'textures/' + path.basename(mat[texturetype])
+
+
+def getExportTasks(model, exportpath='.', entitytypes=None):
+    """Returns the tasks required to export a model in the formats selected in the GUI.
+
+    Every :data:`ExportTask` contains a description, the profiling phase and item name, the export
+    function, its arguments and whether the task can run outside the main thread. Entity exports
+    are thread safe if their entity type is flagged with *threadsafe*, while mesh exports always
+    require Blender operators.
+
+    Each entity task gets its own copy of the model, as the exporters might alter the dictionary.
 
     Args:
       model(dict): dictionary of model to export
@@ -468,83 +566,228 @@ def exportModel(model, exportpath='.', entitytypes=None):
       entitytypes(list of str, optional): export types - model will be exported to all (Default value = None)
 
     Returns:
+      : list -- export tasks
 
     """
-    if not exportpath:
-        exportpath = getExportPath()
     if not entitytypes:
         entitytypes = getEntityTypesForExport()
 
-    # TODO: Move texture export to individual formats? This is practically SMURF
-    # TODO: Also, this does not properly take care of textures embedded in a .blend file
-    # export textures
-    if getExpSettings().exportTextures:
-        path = os.path
-        for materialname in model['materials']:
-            mat = model['materials'][materialname]
-            for texturetype in ['diffuseTexture', 'normalTexture', 'displacementTexture']:
-                # skip materials without texture
-                if texturetype not in mat:
-                    continue
-
-                sourcepath = path.join(path.expanduser(bpy.path.abspath('//')), mat[texturetype])
-                if path.isfile(sourcepath):
-                    texture_path = securepath(path.join(exportpath, 'textures'))
-                    log(
-                        "Exporting texture {} of material {} to {}.".format(
-                            texturetype, mat[texturetype], texture_path
-                        ),
-                        'INFO',
-                    )
-                    try:
-                        shutil.copy(
-                            sourcepath, path.join(texture_path, path.basename(mat[texturetype]))
-                        )
-                    except shutil.SameFileError:
-                        log(
-                            "{} of material {} already in place.".format(texturetype, materialname),
-                            'WARNING',
-                        )
-
-                    # update the texture path in the model
-                    mat[texturetype] = 'textures/' + path.basename(mat[texturetype])
-
-    # export model in selected formats
+    tasks = []
     for entitytype in entitytypes:
         typename = "export_entity_" + entitytype
         # check if format exists and should be exported
         if not getattr(bpy.context.scene, typename, False):
             continue
-        # format exists and is exported:
         model_path = os.path.join(exportpath, entitytype)
         securepath(model_path)
+        tasks.append(
+            ExportTask(
+                "Exporting model '{}' as {}...".format(model['name'], entitytype),
+                entitytype,
+                None,
+                entity_types[entitytype]['export'],
+                (copy_model(model), model_path),
+                entity_types[entitytype].get('threadsafe', False),
+            )
+        )
 
-        # export model using entity export function
-        log("Export model '" + model['name'] + "' as " + entitytype + " to " + model_path, "DEBUG")
-
-        # pass a model copy to the entity export, as these might alter the dictionary
-        newmodel = copy_model(model)
-        entity_types[entitytype]['export'](newmodel, model_path)
-
-    # export meshes in selected formats
-    i = 1
-    mt = len([m for m in mesh_types if getattr(bpy.context.scene, "export_mesh_" + m, False)])
-    mc = len(model['meshes'])
-    n = mt * mc
     for meshtype in mesh_types:
+        if not getattr(bpy.context.scene, "export_mesh_" + meshtype, False):
+            continue
         mesh_path = getOutputMeshpath(exportpath, meshtype)
+        securepath(mesh_path)
+        for meshname in model['meshes']:
+            tasks.append(
+                ExportTask(
+                    'Exporting ' + meshname + '.' + meshtype + '...',
+                    meshtype,
+                    meshname,
+                    mesh_types[meshtype]['export'],
+                    (model['meshes'][meshname], mesh_path),
+                    False,
+                )
+            )
+    return tasks
+
+
+def runExportTask(task):
+    """Runs a single export task and records it in the active profile.
+
+    Args:
+      task(ExportTask): the task to run
+
+    Returns:
+
+    """
+    # tasks are only profiled as part of an export, not as single profiles
+    if profiling.isActive():
+        with profiling.profile(task.phase, task.item):
+            task.function(*task.args)
+    else:
+        task.function(*task.args)
+
+
+@profiling.profiled()
+def exportModel(model, exportpath='.', entitytypes=None):
+    """Exports model to a given path in the provided formats.
+
+    Args:
+      model(dict): dictionary of model to export
+      exportpath(str, optional): path to export root (Default value = '.')
+      entitytypes(list of str, optional): export types - model will be exported to all (Default value = None)
+
+    Returns:
+
+    """
+    if not exportpath:
+        exportpath = getExportPath()
+
+    if getExpSettings().exportTextures:
+        profiling.phase('textures')
+        exportTextures(model, exportpath)
+
+    profiling.phase('prepare')
+    tasks = getExportTasks(model, exportpath, entitytypes)
+    profiling.phase('write')
+    for i, task in enumerate(tasks):
+        log(task.info, 'DEBUG')
+        # mesh export errors are logged, while entity export errors are raised
         try:
-            if getattr(bpy.context.scene, "export_mesh_" + meshtype, False):
-                securepath(mesh_path)
-                for meshname in model['meshes']:
-                    mesh_types[meshtype]['export'](model['meshes'][meshname], mesh_path)
-                    display.setProgress(i / n, 'Exporting ' + meshname + '.' + meshtype + '...')
-                    i += 1
+            runExportTask(task)
         except KeyError as e:
-            log("Error exporting mesh {0} as {1}: {2}".format(meshname, meshtype, str(e)), "ERROR")
+            if task.phase not in mesh_types:
+                raise
+            log("Error in export task '{0}': {1}".format(task.info, str(e)), "ERROR")
+        display.setProgress((i + 1) / len(tasks), task.info)
     display.setProgress(0)
 
 
+class BackgroundExport(object):
+    """Exports models while the Blender UI stays responsive.
+
+    The models are derived on the main thread before they are added. Thread safe export tasks
+    (see :func:`getExportTasks`) are then serialized and written in a background thread, while the
+    remaining tasks are executed on the main thread one at a time by calling :meth:`step`, e.g.
+    from the timer events of a modal operator. The progress of both is streamed into the Phobos
+    progress bar and message history.
+    """
+
+    def __init__(self):
+        self.threadtasks = []
+        self.maintasks = []
+        self.modelnames = []
+        self.messages = queue.Queue()
+        self.logmessages = queue.Queue()
+        self.thread = None
+        self.finished = 0
+        self.errors = 0
+
+    def add(self, model, exportpath, entitytypes=None):
+        """Snapshots a derived model and adds its export tasks.
+
+        Args:
+          model(dict): dictionary of model to export
+          exportpath(str): path to export root
+          entitytypes(list of str, optional): export types (Default value = None)
+
+        Returns:
+
+        """
+        if getExpSettings().exportTextures:
+            exportTextures(model, exportpath)
+        snapshotModelTexts(model['name'])
+        self.modelnames.append(model['name'])
+        for task in getExportTasks(model, exportpath, entitytypes):
+            (self.threadtasks if task.threadsafe else self.maintasks).append(task)
+
+    @property
+    def total(self):
+        """Returns the total number of export tasks."""
+        return len(self.threadtasks) + len(self.maintasks)
+
+    def start(self):
+        """Starts writing the thread safe tasks in the background."""
+        exportsnapshot['outputMeshtype'] = getOutputMeshtype()
+        self.thread = threading.Thread(target=self._run, args=(list(self.threadtasks),))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _run(self, tasks):
+        """Runs the export tasks in the background thread and reports their state.
+
+        The log messages of the tasks are queued and logged on the main thread by :meth:`step`.
+
+        Args:
+          tasks(list): export tasks to run
+
+        Returns:
+
+        """
+        threadlog.messages = self.logmessages
+        for task in tasks:
+            try:
+                runExportTask(task)
+                self.messages.put((task.info, None))
+            except Exception as e:
+                self.messages.put(
+                    (task.info, "Error in export task '{0}': {1}".format(task.info, str(e)))
+                )
+
+    def _report(self, info, error=None):
+        """Updates the progress bar and message history for a finished task.
+
+        Args:
+          info(str): description of the finished task
+          error(str, optional): error message of the task (Default value = None)
+
+        Returns:
+
+        """
+        self.finished += 1
+        if error:
+            self.errors += 1
+            log(error, 'ERROR')
+        else:
+            log(info + ' done.', 'DEBUG')
+        display.setProgress(self.finished / max(1, self.total), info)
+
+    def step(self):
+        """Runs the next main thread task and collects the progress of the background thread.
+
+        Returns:
+          : bool -- True if all export tasks are finished
+
+        """
+        while not self.logmessages.empty():
+            log(*self.logmessages.get())
+        while not self.messages.empty():
+            self._report(*self.messages.get())
+
+        if self.maintasks:
+            task = self.maintasks.pop(0)
+            try:
+                runExportTask(task)
+                self._report(task.info)
+            except Exception as e:
+                self._report(
+                    task.info, "Error in export task '{0}': {1}".format(task.info, str(e))
+                )
+
+        if (
+            self.maintasks
+            or (self.thread and self.thread.is_alive())
+            or not self.messages.empty()
+            or not self.logmessages.empty()
+        ):
+            return False
+
+        for modelname in self.modelnames:
+            exportsnapshot['texts'].pop(modelname, None)
+        exportsnapshot.pop('outputMeshtype', None)
+        display.setProgress(0)
+        return True
+
+
 def exportScene(
     scenedict, exportpath='.', scenetypes=None, export_entity_models=False, entitytypes=None
 ):
@@ -0,0 +1,586 @@
+#!/usr/bin/python3
+# coding=utf-8
+
+# -------------------------------------------------------------------------------
+# This file is part of Phobos, a Blender Add-On to edit robot models.
+# Copyright (C) 2020 University of Bremen & DFKI GmbH Robotics Innovation Center
+#
+# You should have received a copy of the 3-Clause BSD License in the LICENSE file.
+# If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+# -------------------------------------------------------------------------------
+
+"""
+Contains the kinematic analysis of derived models for many joint configurations at once.
+"""
+
+import math
+
+import numpy
+
+#: Joint types whose joint value rotates the child link about the joint axis.
+REVOLUTE_TYPES = ('revolute', 'continuous')
+
+#: Joint types whose joint value translates the child link along the joint axis.
+PRISMATIC_TYPES = ('prismatic',)
+
+#: Number of configurations evaluated at once, limiting the memory use.
+CONFIGURATION_CHUNK = 4096
+
+#: Offset of the voxel indices in the voxel keys, allowing 2**20 voxels in every direction.
+VOXEL_OFFSET = 1 << 20
+
+
+def eulerToMatrices(angles):
+    """Returns the rotation matrices of XYZ euler angles (as used by Blender).
+
+    Args:
+      angles(numpy.ndarray): Nx3 array of euler angles
+
+    Returns:
+      : numpy.ndarray -- Nx3x3 array of rotation matrices
+
+    """
+    angles = numpy.asarray(angles, dtype=float).reshape(-1, 3)
+    cos = numpy.cos(angles)
+    sin = numpy.sin(angles)
+    cx, cy, cz = cos.T
+    sx, sy, sz = sin.T
+    return numpy.stack(
+        (
+            numpy.stack((cy * cz, sx * sy * cz - cx * sz, cx * sy * cz + sx * sz), axis=-1),
+            numpy.stack((cy * sz, sx * sy * sz + cx * cz, cx * sy * sz - sx * cz), axis=-1),
+            numpy.stack((-sy, sx * cy, cx * cy), axis=-1),
+        ),
+        axis=-2,
+    )
+
+
+def axisAngleMatrices(axis, angles):
+    """Returns the rotation matrices about an axis for an array of angles (Rodrigues' formula).
+
+    Args:
+      axis(numpy.ndarray): unit rotation axis
+      angles(numpy.ndarray): array of N angles
+
+    Returns:
+      : numpy.ndarray -- Nx3x3 array of rotation matrices
+
+    """
+    x, y, z = axis
+    skew = numpy.array(((0.0, -z, y), (z, 0.0, -x), (-y, x, 0.0)))
+    angles = numpy.asarray(angles, dtype=float)[:, None, None]
+    return (
+        numpy.eye(3) + numpy.sin(angles) * skew + (1.0 - numpy.cos(angles)) * numpy.dot(skew, skew)
+    )
+
+
+def inertiaListToMatrix(inertia):
+    """Returns the 3x3 inertia matrix of the list representation (ixx, ixy, ixz, iyy, iyz, izz).
+
+    Args:
+      inertia(list): the six independent inertia values
+
+    Returns:
+      : numpy.ndarray -- 3x3 inertia matrix
+
+    """
+    ixx, ixy, ixz, iyy, iyz, izz = inertia
+    return numpy.array(((ixx, ixy, ixz), (ixy, iyy, iyz), (ixz, iyz, izz)), dtype=float)
+
+
+def poseToMatrix(pose):
+    """Returns the homogeneous transform of a pose dictionary of the model.
+
+    Uses the *matrix* of the pose if it has one, its *translation* and *rotation_euler* otherwise.
+
+    Args:
+      pose(dict): the pose dictionary
+
+    Returns:
+      : numpy.ndarray -- 4x4 transform
+
+    """
+    if 'matrix' in pose:
+        return numpy.array(pose['matrix'], dtype=float)
+    matrix = numpy.eye(4)
+    matrix[:3, :3] = eulerToMatrices(pose.get('rotation_euler', (0.0, 0.0, 0.0)))[0]
+    matrix[:3, 3] = pose.get('translation', (0.0, 0.0, 0.0))
+    return matrix
+
+
+class KinematicTree(object):
+    """Kinematic tree of a derived model as arrays, with the links in topological order.
+
+    The movable joints (revolute, continuous and prismatic) are the variables of the joint
+    configurations, in the order of :attr:`jointnames`. All other joints are treated as fixed.
+
+    Args:
+      model(dict): model dictionary as derived by :func:`phobos.model.models.deriveModelDictionary`
+
+    """
+
+    def __init__(self, model):
+        links = model['links']
+        jointsbychild = {joint['child']: joint for joint in model.get('joints', {}).values()}
+        children = {}
+        roots = []
+        for linkname in sorted(links):
+            parent = links[linkname].get('parent')
+            if parent in links and linkname in jointsbychild:
+                children.setdefault(parent, []).append(linkname)
+            else:
+                roots.append(linkname)
+
+        #: names of the links, parents before their children
+        self.linknames = []
+        stack = list(reversed(roots))
+        while stack:
+            linkname = stack.pop()
+            self.linknames.append(linkname)
+            stack.extend(reversed(children.get(linkname, [])))
+        self.linkindices = {linkname: i for i, linkname in enumerate(self.linknames)}
+        rootnames = set(roots)
+
+        count = len(self.linknames)
+        #: index of the parent of every link, -1 for root links
+        self.parents = numpy.full(count, -1, dtype=int)
+        #: transform of every link in its parent frame at zero joint values
+        self.origins = numpy.tile(numpy.eye(4), (count, 1, 1))
+        #: unit axis of the joint of every link in the link frame
+        self.axes = numpy.zeros((count, 3))
+        #: index of the joint variable of every link, -1 for fixed links
+        self.variables = numpy.full(count, -1, dtype=int)
+        #: whether the joint variable of a link is prismatic
+        self.prismatic = numpy.zeros(count, dtype=bool)
+        self.masses = numpy.zeros(count)
+        #: center of mass of every link in the link frame
+        self.coms = numpy.zeros((count, 3))
+        #: inertia of every link about its center of mass in the link frame
+        self.inertias = numpy.zeros((count, 3, 3))
+
+        #: names of the joints of the configuration variables
+        self.jointnames = []
+        #: names of the links moved by the configuration variables
+        self.jointlinks = []
+        self.lower = []
+        self.upper = []
+        for i, linkname in enumerate(self.linknames):
+            link = links[linkname]
+            joint = jointsbychild.get(linkname)
+            if 'inertial' in link and link['inertial'].get('mass'):
+                inertial = link['inertial']
+                pose = inertial.get('pose', {})
+                rotation = eulerToMatrices(pose.get('rotation_euler', (0.0, 0.0, 0.0)))[0]
+                self.masses[i] = inertial['mass']
+                self.coms[i] = pose.get('translation', (0.0, 0.0, 0.0))
+                inertia = inertiaListToMatrix(inertial.get('inertia', [0.0] * 6))
+                self.inertias[i] = numpy.dot(numpy.dot(rotation, inertia), rotation.T)
+            if linkname in rootnames:
+                continue
+
+            self.parents[i] = self.linkindices[link['parent']]
+            self.origins[i] = poseToMatrix(link['pose'])
+            if joint['type'] not in REVOLUTE_TYPES + PRISMATIC_TYPES:
+                continue
+            axis = numpy.array(joint.get('axis', (0.0, 0.0, 1.0)), dtype=float)
+            if not numpy.linalg.norm(axis):
+                continue
+            self.axes[i] = axis / numpy.linalg.norm(axis)
+            self.variables[i] = len(self.jointnames)
+            self.prismatic[i] = joint['type'] in PRISMATIC_TYPES
+            self.jointnames.append(joint['name'])
+            self.jointlinks.append(linkname)
+            limits = joint.get('limits', {})
+            if joint['type'] != 'continuous' and 'lower' in limits and 'upper' in limits:
+                self.lower.append(limits['lower'])
+                self.upper.append(limits['upper'])
+            elif self.prismatic[i]:
+                self.lower.append(0.0)
+                self.upper.append(0.0)
+            else:
+                self.lower.append(-math.pi)
+                self.upper.append(math.pi)
+        self.lower = numpy.array(self.lower, dtype=float)
+        self.upper = numpy.array(self.upper, dtype=float)
+
+    def getDescendants(self, linkname):
+        """Returns a mask of the links in the subtree of a link (including the link).
+
+        Args:
+          linkname(str): name of the subtree root
+
+        Returns:
+          : numpy.ndarray -- boolean mask over the links
+
+        """
+        mask = numpy.zeros(len(self.linknames), dtype=bool)
+        mask[self.linkindices[linkname]] = True
+        # parents precede their children, so one pass in topological order suffices
+        for i in range(self.linkindices[linkname] + 1, len(self.linknames)):
+            mask[i] = self.parents[i] >= 0 and mask[self.parents[i]]
+        return mask
+
+    def sampleConfigurations(self, count, seed=None):
+        """Returns joint configurations sampled uniformly within the joint limits.
+
+        Continuous joints and revolute joints without limits are sampled within [-pi, pi],
+        prismatic joints without limits are kept at zero.
+
+        Args:
+          count(int): number of configurations
+          seed(int, optional): seed of the random generator (Default value = None)
+
+        Returns:
+          : numpy.ndarray -- count x joints array of joint values
+
+        """
+        generator = numpy.random.RandomState(seed)
+        return generator.uniform(self.lower, self.upper, (count, len(self.jointnames)))
+
+    def getBranch(self, linkname):
+        """Returns the links from the root link to a link.
+
+        Args:
+          linkname(str): name of the last link of the branch
+
+        Returns:
+          : list(int) -- indices of the links, beginning with the root link
+
+        """
+        branch = [self.linkindices[linkname]]
+        while self.parents[branch[-1]] >= 0:
+            branch.append(self.parents[branch[-1]])
+        return list(reversed(branch))
+
+    def getLocalTransforms(self, index, configurations):
+        """Returns the transforms of a link in its parent frame for an array of configurations.
+
+        Args:
+          index(int): index of the link
+          configurations(numpy.ndarray): configurations x joints array of joint values
+
+        Returns:
+          : numpy.ndarray -- configurations x 4 x 4 array of transforms or one 4x4 transform if
+          the link is fixed to its parent
+
+        """
+        variable = self.variables[index]
+        if variable < 0:
+            return self.origins[index]
+        values = configurations[:, variable]
+        motion = numpy.tile(numpy.eye(4), (len(configurations), 1, 1))
+        if self.prismatic[index]:
+            motion[:, :3, 3] = values[:, None] * self.axes[index]
+        else:
+            motion[:, :3, :3] = axisAngleMatrices(self.axes[index], values)
+        return numpy.matmul(self.origins[index], motion)
+
+    def forwardKinematics(self, configurations):
+        """Returns the transforms of all links in the root frame for an array of configurations.
+
+        Args:
+          configurations(numpy.ndarray): configurations x joints array of joint values
+
+        Returns:
+          : numpy.ndarray -- configurations x links x 4 x 4 array of link transforms
+
+        """
+        configurations = numpy.asarray(configurations, dtype=float)
+        configurations = configurations.reshape(-1, len(self.jointnames))
+        transforms = numpy.empty((len(configurations), len(self.linknames), 4, 4))
+        for i in range(len(self.linknames)):
+            local = self.getLocalTransforms(i, configurations)
+            if self.parents[i] < 0:
+                transforms[:, i] = local
+            else:
+                transforms[:, i] = numpy.matmul(transforms[:, self.parents[i]], local)
+        return transforms
+
+
+def computeMassProperties(model, configurations, subtrees=(), chunksize=CONFIGURATION_CHUNK):
+    """Computes the mass, center of mass and inertia of a model for an array of configurations.
+
+    The configurations are evaluated in chunks of *chunksize*. Besides the whole model, the
+    properties of the subtrees below the links in *subtrees* are computed, e.g. for an arm and
+    its payload.
+
+    Args:
+      model(dict or KinematicTree): model dictionary or its kinematic tree
+      configurations(numpy.ndarray): configurations x joints array of joint values in the order of
+        :attr:`KinematicTree.jointnames`
+      subtrees(iterable, optional): names of the subtree root links (Default value = ())
+      chunksize(int, optional): number of configurations evaluated at once
+
+    Returns:
+      : dict -- *mass* (float), *com* (Nx3) and *inertia* about the com (Nx3x3) of the model in the
+      root frame, and the same for every subtree in *subtrees*
+
+    """
+    tree = model if isinstance(model, KinematicTree) else KinematicTree(model)
+    configurations = numpy.asarray(configurations, dtype=float)
+    configurations = configurations.reshape(-1, len(tree.jointnames))
+    subtrees = list(subtrees)
+    masks = numpy.array(
+        [numpy.ones(len(tree.linknames), dtype=bool)]
+        + [tree.getDescendants(linkname) for linkname in subtrees],
+        dtype=float,
+    )
+    masses = numpy.dot(masks, tree.masses)
+    weights = masks * tree.masses
+    count = len(configurations)
+    coms = numpy.zeros((count, len(masks), 3))
+    inertias = numpy.zeros((count, len(masks), 3, 3))
+
+    for start in range(0, count, chunksize):
+        transforms = tree.forwardKinematics(configurations[start : start + chunksize])
+        rotations = transforms[..., :3, :3]
+        linkcoms = numpy.einsum('klij,lj->kli', rotations, tree.coms) + transforms[..., :3, 3]
+        rotated = numpy.einsum('klij,ljm,klnm->klin', rotations, tree.inertias, rotations)
+        # inertias of the links about the origin of the root frame (parallel axis theorem)
+        squared = numpy.einsum('kli,kli->kl', linkcoms, linkcoms)
+        origininertias = rotated + tree.masses[:, None, None] * (
+            squared[..., None, None] * numpy.eye(3)
+            - numpy.einsum('kli,klj->klij', linkcoms, linkcoms)
+        )
+        chunkcoms = numpy.einsum('sl,kli->ksi', weights, linkcoms)
+        chunkcoms /= numpy.where(masses > 0, masses, 1.0)[:, None]
+        # shift the inertias from the root frame origin to the centers of mass
+        squared = numpy.einsum('ksi,ksi->ks', chunkcoms, chunkcoms)
+        inertias[start : start + chunksize] = numpy.einsum(
+            'sl,klij->ksij', masks, origininertias
+        ) - masses[:, None, None] * (
+            squared[..., None, None] * numpy.eye(3)
+            - numpy.einsum('ksi,ksj->ksij', chunkcoms, chunkcoms)
+        )
+        coms[start : start + chunksize] = chunkcoms
+
+    properties = {
+        'jointnames': list(tree.jointnames),
+        'mass': float(masses[0]),
+        'com': coms[:, 0],
+        'inertia': inertias[:, 0],
+        'subtrees': {},
+    }
+    for i, linkname in enumerate(subtrees, 1):
+        properties['subtrees'][linkname] = {
+            'mass': float(masses[i]),
+            'com': coms[:, i],
+            'inertia': inertias[:, i],
+        }
+    return properties
+
+
+def summarizeProperties(properties):
+    """Returns a summary of mass properties for YAML export.
+
+    Args:
+      properties(dict): mass properties as returned by :func:`computeMassProperties`
+
+    Returns:
+      : dict -- mass and the mean, minimum and maximum center of mass and mean inertia
+
+    """
+    summary = {
+        'mass': properties['mass'],
+        'configurations': len(properties['com']),
+        'com_mean': properties['com'].mean(axis=0).tolist(),
+        'com_min': properties['com'].min(axis=0).tolist(),
+        'com_max': properties['com'].max(axis=0).tolist(),
+        'inertia_mean': properties['inertia'].mean(axis=0).tolist(),
+    }
+    if 'subtrees' in properties:
+        summary['subtrees'] = {
+            linkname: summarizeProperties(subtree)
+            for linkname, subtree in properties['subtrees'].items()
+        }
+    return summary
+
+
+def getVoxelKeys(indices):
+    """Returns a single integer key for every voxel index triple.
+
+    Args:
+      indices(numpy.ndarray): Nx3 array of voxel indices
+
+    Returns:
+      : numpy.ndarray -- array of N voxel keys
+
+    """
+    indices = indices.astype(numpy.int64) + VOXEL_OFFSET
+    return (indices[:, 0] << 42) | (indices[:, 1] << 21) | indices[:, 2]
+
+
+def getVoxelIndices(keys):
+    """Returns the voxel index triples of voxel keys (see :func:`getVoxelKeys`).
+
+    Args:
+      keys(numpy.ndarray): array of N voxel keys
+
+    Returns:
+      : numpy.ndarray -- Nx3 array of voxel indices
+
+    """
+    mask = (1 << 21) - 1
+    indices = numpy.stack(((keys >> 42) & mask, (keys >> 21) & mask, keys & mask), axis=-1)
+    return (indices - VOXEL_OFFSET).astype(numpy.int32)
+
+
+def computeWorkspace(
+    model,
+    endlink,
+    startlink=None,
+    samples=100000,
+    voxelsize=0.02,
+    manipulability=False,
+    orientation=False,
+    seed=None,
+    chunksize=CONFIGURATION_CHUNK,
+):
+    """Samples the positions reachable by a link and collects them in voxels.
+
+    The movable joints between the start link (or the root link) and the end link are sampled
+    uniformly within their limits, all other joints are kept at zero. The samples are evaluated in
+    chunks of *chunksize*, so millions of samples can be used.
+
+    The manipulability of a configuration is the product of the singular values of the jacobian J
+    of the end link position, or of its position and orientation if *orientation* is set, i.e.
+    sqrt(det(J J^T)) or sqrt(det(J^T J)) for fewer joints than rows, and zero without movable
+    joints. Every voxel stores the highest manipulability of its samples.
+
+    Args:
+      model(dict or KinematicTree): model dictionary or its kinematic tree
+      endlink(str): name of the link whose positions are sampled, e.g. the end of a chain
+      startlink(str, optional): name of the link where the sampled joints begin
+        (Default value = None)
+      samples(int, optional): number of sampled configurations (Default value = 100000)
+      voxelsize(float, optional): edge length of the voxels (Default value = 0.02)
+      manipulability(bool, optional): whether to compute the manipulability (Default value = False)
+      orientation(bool, optional): whether the manipulability includes the orientation
+        (Default value = False)
+      seed(int, optional): seed of the random generator (Default value = None)
+      chunksize(int, optional): number of samples evaluated at once
+
+    Returns:
+      : dict -- sampled *jointnames*, *voxelsize*, *voxels* (Nx3 voxel indices in the root frame),
+      *counts* of samples per voxel and *manipulability* per voxel if requested
+
+    """
+    tree = model if isinstance(model, KinematicTree) else KinematicTree(model)
+    branch = tree.getBranch(endlink)
+    if startlink is not None:
+        if tree.linkindices.get(startlink) not in branch:
+            raise ValueError("Link {} is not an ancestor of {}.".format(startlink, endlink))
+        branch = branch[branch.index(tree.linkindices[startlink]) :]
+        moving = [i for i in branch[1:] if tree.variables[i] >= 0]
+    else:
+        moving = [i for i in branch if tree.variables[i] >= 0]
+    variables = tree.variables[moving]
+    generator = numpy.random.RandomState(seed)
+    origin = numpy.eye(4)
+    for i in tree.getBranch(tree.linknames[branch[0]])[:-1]:
+        origin = numpy.dot(origin, tree.origins[i])
+
+    voxelkeys = []
+    voxelcounts = []
+    voxelvalues = []
+    for start in range(0, samples, chunksize):
+        count = min(chunksize, samples - start)
+        configurations = numpy.zeros((count, len(tree.jointnames)))
+        configurations[:, variables] = generator.uniform(
+            tree.lower[variables], tree.upper[variables], (count, len(variables))
+        )
+        transform = numpy.tile(origin, (count, 1, 1))
+        joints = []
+        for i in branch:
+            transform = numpy.matmul(transform, tree.getLocalTransforms(i, configurations))
+            if i in moving:
+                axis = numpy.einsum('kij,j->ki', transform[:, :3, :3], tree.axes[i])
+                joints.append((axis, transform[:, :3, 3], tree.prismatic[i]))
+        positions = transform[:, :3, 3]
+        keys = getVoxelKeys(numpy.floor(positions / voxelsize))
+        keys, inverse, counts = numpy.unique(keys, return_inverse=True, return_counts=True)
+        voxelkeys.append(keys)
+        voxelcounts.append(counts)
+        if manipulability:
+            jacobian = numpy.zeros((count, 6 if orientation else 3, len(joints)))
+            for j, (axis, jointposition, prismatic) in enumerate(joints):
+                if prismatic:
+                    jacobian[:, :3, j] = axis
+                else:
+                    jacobian[:, :3, j] = numpy.cross(axis, positions - jointposition)
+                    if orientation:
+                        jacobian[:, 3:, j] = axis
+            transposed = jacobian.transpose(0, 2, 1)
+            if not joints:
+                # the determinant of the empty product is 1, but the end link can not be moved
+                determinants = numpy.zeros(count)
+            elif len(joints) < jacobian.shape[1]:
+                determinants = numpy.linalg.det(numpy.matmul(transposed, jacobian))
+            else:
+                determinants = numpy.linalg.det(numpy.matmul(jacobian, transposed))
+            values = numpy.zeros(len(keys))
+            numpy.maximum.at(values, inverse, numpy.sqrt(numpy.clip(determinants, 0.0, None)))
+            voxelvalues.append(values)
+
+    keys, inverse = numpy.unique(
+        numpy.concatenate(voxelkeys or [numpy.zeros(0, dtype=numpy.int64)]), return_inverse=True
+    )
+    workspace = {
+        'jointnames': [tree.jointnames[variable] for variable in variables],
+        'voxelsize': voxelsize,
+        'voxels': getVoxelIndices(keys),
+        'counts': numpy.bincount(
+            inverse, numpy.concatenate(voxelcounts or [[]]), minlength=len(keys)
+        ).astype(numpy.uint32),
+    }
+    if manipulability:
+        values = numpy.zeros(len(keys))
+        numpy.maximum.at(values, inverse, numpy.concatenate(voxelvalues or [[]]))
+        workspace['manipulability'] = values.astype(numpy.float32)
+    return workspace
+
+
+def getVoxelCenters(workspace):
+    """Returns the centers of the reached voxels of a workspace in the root frame.
+
+    Args:
+      workspace(dict): workspace as returned by :func:`computeWorkspace`
+
+    Returns:
+      : numpy.ndarray -- Nx3 array of voxel centers
+
+    """
+    return (workspace['voxels'] + 0.5) * workspace['voxelsize']
+
+
+def saveWorkspace(filepath, workspace):
+    """Writes a workspace to a compressed .npz file.
+
+    Args:
+      filepath(str): path of the file
+      workspace(dict): workspace as returned by :func:`computeWorkspace`
+
+    Returns:
+
+    """
+    arrays = dict(workspace)
+    arrays['jointnames'] = numpy.array(workspace['jointnames'], dtype=str)
+    arrays['voxelsize'] = numpy.array(workspace['voxelsize'])
+    numpy.savez_compressed(filepath, **arrays)
+
+
+def loadWorkspace(filepath):
+    """Reads a workspace written by :func:`saveWorkspace`.
+
+    Args:
+      filepath(str): path of the file
+
+    Returns:
+      : dict -- the workspace
+
+    """
+    with numpy.load(filepath) as arrays:
+        workspace = {name: arrays[name] for name in arrays.files}
+    workspace['jointnames'] = workspace['jointnames'].tolist()
+    workspace['voxelsize'] = float(workspace['voxelsize'])
+    return workspace
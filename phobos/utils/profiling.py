@@ -0,0 +1,339 @@
+#!/usr/bin/python3
+# coding=utf-8
+
+# -------------------------------------------------------------------------------
+# This file is part of Phobos, a Blender Add-On to edit robot models.
+# Copyright (C) 2020 University of Bremen & DFKI GmbH Robotics Innovation Center
+#
+# You should have received a copy of the 3-Clause BSD License in the LICENSE file.
+# If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+# -------------------------------------------------------------------------------
+
+"""
+Contains the optional profiling of model derivation, export and import.
+
+If profiling is activated in the Phobos preferences, functions decorated with :func:`profiled`
+record their wall time, number of calls and memory peak (using :mod:`tracemalloc`). The phases
+within a function are separated by :func:`phase` calls. Measurements are stored hierarchically
+using paths like ``deriveModelDictionary/links/deriveLink``.
+
+When the outermost profiled function returns, the report is written as JSON to the profile folder
+and as a table to the Blender text file *phobos_profile*.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+
+import bpy
+
+import phobos.utils.blender as bUtils
+from phobos.phoboslog import log
+from phobos.phobossystem import getConfigPath
+
+#: Measurements of the running profile, mapping phase paths to calls, time and memory.
+records = OrderedDict()
+
+#: Report of the last finished profile.
+lastreport = {}
+
+#: Stack of the currently measured phases.
+_stack = []
+
+#: Whether memory tracing was started for the running profile.
+_tracing = False
+
+#: Name of the Blender text file the profile table is written to.
+PROFILE_TEXT = 'phobos_profile'
+
+
+def isEnabled():
+    """Returns whether profiling is activated in the Phobos preferences.
+
+    Args:
+
+    Returns:
+      : bool -- True if profiling is activated
+
+    """
+    try:
+        return bpy.context.user_preferences.addons['phobos'].preferences.profiling
+    except (KeyError, AttributeError):
+        return False
+
+
+def isActive():
+    """Returns whether a profile is currently being recorded.
+
+    Profiles are only recorded on the main thread, as the phase stack is not thread safe.
+
+    Args:
+
+    Returns:
+      : bool -- True if a profile is being recorded
+
+    """
+    return bool(_stack) and threading.current_thread() is threading.main_thread()
+
+
+def _enter(name, isphase=False):
+    """Starts the measurement of a phase.
+
+    Args:
+      name(str): name of the phase
+      isphase(bool, optional): whether this is a phase started by :func:`phase` (Default value = False)
+
+    Returns:
+
+    """
+    current, peak = tracemalloc.get_traced_memory()
+    if _stack:
+        _stack[-1]['peak'] = max(_stack[-1]['peak'], peak)
+        path = _stack[-1]['path'] + '/' + name
+    else:
+        path = name
+    # the peak is reset for every phase if possible (Python >= 3.9), otherwise nested phases
+    # report the peak since the start of the profile
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+        peak = current
+    # create the record here to keep the phases in the order they were started
+    records.setdefault(path, {'calls': 0, 'time': 0.0, 'memory': 0})
+    _stack.append(
+        {
+            'path': path,
+            'phase': isphase,
+            'start': time.perf_counter(),
+            'memory': current,
+            'peak': peak,
+        }
+    )
+
+
+def _exit():
+    """Finishes the measurement of the innermost phase and stores it in the records.
+
+    Args:
+
+    Returns:
+
+    """
+    frame = _stack.pop()
+    duration = time.perf_counter() - frame['start']
+    current, peak = tracemalloc.get_traced_memory()
+    frame['peak'] = max(frame['peak'], peak)
+    if _stack:
+        _stack[-1]['peak'] = max(_stack[-1]['peak'], frame['peak'])
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+
+    record = records[frame['path']]
+    record['calls'] += 1
+    record['time'] += duration
+    record['memory'] = max(record['memory'], frame['peak'] - frame['memory'])
+
+
+def _closePhases():
+    """Finishes all phases started by :func:`phase` on top of the stack."""
+    while _stack and _stack[-1]['phase']:
+        _exit()
+
+
+def phase(name):
+    """Finishes the running phase of the current profiled function and starts a new one.
+
+    The last phase is finished when the profiled function returns. Nothing is recorded if no
+    profile is active.
+
+    Args:
+      name(str): name of the new phase
+
+    Returns:
+
+    """
+    if not isActive():
+        return
+    _closePhases()
+    _enter(name, isphase=True)
+
+
+@contextmanager
+def profile(name, item=None):
+    """Context manager recording a phase in the active profile.
+
+    If there is no active profile and profiling is enabled, a new profile is started and its
+    report written after the phase is finished. If an item name (e.g. of a link) is provided, the
+    phase is additionally recorded for this item.
+
+    Args:
+      name(str): name of the phase
+      item(str, optional): name of the item the phase is recorded for (Default value = None)
+
+    Returns:
+
+    """
+    root = not _stack
+    mainthread = threading.current_thread() is threading.main_thread()
+    if (root and not (mainthread and isEnabled())) or (not root and not isActive()):
+        yield
+        return
+
+    if root:
+        startProfile()
+    _enter(name)
+    if item is not None:
+        _enter(str(item))
+    try:
+        yield
+    finally:
+        _closePhases()
+        if item is not None:
+            _exit()
+        _exit()
+        if root:
+            finishProfile(name)
+
+
+def profiled(name=None, item=None):
+    """Decorator recording the calls of a function in the active profile (see :func:`profile`).
+
+    The optional item function is called with the arguments of the decorated function and returns
+    a name (e.g. of the link) for which the call is recorded separately.
+
+    Args:
+      name(str, optional): name of the phase, defaults to the function name (Default value = None)
+      item(function, optional): returns the item name for the arguments of a call (Default value = None)
+
+    Returns:
+      : function -- the decorator
+
+    """
+
+    def profiling(function):
+        """
+
+        Args:
+          function:
+
+        Returns:
+
+        """
+        phasename = name if name else function.__name__
+
+        def profiling_wrapper(*args, **kwargs):
+            """
+
+            Args:
+              *args:
+              **kwargs:
+
+            Returns:
+
+            """
+            if not _stack and not isEnabled():
+                return function(*args, **kwargs)
+            with profile(phasename, item(*args, **kwargs) if item else None):
+                return function(*args, **kwargs)
+
+        return profiling_wrapper
+
+    return profiling
+
+
+def startProfile():
+    """Clears the records and starts tracing memory allocations for a new profile."""
+    global _tracing
+    records.clear()
+    _tracing = not tracemalloc.is_tracing()
+    if _tracing:
+        tracemalloc.start()
+
+
+def finishProfile(name):
+    """Stops the memory tracing and writes the report of the finished profile.
+
+    Args:
+      name(str): name of the outermost profiled phase
+
+    Returns:
+      : dict -- the profile report
+
+    """
+    global lastreport
+    if _tracing:
+        tracemalloc.stop()
+
+    lastreport = {
+        'name': name,
+        'date': datetime.now().strftime("%Y%m%d_%H:%M:%S"),
+        'blendfile': bpy.data.filepath,
+        'python': sys.version.split()[0],
+        'records': OrderedDict((path, dict(record)) for path, record in records.items()),
+    }
+
+    filepath = os.path.join(
+        getProfileFolder(), '{0}_{1}.json'.format(name, datetime.now().strftime("%Y%m%d_%H%M%S"))
+    )
+    try:
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        with open(filepath, 'w') as jsonfile:
+            json.dump(lastreport, jsonfile, indent=2)
+        log("Wrote profile of {} to {}.".format(name, filepath), 'INFO')
+    except OSError as e:
+        log("Could not write profile to {}: {}".format(filepath, str(e)), 'ERROR')
+
+    bUtils.updateTextFile(PROFILE_TEXT, formatReport(lastreport))
+    return lastreport
+
+
+def getProfileFolder():
+    """Returns the folder profile reports are written to.
+
+    Args:
+
+    Returns:
+      : str -- path of the profile folder
+
+    """
+    try:
+        folder = bpy.context.user_preferences.addons['phobos'].preferences.profilefolder
+    except (KeyError, AttributeError):
+        folder = ''
+    if not folder:
+        folder = os.path.join(getConfigPath(), 'profiles')
+    return bpy.path.abspath(folder)
+
+
+def formatReport(report):
+    """Creates a table of the measurements in a profile report.
+
+    Args:
+      report(dict): profile report as created by :func:`finishProfile`
+
+    Returns:
+      : str -- table with one line per phase
+
+    """
+    lines = [
+        'Phobos profile of {} ({})'.format(report['name'], report['date']),
+        '{0:>10s} {1:>7s} {2:>12s}  {3}'.format('time [s]', 'calls', 'memory [kB]', 'phase'),
+    ]
+    for path, record in report['records'].items():
+        depth = path.count('/')
+        lines.append(
+            '{0:10.4f} {1:7d} {2:12.1f}  {3}{4}'.format(
+                record['time'],
+                record['calls'],
+                record['memory'] / 1024,
+                '  ' * depth,
+                path.split('/')[-1],
+            )
+        )
+    return '\n'.join(lines)
+
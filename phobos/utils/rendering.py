@@ -0,0 +1,337 @@
+#!/usr/bin/python3
+# coding=utf-8
+
+# -------------------------------------------------------------------------------
+# This file is part of Phobos, a Blender Add-On to edit robot models.
+# Copyright (C) 2020 University of Bremen & DFKI GmbH Robotics Innovation Center
+#
+# You should have received a copy of the 3-Clause BSD License in the LICENSE file.
+# If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+# -------------------------------------------------------------------------------
+
+"""
+Contains the software renderer for model and pose thumbnails.
+"""
+
+import os
+import zlib
+import struct
+
+import numpy
+
+#: Default viewing direction (from the camera towards the model), front right and above.
+VIEW_DIRECTION = (-1.0, 1.0, -0.7)
+
+#: Colour of triangles without material.
+DEFAULT_COLOR = (0.6, 0.6, 0.6)
+
+#: Direction towards the light in camera coordinates (right, up, towards the camera).
+LIGHT_DIRECTION = (-0.4, 0.5, -1.0)
+
+#: Maximum number of candidate pixels rasterized at once, limiting the memory use.
+RASTER_CHUNK = 1 << 22
+
+
+def getCameraAxes(direction):
+    """Returns the right, up and forward axes of a camera looking in the given direction.
+
+    Args:
+      direction(iterable): viewing direction of the camera
+
+    Returns:
+      : numpy.ndarray -- 3x3 matrix with the camera axes as rows
+
+    """
+    forward = numpy.asarray(direction, dtype=float)
+    forward /= numpy.linalg.norm(forward)
+    right = numpy.cross(forward, (0.0, 0.0, 1.0))
+    if numpy.linalg.norm(right) < 1e-6:
+        right = numpy.array((1.0, 0.0, 0.0))
+    right /= numpy.linalg.norm(right)
+    up = numpy.cross(right, forward)
+    return numpy.array((right, up, forward))
+
+
+def projectVertices(vertices, resolution, direction=VIEW_DIRECTION, perspective=False, margin=0.05):
+    """Projects vertices to the pixel coordinates of an image showing all of them.
+
+    Args:
+      vertices(numpy.ndarray): (n x 3) array of vertex coordinates
+      resolution(int): side length of the square image in pixels
+      direction(iterable, optional): viewing direction (Default value = VIEW_DIRECTION)
+      perspective(bool, optional): perspective instead of orthographic projection (Default value = False)
+      margin(float, optional): empty border as fraction of the image size (Default value = 0.05)
+
+    Returns:
+      : tuple -- (n x 3) arrays of pixel x, pixel y and depth (smaller is closer) and camera coordinates
+
+    """
+    center = (vertices.min(axis=0) + vertices.max(axis=0)) / 2
+    camera = (vertices - center).dot(getCameraAxes(direction).T)
+    if perspective:
+        radius = numpy.linalg.norm(camera, axis=1).max()
+        # camera at a 40 degree field of view showing the bounding sphere
+        distance = camera[:, 2] + max(radius, 1e-9) / numpy.tan(numpy.radians(20)) * 1.1
+        points = camera[:, :2] / distance[:, None]
+        depth = -1.0 / distance
+    else:
+        points = camera[:, :2]
+        depth = camera[:, 2]
+
+    low = points.min(axis=0)
+    extent = max((points.max(axis=0) - low).max(), 1e-9)
+    scale = resolution * (1 - 2 * margin) / extent
+    offset = (resolution - (points.max(axis=0) - low) * scale) / 2
+    pixels = numpy.empty((len(vertices), 3))
+    pixels[:, 0] = (points[:, 0] - low[0]) * scale + offset[0]
+    # the image rows start at the top
+    pixels[:, 1] = resolution - ((points[:, 1] - low[1]) * scale + offset[1])
+    pixels[:, 2] = depth
+    return pixels, camera
+
+
+def getShading(camera, triangles):
+    """Returns the flat shading intensity of every triangle.
+
+    The shading is independent of the triangle orientation, as exported meshes do not always have
+    consistent normals.
+
+    Args:
+      camera(numpy.ndarray): (n x 3) array of vertex coordinates in the camera frame
+      triangles(numpy.ndarray): (m x 3) array of vertex indices
+
+    Returns:
+      : numpy.ndarray -- intensity between 0 and 1 for every triangle
+
+    """
+    corners = camera[triangles]
+    normals = numpy.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    lengths = numpy.linalg.norm(normals, axis=1)
+    lengths[lengths == 0] = 1
+    light = numpy.asarray(LIGHT_DIRECTION) / numpy.linalg.norm(LIGHT_DIRECTION)
+    diffuse = numpy.abs(normals.dot(light)) / lengths
+    return 0.3 + 0.7 * diffuse
+
+
+def rasterize(pixels, triangles, resolution):
+    """Rasterizes triangles to a z-buffer.
+
+    The candidate pixels in the bounding boxes of the triangles are tested in chunks using
+    barycentric coordinates, the closest triangle of every pixel wins.
+
+    Args:
+      pixels(numpy.ndarray): (n x 3) array of pixel coordinates and depth of the vertices
+      triangles(numpy.ndarray): (m x 3) array of vertex indices
+      resolution(int): side length of the square image in pixels
+
+    Returns:
+      : numpy.ndarray -- index of the visible triangle per pixel (-1 for background)
+
+    """
+    zbuffer = numpy.full(resolution * resolution, numpy.inf)
+    triangleids = numpy.full(resolution * resolution, -1, dtype=numpy.int64)
+
+    corners = pixels[triangles]
+    a, b, c = corners[:, 0], corners[:, 1], corners[:, 2]
+    area = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+    xmin = numpy.clip(numpy.floor(corners[:, :, 0].min(axis=1)), 0, resolution).astype(int)
+    xmax = numpy.clip(numpy.ceil(corners[:, :, 0].max(axis=1)), 0, resolution).astype(int)
+    ymin = numpy.clip(numpy.floor(corners[:, :, 1].min(axis=1)), 0, resolution).astype(int)
+    ymax = numpy.clip(numpy.ceil(corners[:, :, 1].max(axis=1)), 0, resolution).astype(int)
+    widths = xmax - xmin
+    counts = numpy.where(numpy.abs(area) > 1e-12, widths * (ymax - ymin), 0)
+
+    # split the triangles into chunks of at most RASTER_CHUNK candidate pixels
+    ends = numpy.cumsum(counts)
+    bounds = numpy.searchsorted(ends, numpy.arange(RASTER_CHUNK, ends[-1], RASTER_CHUNK))
+    bounds = numpy.unique(numpy.concatenate(([0], bounds, [len(triangles)])))
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        chunk = numpy.arange(start, stop)
+        chunkcounts = counts[chunk]
+        candidates = numpy.repeat(chunk, chunkcounts)
+        if not len(candidates):
+            continue
+        local = numpy.arange(len(candidates)) - numpy.repeat(
+            numpy.cumsum(chunkcounts) - chunkcounts, chunkcounts
+        )
+        x = xmin[candidates] + local % widths[candidates]
+        y = ymin[candidates] + local // widths[candidates]
+        px = x + 0.5
+        py = y + 0.5
+
+        ta, tb, tc = a[candidates], b[candidates], c[candidates]
+        tarea = area[candidates]
+        w0 = ((tb[:, 0] - px) * (tc[:, 1] - py) - (tb[:, 1] - py) * (tc[:, 0] - px)) / tarea
+        w1 = ((tc[:, 0] - px) * (ta[:, 1] - py) - (tc[:, 1] - py) * (ta[:, 0] - px)) / tarea
+        w2 = 1 - w0 - w1
+        inside = (w0 >= 0) & (w1 >= 0) & (w2 >= 0)
+        if not inside.any():
+            continue
+
+        depth = (w0 * ta[:, 2] + w1 * tb[:, 2] + w2 * tc[:, 2])[inside]
+        pixelids = (y * resolution + x)[inside]
+        candidates = candidates[inside]
+        # keep the closest candidate per pixel, then compare with the z-buffer
+        order = numpy.lexsort((depth, pixelids))
+        pixelids, depth, candidates = pixelids[order], depth[order], candidates[order]
+        first = numpy.concatenate(([True], pixelids[1:] != pixelids[:-1]))
+        pixelids, depth, candidates = pixelids[first], depth[first], candidates[first]
+        closer = depth < zbuffer[pixelids]
+        zbuffer[pixelids[closer]] = depth[closer]
+        triangleids[pixelids[closer]] = candidates[closer]
+    return triangleids.reshape(resolution, resolution)
+
+
+def renderThumbnail(
+    vertices,
+    triangles,
+    colors=None,
+    resolution=256,
+    direction=VIEW_DIRECTION,
+    perspective=False,
+    supersampling=2,
+):
+    """Renders a thumbnail of a triangle mesh.
+
+    Args:
+      vertices(numpy.ndarray): (n x 3) array of vertex coordinates
+      triangles(numpy.ndarray): (m x 3) array of vertex indices
+      colors(numpy.ndarray, optional): (m x 3) array of RGB colours between 0 and 1 (Default value = None)
+      resolution(int, optional): side length of the square image in pixels (Default value = 256)
+      direction(iterable, optional): viewing direction (Default value = VIEW_DIRECTION)
+      perspective(bool, optional): perspective instead of orthographic projection (Default value = False)
+      supersampling(int, optional): samples per pixel and axis for antialiasing (Default value = 2)
+
+    Returns:
+      : numpy.ndarray -- (resolution x resolution x 4) RGBA image with transparent background
+
+    """
+    vertices = numpy.asarray(vertices, dtype=float).reshape(-1, 3)
+    triangles = numpy.asarray(triangles, dtype=numpy.int64).reshape(-1, 3)
+    if colors is None:
+        colors = numpy.tile(DEFAULT_COLOR, (len(triangles), 1))
+    colors = numpy.asarray(colors, dtype=float).reshape(-1, 3)
+    size = resolution * supersampling
+    if not len(triangles):
+        return numpy.zeros((resolution, resolution, 4), dtype=numpy.uint8)
+
+    pixels, camera = projectVertices(vertices, size, direction, perspective)
+    triangleids = rasterize(pixels, triangles, size)
+    shaded = numpy.vstack((colors * getShading(camera, triangles)[:, None], (0, 0, 0)))
+
+    image = numpy.empty((size, size, 4))
+    image[:, :, :3] = shaded[triangleids]
+    image[:, :, 3] = triangleids >= 0
+    # average the samples of each pixel, weighting the colours by coverage
+    image = image.reshape(resolution, supersampling, resolution, supersampling, 4).mean(axis=(1, 3))
+    coverage = image[:, :, 3:]
+    image[:, :, :3] /= numpy.where(coverage > 0, coverage, 1)
+    return numpy.round(numpy.clip(image, 0, 1) * 255).astype(numpy.uint8)
+
+
+def writePNG(filepath, image):
+    """Writes an RGBA image as PNG file.
+
+    Args:
+      filepath(str): path of the PNG file
+      image(numpy.ndarray): (height x width x 4) array of 8 bit RGBA values
+
+    Returns:
+
+    """
+
+    def chunk(tag, data):
+        """Returns a PNG chunk with length and checksum."""
+        return (
+            struct.pack('>I', len(data))
+            + tag
+            + data
+            + struct.pack('>I', zlib.crc32(tag + data) & 0xFFFFFFFF)
+        )
+
+    height, width = image.shape[:2]
+    # every row starts with the filter type 0 (none)
+    rows = numpy.hstack((numpy.zeros((height, 1), dtype=numpy.uint8), image.reshape(height, -1)))
+    data = (
+        b'\x89PNG\r\n\x1a\n'
+        + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+        + chunk(b'IDAT', zlib.compress(rows.tobytes(), 6))
+        + chunk(b'IEND', b'')
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
+    with open(filepath, 'wb') as pngfile:
+        pngfile.write(data)
+
+
+def writeThumbnail(filepath, vertices, triangles, colors=None, **kwargs):
+    """Renders a thumbnail of a triangle mesh and writes it as PNG file.
+
+    Args:
+      filepath(str): path of the PNG file
+      vertices(numpy.ndarray): (n x 3) array of vertex coordinates
+      triangles(numpy.ndarray): (m x 3) array of vertex indices
+      colors(numpy.ndarray, optional): (m x 3) array of RGB colours between 0 and 1 (Default value = None)
+      **kwargs: options of :func:`renderThumbnail`
+
+    Returns:
+
+    """
+    writePNG(filepath, renderThumbnail(vertices, triangles, colors, **kwargs))
+
+
+def readMeshFile(filepath):
+    """Reads the triangles of an .obj or .stl mesh file.
+
+    The Y up axis of .obj files (as written by Blender's and Phobos' exporters) is converted to Z.
+
+    Args:
+      filepath(str): path of the mesh file
+
+    Returns:
+      : tuple -- (n x 3) vertex and (m x 3) triangle array
+
+    """
+    extension = os.path.splitext(filepath)[-1].lower()
+    if extension == '.obj':
+        vertices = []
+        triangles = []
+        with open(filepath, 'r') as objfile:
+            for line in objfile:
+                if line.startswith('v '):
+                    vertices.append(line.split()[1:4])
+                elif line.startswith('f '):
+                    # vertex indices are 1-based, negative indices are relative to the end
+                    face = [int(vertex.split('/')[0]) for vertex in line.split()[1:]]
+                    face = [index - 1 if index > 0 else len(vertices) + index for index in face]
+                    triangles.extend(
+                        (face[0], face[i], face[i + 1]) for i in range(1, len(face) - 1)
+                    )
+        vertices = numpy.array(vertices, dtype=float).reshape(-1, 3)
+        return vertices[:, (0, 2, 1)] * (1, -1, 1), numpy.array(triangles).reshape(-1, 3)
+
+    elif extension == '.stl':
+        with open(filepath, 'rb') as stlfile:
+            data = stlfile.read()
+        count = struct.unpack('<I', data[80:84])[0] if len(data) >= 84 else 0
+        if len(data) == 84 + count * 50:
+            facets = numpy.frombuffer(
+                data,
+                dtype=numpy.dtype(
+                    [('normal', '<f4', 3), ('corners', '<f4', (3, 3)), ('attr', '<u2')]
+                ),
+                count=count,
+                offset=84,
+            )
+            vertices = facets['corners'].reshape(-1, 3).astype(float)
+        else:
+            vertices = numpy.array(
+                [
+                    line.split()[1:4]
+                    for line in data.decode('ascii', 'ignore').splitlines()
+                    if line.strip().startswith('vertex')
+                ],
+                dtype=float,
+            ).reshape(-1, 3)
+        return vertices, numpy.arange(len(vertices)).reshape(-1, 3)
+
+    raise ValueError("Unsupported mesh file for thumbnails: " + filepath)
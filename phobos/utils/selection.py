@@ -15,6 +15,7 @@ Contains the utility functions for selecting objects in Blender based on differe
 
 import bpy
 import phobos.defs as defs
+import phobos.utils.hierarchy as hierarchy
 from phobos.phoboslog import log
 
 
@@ -31,37 +32,25 @@ def getLeaves(roots, objects=[]):
       list: List of the leaves of the kinematic spanning tree.
 
     """
-    leaves = []
-
-    if isinstance(roots, list):
-        for root in roots:
-            leaves += getLeaves(root, objects=objects)
-
-    else:
-        if roots.phobostype != 'link':
-            roots = getEffectiveParent(roots, objectlist=objects)
-
-        candidates = getImmediateChildren(roots, phobostypes=('link'))
-
-        if objects and candidates:
-            candidates = [candidate for candidate in candidates if candidate in objects]
-
-        if candidates:
-            leaves += getLeaves(candidates, objects=objects)
-        else:
-            leaves.append(roots)
-
-    if objects:
-        leaves = [leave for leave in leaves if leave in objects]
-
-    # Remove possible doubles
-    outputs = []
+    if not isinstance(roots, list):
+        roots = [roots]
+    roots = [
+        root if root.phobostype == 'link' else getEffectiveParent(root, objectlist=objects)
+        for root in roots
+    ]
+    tree = hierarchy.getLinkTree([root.name for root in roots])
+    names = set(obj.name for obj in objects)
 
-    for leave in leaves:
-        if leave not in outputs:
-            outputs.append(leave)
+    def include(name):
+        """Returns whether a link is searched for leaves."""
+        return not bpy.data.objects[name].hide and (not names or name in names)
 
-    return outputs
+    leaves = []
+    for root in roots:
+        for name in tree.getLeaves(root.name, include):
+            if (not names or name in names) and name not in leaves:
+                leaves.append(name)
+    return [bpy.data.objects[name] for name in leaves]
 
 
 def getObjectsByPhobostypes(phobostypes):
@@ -444,6 +433,9 @@ def getSubmechanismRootForJoint(jointobj):
     Returns:
 
     """
-    for root in getSubmechanismRoots():
-        if jointobj in root['submechanism/spanningtree']:
+    tree = hierarchy.getLinkTree([jointobj.name])
+    # the root of a submechanism is the joint itself or one of its ancestors
+    for name in [jointobj.name] + tree.getAncestors(jointobj.name):
+        root = bpy.data.objects[name]
+        if 'submechanism/name' in root and jointobj in root['submechanism/spanningtree']:
             return root
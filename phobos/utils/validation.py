@@ -9,16 +9,29 @@
 # If not, see <https://opensource.org/licenses/BSD-3-Clause>.
 # -------------------------------------------------------------------------------
 
-from copy import deepcopy as dc
+import time
+from collections import OrderedDict
 
 import bpy
+from bpy.app.handlers import persistent
+
 import phobos.defs as defs
 import phobos.utils.naming as nUtils
+from phobos.utils.general import getPropertyHash
 from phobos.phoboslog import log
 
 
 checkMessages = {"NoObject": []}
 
+#: Validations of the :func:`validate` decorator whose results are cached per object.
+CACHED_VALIDATIONS = ('joint', 'joint_type', 'link', 'object_pose', 'geometry_type', 'visual')
+
+#: Cached validation messages and signature per object name (see :func:`getCachedValidation`).
+validationcache = {}
+
+#: Names of the objects whose cached validation messages are outdated.
+dirtyobjects = set()
+
 
 def generateCheckMessages(param1, param2):
     """
@@ -36,10 +49,19 @@ def generateCheckMessages(param1, param2):
     return [(x,) * 3 for x in list(checkMessages.keys())]
 
 
+#: Operations of compiled validators (see :class:`CompiledValidator`).
+LEAF, PROGRAM, FORELEM, SELECTION = range(4)
+
+#: Compiled validators by the id of their validation dictionary.
+_compiledvalidators = {}
+
+
 def check_dict(dic, validator, messages):
     """This function validates a given dictionary against a validation.
     It writes all messages to the given messages list
 
+    The validation is compiled once (see :func:`getCompiledValidator`).
+
     Args:
       dic(dict): The dictionary you want to validate.
       validator(dict): The validation you want to validate against.
@@ -48,174 +70,250 @@ def check_dict(dic, validator, messages):
     Returns:
 
     """
-    check_dict_alg(dic, validator, [], messages, validator, "NoObject")
+    for message in getCompiledValidator(validator).validate(dic):
+        add_message(messages, message.information['element'], message.message)
 
 
-def check_dict_alg(dic, validator, entry_list, messages, whole_validator, current_elem):
-    """This function does the real validation work by working through the validation.
+def getCompiledValidator(validator):
+    """Returns the compiled validator of a validation, compiling it on first use.
 
     Args:
-      dic(dict): The dictionary you want to validate.
-      validator(dict): The validation you want to validate against.
-      entry_list(list: list): This list contains all keys you have to traverse to get the correct value in the dictionary.
-      messages(dict): The message list you want to append the error messages to.
-      whole_validator(dict): This is a copy of the whole validation needed when referencing to a top level key.
-      current_elem(str): The current element the alg is checking.
-      entry_list: 
+      validator(dict): The validation to compile.
 
     Returns:
+      : CompiledValidator -- the compiled validation
 
     """
-    for node in validator:
-        new_list = dc(entry_list)
-        node_value = validator[node]
-        if node != 'isReference':
-            if not ('isReference' in node_value and len(entry_list) == 0):
-                if is_operator(node):
-                    handle_operator(
-                        node, dic, validator, new_list, messages, whole_validator, current_elem
-                    )
-                elif is_leaf(node_value):
-                    new_list.append(node)
-                    check_leaf(node_value, dic, new_list, messages, current_elem)
-                else:
-                    new_list.append(node)
-                    check_dict_alg(
-                        dic, node_value, new_list, messages, whole_validator, current_elem
-                    )
+    cached = _compiledvalidators.get(id(validator))
+    if cached is None or cached.validator is not validator:
+        cached = CompiledValidator(validator)
+        _compiledvalidators[id(validator)] = cached
+    return cached
 
 
-def is_leaf(node_value):
-    """This function checks whether a validation node is a leaf or not.
+def lookup(value, keys):
+    """Returns the value reached with a path of keys or None if the keys are not found.
 
     Args:
-      node_value(dict): The value of the node you want to check.
+      value(dict): The dictionary to traverse.
+      keys(tuple): The keys to traverse with.
 
     Returns:
-      : bool.
+      : the value at the path or None
 
     """
-    return isinstance(node_value, dict) and 'required' in node_value
+    for key in keys:
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
 
 
-def is_operator(node):
-    """This function checks whether a validation node is an operator or not.
+class CompiledValidator(object):
+    """A validation compiled to flat programs of rules.
 
-    Args:
-      node(str): The node key you want to check.
-
-    Returns:
-      : bool.
+    A validation is a dictionary mirroring the model dictionary, whose leaves define the default
+    value (and thus type) and whether the value is required. The operators ``$forElem`` (validate
+    all elements of a dictionary), ``$reference`` (validate a sub-dictionary with a top level
+    validation marked as ``isReference``) and ``$selection__<key>`` (validate depending on the
+    value of *key*) are expanded when compiling.
 
+    Every program is a list of operations with precomputed key paths relative to the validated
+    dictionary, so the model is validated in a single traversal. The time spent for every top
+    level rule is stored in :attr:`timings`.
     """
-    return node.startswith('$')
 
+    def __init__(self, validator):
+        """Compiles a validation.
 
-def check_leaf(leaf_value, dic, entry_list, messages, current_elem):
-    """This function checks the dictionary against a specific validation leaf and entry_list. Writing the
-    messages into the given list.
+        Args:
+          validator(dict): The validation to compile.
 
-    Args:
-      leaf_value(dict): The leaf value used for validation.
-      dic(dict): The dictionary you want to validate.
-      entry_list(list: list): The keys navigating you to the dictionary value to validate against the validation leaf.
-      messages(dict): The list you want to append the messages to.
-      current_elem: 
-      entry_list: 
+        Returns:
 
-    Returns:
+        """
+        self.validator = validator
+        self.references = {}
+        self.rules = OrderedDict()
+        self.timings = OrderedDict()
+        for node, value in validator.items():
+            if node == 'isReference' or (isinstance(value, dict) and 'isReference' in value):
+                continue
+            self.rules[node] = self.compile({node: value})
+
+    def compile(self, validator, prefix=()):
+        """Compiles a (sub-)validation to a program.
 
-    """
-    value = traverse_dict(dic, entry_list)
-    default_value = leaf_value['default']
-    required_type = type(default_value)
-    required = leaf_value['required']
-    # messages.append("Checking leaf " + str(entry_list))
-    if required and value is None:
-        add_message(
-            messages, current_elem, "The required value in " + str(entry_list) + " cannot be found!"
-        )
-    if value is not None and not isinstance(value, required_type):
-        add_message(
-            messages,
-            current_elem,
-            "The required value in "
-            + str(entry_list)
-            + " doesn't match expected type "
-            + str(required_type),
+        Args:
+          validator(dict): The validation to compile.
+          prefix(tuple, optional): The keys leading from the validated dictionary to the validation (Default value = ())
+
+        Returns:
+          : list -- the operations of the program
+
+        """
+        program = []
+        for node, value in validator.items():
+            if node == 'isReference':
+                continue
+            if is_operator(node):
+                if node == '$reference':
+                    program.append((PROGRAM, prefix + (value,), self.compileReference(value)))
+                elif node == '$forElem':
+                    program.append((FORELEM, prefix, self.compile(value)))
+                elif node.startswith('$selection__'):
+                    options = {
+                        option: self.compile(optionvalidator, prefix)
+                        for option, optionvalidator in (value or {}).items()
+                    }
+                    program.append((SELECTION, prefix, node.split('__')[1], options))
+                # TODO handle $exists__ operators somehow...
+            elif is_leaf(value):
+                program.append((LEAF, prefix + (node,), value['required'], type(value['default'])))
+            elif isinstance(value, dict):
+                program.extend(self.compile(value, prefix + (node,)))
+        return program
+
+    def compileReference(self, name):
+        """Returns the program of a top level validation used by a ``$reference`` operator.
+
+        Args:
+          name(str): The name of the referenced validation.
+
+        Returns:
+          : list -- the operations of the program
+
+        """
+        if name not in self.references:
+            # register the program before compiling it to support recursive references
+            self.references[name] = program = []
+            program.extend(self.compile(self.validator[name]))
+        return self.references[name]
+
+    def validate(self, dic):
+        """Validates a dictionary.
+
+        Args:
+          dic(dict): The dictionary to validate.
+
+        Returns:
+          : list of ValidateMessage -- the issues found, with path and element as information
+
+        """
+        messages = []
+        for rule, program in self.rules.items():
+            start = time.perf_counter()
+            self.run(program, dic, (), 'NoObject', rule, messages)
+            self.timings[rule] = time.perf_counter() - start
+        return messages
+
+    def run(self, program, value, path, element, rule, messages):
+        """Runs a program on a (sub-)dictionary.
+
+        Args:
+          program(list): The operations to run.
+          value(dict): The (sub-)dictionary to validate, None if it does not exist.
+          path(tuple): The keys leading to the (sub-)dictionary.
+          element(str): The name of the currently validated element.
+          rule(str): The name of the top level rule.
+          messages(list): The list to append the messages to.
+
+        Returns:
+
+        """
+        for operation in program:
+            if operation[0] == LEAF:
+                keys, required, requiredtype = operation[1:]
+                leafvalue = lookup(value, keys)
+                if leafvalue is None:
+                    if required:
+                        self.addMessage(
+                            messages,
+                            "The required value in {} cannot be found!",
+                            path + keys,
+                            element,
+                            rule,
+                        )
+                elif not isinstance(leafvalue, requiredtype):
+                    self.addMessage(
+                        messages,
+                        "The required value in {} doesn't match expected type " + str(requiredtype),
+                        path + keys,
+                        element,
+                        rule,
+                    )
+            elif operation[0] == PROGRAM:
+                keys, subprogram = operation[1:]
+                self.run(subprogram, lookup(value, keys), path + keys, element, rule, messages)
+            elif operation[0] == FORELEM:
+                keys, subprogram = operation[1:]
+                container = lookup(value, keys)
+                if not isinstance(container, dict):
+                    self.addMessage(messages, "Error in traversing dict!", path, element, rule)
+                    continue
+                for elem, elemvalue in container.items():
+                    self.run(subprogram, elemvalue, path + keys + (elem,), elem, rule, messages)
+            elif operation[0] == SELECTION:
+                keys, selectkey, options = operation[1:]
+                selection = lookup(value, keys)
+                if not isinstance(selection, dict) or selectkey not in selection:
+                    self.addMessage(
+                        messages,
+                        "Could not find " + selectkey + " in {}",
+                        path + keys,
+                        element,
+                        rule,
+                    )
+                elif selection[selectkey] in options:
+                    self.run(options[selection[selectkey]], value, path, element, rule, messages)
+
+    @staticmethod
+    def addMessage(messages, message, keys, element, rule):
+        """Appends an error message for a path in the validated dictionary.
+
+        Args:
+          messages(list): The list to append the message to.
+          message(str): The message, ``{}`` is replaced by the path.
+          keys(tuple): The keys leading to the invalid value.
+          element(str): The name of the invalid element.
+          rule(str): The name of the top level rule.
+
+        Returns:
+
+        """
+        messages.append(
+            ValidateMessage(
+                message.format(str(list(keys))),
+                'ERROR',
+                information={'element': element, 'path': list(keys), 'rule': rule},
+            )
         )
 
 
-def handle_operator(node, dic, validator, entry_list, messages, whole_validator, current_elem):
-    """This function handles an operator and decides how to continue the validation process.
+def is_leaf(node_value):
+    """This function checks whether a validation node is a leaf or not.
 
     Args:
-      node(str): The operator to handle.
-      dic(dict): The dict you want to validate.
-      validator(dict): The validation you want to validate the dic with.
-      entry_list(list: list): The list of keys to navigate to the value in the dictionary.
-      messages(dict): The list to append the messages to.
-      whole_validator(dict): The whole validation to reach top level keys in case of a reference operator.
-      current_elem: 
-      entry_list: 
+      node_value(dict): The value of the node you want to check.
 
     Returns:
+      : bool.
 
     """
-    if node == '$reference':
-        new_list = dc(entry_list)
-        new_list.append(validator[node])
-        check_dict_alg(
-            dic, whole_validator[validator[node]], new_list, messages, whole_validator, current_elem
-        )
-    elif node == '$forElem':
-        traversed_dic = traverse_dict(dic, entry_list)
-        if traversed_dic is not None:
-            for elem in traversed_dic:
-                new_list = dc(entry_list)
-                new_list.append(elem)
-                check_dict_alg(
-                    dic, validator['$forElem'], new_list, messages, whole_validator, elem
-                )
-        else:
-            add_message(messages, current_elem, "Error in traversing dict!")
-    elif node.startswith('$selection__'):
-        select_type = node.split('__')[1]
-        select_dic = traverse_dict(dic, entry_list)
-        if select_type in select_dic:
-            select = select_dic[select_type]
-            rest_validator = validator[node][select]
-            check_dict_alg(dic, rest_validator, entry_list, messages, whole_validator, current_elem)
-        else:
-            add_message(
-                messages, current_elem, "Could not find " + select_type + " in " + str(entry_list)
-            )
-    elif node.startswith('$exists__'):
-        # TODO handle it somehow...
-        pass
+    return isinstance(node_value, dict) and 'required' in node_value
 
 
-def traverse_dict(dic, entry_list):
-    """This function traverses a dictionary with a given list of keys and returns the value or None if the
-    keys are not found.
+def is_operator(node):
+    """This function checks whether a validation node is an operator or not.
 
     Args:
-      dic(dict): The dictionary to traverse.
-      entry_list(list: list): The list of keys you want to traverse with.
-      entry_list: 
+      node(str): The node key you want to check.
 
     Returns:
-      : dict.
+      : bool.
 
     """
-    length = len(entry_list)
-    if length > 0:
-        element = entry_list[0]
-        if isinstance(dic, dict) and length > 1 and element in dic:
-            return traverse_dict(dic[element], entry_list[1:])
-        elif isinstance(dic, dict) and length == 1 and element in dic:
-            return dic[element]
-    return None
+    return node.startswith('$')
 
 
 def add_message(messages, key, message):
@@ -473,7 +571,7 @@ def validateMaterial(material, adjust=False):
         errors.append(ValidateMessage("No material defined.", 'WARNING', material, None, {}))
         return errors, material
 
-    if isinstance(material, bpy.types.Object):
+    if isinstance(material, bpy.types.Material):
         # there are always 18 slots, regardless of whether they are filled or not
         for tex in material.texture_slots:
             if tex is not None:
@@ -807,25 +905,16 @@ def validate(name):
             Returns:
 
             """
-            if name == 'joint':
-                errors = validateJoint(obj, *args, **kwargs)
-            elif name == 'joint_type':
-                errors = validateJointType(obj, *args, **kwargs)
-            elif name == 'material':
-                errors, obj = validateMaterial(obj, *args, **kwargs)
-            elif name == 'link':
-                errors = validateLink(obj, *args, **kwargs)
-            elif name == 'object_pose':
-                errors = validateObjectPose(obj, *args, **kwargs)
-            elif name == 'geometry_type':
-                errors = validateGeometryType(obj, *args, **kwargs)
-            elif name == 'inertia_data':
-                errors, obj = validateInertiaData(obj, *args, **kwargs)
-            elif name == 'visual':
-                errors = validateVisual(obj, *args, **kwargs)
+            if (
+                name in CACHED_VALIDATIONS
+                and isinstance(obj, bpy.types.Object)
+                and not args
+                and not kwargs.get('adjust')
+                and not kwargs.get('geometry_dict')
+            ):
+                errors = getCachedValidation(obj, name)
             else:
-                log("This validation type is not defined! '{}'".format(name), 'ERROR')
-                errors = []
+                errors, obj = runValidation(name, obj, *args, **kwargs)
 
             kwargs['errors'] = errors
 
@@ -838,3 +927,223 @@ def validate(name):
         return validation_wrapper
 
     return validation
+
+
+def runValidation(name, obj, *args, **kwargs):
+    """Runs the validation used by the :func:`validate` decorator with the specified name.
+
+    Args:
+      name(str): name of the validation
+      obj: object, material or dictionary to validate
+      *args: additional arguments of the validation
+      **kwargs: additional keyword arguments of the validation
+
+    Returns:
+      : tuple -- list(ValidateMessage) and the (possibly adjusted) validated object
+
+    """
+    if name == 'joint':
+        errors = validateJoint(obj, *args, **kwargs)
+    elif name == 'joint_type':
+        errors = validateJointType(obj, *args, **kwargs)
+    elif name == 'material':
+        errors, obj = validateMaterial(obj, *args, **kwargs)
+    elif name == 'link':
+        errors = validateLink(obj, *args, **kwargs)
+    elif name == 'object_pose':
+        errors = validateObjectPose(obj, *args, **kwargs)
+    elif name == 'geometry_type':
+        errors = validateGeometryType(obj, *args, **kwargs)
+    elif name == 'inertia_data':
+        errors, obj = validateInertiaData(obj, *args, **kwargs)
+    elif name == 'visual':
+        errors = validateVisual(obj, *args, **kwargs)
+    else:
+        log("This validation type is not defined! '{}'".format(name), 'ERROR')
+        errors = []
+    return errors, obj
+
+
+def getObjectSignature(obj):
+    """Returns the state of an object which invalidates its cached validations when changed.
+
+    Custom properties changed by scripts do not tag the object as updated, so the cache also
+    compares the phobostype, parent and custom properties of the object.
+
+    Args:
+      obj(bpy.types.Object): object to get the signature of
+
+    Returns:
+      : tuple -- phobostype, parent name and hash of the custom properties
+
+    """
+    return obj.phobostype, obj.parent.name if obj.parent else None, getPropertyHash(obj)
+
+
+def getValidationNames(obj):
+    """Returns the names of all validations run in the background for an object.
+
+    Args:
+      obj(bpy.types.Object): object to get the validations for
+
+    Returns:
+      : tuple -- names of the validations
+
+    """
+    if obj.phobostype == 'link':
+        names = ('link', 'joint') if obj.parent else ('link',)
+    elif obj.phobostype == 'visual':
+        names = ('visual', 'geometry_type', 'material')
+    elif obj.phobostype == 'collision':
+        names = ('geometry_type',)
+    elif obj.phobostype == 'inertial':
+        names = ('inertia_data',)
+    else:
+        names = ()
+    return ('object_names',) + names
+
+
+def runObjectValidation(obj, name):
+    """Runs a validation of an object without changing the object.
+
+    Args:
+      obj(bpy.types.Object): object to validate
+      name(str): name of the validation (see :func:`getValidationNames`)
+
+    Returns:
+      : list(ValidateMessage) -- validation errors
+
+    """
+    if name == 'object_names':
+        return validateObjectNames(obj)
+    elif name == 'material':
+        return validateMaterial(obj.active_material)[0]
+    elif name == 'inertia_data':
+        # validate a copy, as missing values are set on the validated object
+        inertial = {
+            key.split('/')[1]: obj[key]
+            for key in ('inertial/inertia', 'inertial/mass')
+            if key in obj
+        }
+        if 'inertia' in inertial:
+            inertial['inertia'] = list(inertial['inertia'])
+        errors = validateInertiaData(inertial)[0]
+        for error in errors:
+            error.obj = obj
+        return errors
+    return runValidation(name, obj)[0]
+
+
+def getCachedValidation(obj, name):
+    """Returns the cached messages of a validation of an object, validating it if necessary.
+
+    The cached messages of an object are discarded if it was marked as dirty by
+    :func:`updateValidations` or if its signature (see :func:`getObjectSignature`) changed.
+
+    Args:
+      obj(bpy.types.Object): object to validate
+      name(str): name of the validation (see :func:`getValidationNames`)
+
+    Returns:
+      : list(ValidateMessage) -- validation errors
+
+    """
+    signature = getObjectSignature(obj)
+    entry = validationcache.get(obj.name)
+    if entry is None or obj.name in dirtyobjects or entry['signature'] != signature:
+        entry = validationcache[obj.name] = {'signature': signature, 'messages': {}}
+        dirtyobjects.discard(obj.name)
+    if name not in entry['messages']:
+        entry['messages'][name] = runObjectValidation(obj, name)
+    return entry['messages'][name]
+
+
+def getValidationMessages(obj):
+    """Returns the messages of all background validations of an object.
+
+    Args:
+      obj(bpy.types.Object): object to get the messages for
+
+    Returns:
+      : list(ValidateMessage) -- validation errors
+
+    """
+    return [error for name in getValidationNames(obj) for error in getCachedValidation(obj, name)]
+
+
+@persistent
+def updateValidations(scene):
+    """Validates updated objects and their links again and shows new messages in the 3D view.
+
+    This is called after scene updates. Only objects tagged as updated and the links they belong
+    to are marked as dirty and validated again, the results of all other objects are kept.
+
+    Args:
+      scene(bpy.types.Scene): the updated scene
+
+    Returns:
+
+    """
+    if not bpy.data.objects.is_updated:
+        return
+    from phobos.display import push_message
+
+    for name in list(validationcache):
+        if name not in scene.objects:
+            del validationcache[name]
+            dirtyobjects.discard(name)
+
+    updated = {}
+    for obj in scene.objects:
+        if obj.is_updated or obj.is_updated_data:
+            updated[obj.name] = obj
+            if obj.phobostype != 'link' and obj.parent and obj.parent.phobostype == 'link':
+                updated[obj.parent.name] = obj.parent
+
+    for obj in updated.values():
+        previous = set(
+            error.message
+            for messages in validationcache.get(obj.name, {'messages': {}})['messages'].values()
+            for error in messages
+        )
+        dirtyobjects.add(obj.name)
+        for error in getValidationMessages(obj):
+            if error.message not in previous:
+                push_message(
+                    "{}: {}".format(nUtils.getObjectName(obj), error.message), error.level.lower()
+                )
+
+
+@persistent
+def clearValidationCache(*args):
+    """Discards all cached validation messages, e.g. after loading a file or undoing.
+
+    Args:
+      *args: arguments passed by the handler
+
+    Returns:
+
+    """
+    validationcache.clear()
+    dirtyobjects.clear()
+
+
+def register():
+    """Adds the handlers of the background validation."""
+    bpy.app.handlers.scene_update_post.append(updateValidations)
+    bpy.app.handlers.load_post.append(clearValidationCache)
+    bpy.app.handlers.undo_post.append(clearValidationCache)
+    bpy.app.handlers.redo_post.append(clearValidationCache)
+
+
+def unregister():
+    """Removes the handlers of the background validation."""
+    for handlers, handler in (
+        (bpy.app.handlers.scene_update_post, updateValidations),
+        (bpy.app.handlers.load_post, clearValidationCache),
+        (bpy.app.handlers.undo_post, clearValidationCache),
+        (bpy.app.handlers.redo_post, clearValidationCache),
+    ):
+        if handler in handlers:
+            handlers.remove(handler)
+    clearValidationCache()
@@ -14,9 +14,14 @@ import sys
 
 blenderExecutable = 'blender'
 
+# benchmarks are only run on demand, optionally storing their timings as new baseline
+runBenchmarks = '--benchmark' in sys.argv
+benchmarkArgs = ['--update-baseline'] if '--update-baseline' in sys.argv else []
+arguments = [arg for arg in sys.argv[1:] if arg not in ('--benchmark', '--update-baseline')]
+
 # allow override of blender executable (important for CI!)
-if len(sys.argv) > 1:
-    blenderExecutable = sys.argv[1]
+if arguments:
+    blenderExecutable = arguments[0]
 
 # run all tests before aborting build
 testfailed = False
@@ -36,5 +41,20 @@ for file in glob.glob('tests/**/*.test.blend'):
     if code:
         testfailed = True
 
+# the *.bench.py scripts generate their models themselves and run in an empty scene
+if runBenchmarks:
+    for file in glob.glob('tests/**/*.bench.py'):
+        print('#' * 100)
+        print('Running {} benchmarks...'.format(file))
+        print('#' * 100)
+        code = subprocess.call([blenderExecutable, '--addons', 'phobos', '--factory-startup',
+                                '-noaudio', '-b', '--python', file, '--python-exit-code', '1',
+                                '--'] + benchmarkArgs)
+        print('#' * 100)
+        print("Exited with: ", code)
+        print('#' * 100 + '\n\n\n')
+        if code:
+            testfailed = True
+
 if testfailed:
     sys.exit(1)
@@ -0,0 +1,413 @@
+#!/usr/bin/python3
+
+# -------------------------------------------------------------------------------
+# This file is part of Phobos, a Blender Add-On to edit robot models.
+# Copyright (C) 2020 University of Bremen & DFKI GmbH Robotics Innovation Center
+#
+# You should have received a copy of the 3-Clause BSD License in the LICENSE file.
+# If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+# -------------------------------------------------------------------------------
+
+"""
+Benchmarks Phobos on procedurally generated robots of different sizes.
+
+Every robot in :data:`ROBOTS` is generated in the empty scene of a headless Blender. The benchmark
+measures the derivation of the model dictionary, the inertia calculation, every exporter and the
+import of the exported URDF and SDF files. The timings are compared against the baseline stored in
+*baseline.json* next to this script. A step fails if it is slower than the baseline multiplied by
+the tolerance factor.
+
+Run it using the *testrunner.py*:
+    ./testrunner.py blender --benchmark
+
+To store the timings of the current run as new baseline, add ``--update-baseline``.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import shutil
+import tempfile
+import unittest
+from collections import OrderedDict
+
+try:
+    import bpy
+    import bmesh
+
+    import phobos
+    import phobos.defs as defs
+    import phobos.model.models as models
+    import phobos.model.inertia as inertiamodel
+    import phobos.model.sensors as sensormodel
+    import phobos.model.motors as motormodel
+    import phobos.io.batchexport as batchexport
+    import phobos.utils.blender as bUtils
+    import phobos.utils.io as ioUtils
+    import phobos.utils.selection as sUtils
+    from phobos.io.entities import entity_types
+    from phobos.io.meshes import mesh_types
+
+    #: Configurations of the synthetic robots, with the number of links, the number of children per
+    #: link, visuals per link, triangles per visual mesh, sensors and motors.
+    ROBOTS = OrderedDict(
+        [
+            (
+                'chain',
+                {
+                    'links': 30,
+                    'branching': 1,
+                    'visuals': 1,
+                    'triangles': 500,
+                    'sensors': 3,
+                    'motors': 29,
+                },
+            ),
+            (
+                'tree',
+                {
+                    'links': 120,
+                    'branching': 3,
+                    'visuals': 2,
+                    'triangles': 500,
+                    'sensors': 12,
+                    'motors': 60,
+                },
+            ),
+            (
+                'dense',
+                {
+                    'links': 30,
+                    'branching': 2,
+                    'visuals': 4,
+                    'triangles': 10000,
+                    'sensors': 6,
+                    'motors': 29,
+                },
+            ),
+        ]
+    )
+
+    #: Entity types whose export is benchmarked.
+    ENTITY_TYPES = [
+        etype for etype in ('urdf', 'sdf', 'smurf', 'srdf', 'yaml') if etype in entity_types
+    ]
+
+    #: Mesh types whose export is benchmarked.
+    MESH_TYPES = [mtype for mtype in ('stl', 'obj', 'dae') if mtype in mesh_types]
+
+    #: Entity types whose exported files are imported again.
+    IMPORT_TYPES = [etype for etype in ('urdf', 'sdf') if etype in ENTITY_TYPES]
+
+    #: Steps slower than the baseline times this factor are regressions.
+    TOLERANCE = 1.5
+
+    #: Steps faster than this (in seconds) are not compared, as they are dominated by noise.
+    MIN_DURATION = 0.05
+
+    BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+    def timed(timings, name, function, *args):
+        """Calls a function and adds its duration to the timings.
+
+        Args:
+          timings(dict): timings of the benchmark
+          name(str): name of the benchmark step
+          function(function): function to call
+          *args: arguments of the function
+
+        Returns:
+          : return value of the function
+
+        """
+        start = time.perf_counter()
+        result = function(*args)
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+        return result
+
+    def resetScene():
+        """Removes all objects of the scene, including those on hidden layers."""
+        bpy.context.scene.layers = [True] * 20
+        bUtils.cleanScene()
+
+    def createSphereMesh(name, triangles):
+        """Creates a triangulated sphere mesh with approximately the specified number of triangles.
+
+        Args:
+          name(str): name of the new mesh
+          triangles(int): number of triangles
+
+        Returns:
+          : bpy.types.Mesh -- the new mesh
+
+        """
+        segments = max(3, int(math.sqrt(triangles / 2)))
+        rings = max(3, int(round(triangles / (2 * segments))) + 1)
+        mesh = bpy.data.meshes.new(name)
+        bm = bmesh.new()
+        bmesh.ops.create_uvsphere(bm, u_segments=segments, v_segments=rings, diameter=0.05)
+        bmesh.ops.triangulate(bm, faces=bm.faces[:])
+        bm.to_mesh(mesh)
+        bm.free()
+        return mesh
+
+    def generateModelDictionary(name, config):
+        """Creates the model dictionary of a synthetic robot.
+
+        The links form a tree in which every link has *branching* children (filled breadth first).
+        Every link is connected by a revolute joint to its parent.
+
+        Args:
+          name(str): name of the model
+          config(dict): robot configuration (see :data:`ROBOTS`)
+
+        Returns:
+          : dict -- model dictionary as provided by the importers
+
+        """
+        zeropose = {'translation': [0.0, 0.0, 0.0], 'rotation_euler': [0.0, 0.0, 0.0]}
+        links = OrderedDict()
+        joints = OrderedDict()
+        linknames = []
+        for i in range(config['links']):
+            linkname = 'link_{0:04d}'.format(i)
+            link = {
+                'name': linkname,
+                'children': [],
+                'pose': dict(zeropose),
+                'inertial': {
+                    'name': 'inertial_' + linkname,
+                    'mass': 1.0,
+                    'inertia': [0.01, 0.0, 0.0, 0.01, 0.0, 0.01],
+                    'pose': dict(zeropose),
+                },
+                'visual': {},
+                'collision': {},
+            }
+            for v in range(config['visuals']):
+                visualname = 'visual_{0}_{1}'.format(v, linkname)
+                link['visual'][visualname] = {
+                    'name': visualname,
+                    'geometry': {'type': 'sphere', 'radius': 0.05},
+                    'material': 'benchmark',
+                    'pose': {'translation': [0.1 * v, 0.0, 0.1], 'rotation_euler': [0.0, 0.0, 0.0]},
+                }
+            collisionname = 'collision_' + linkname
+            link['collision'][collisionname] = {
+                'name': collisionname,
+                'geometry': {'type': 'box', 'size': [0.1, 0.1, 0.2]},
+                'pose': {'translation': [0.0, 0.0, 0.1], 'rotation_euler': [0.0, 0.0, 0.0]},
+            }
+
+            if linknames:
+                index = (i - 1) // config['branching']
+                sibling = (i - 1) % config['branching']
+                parentname = linknames[index]
+                link['parent'] = parentname
+                link['pose'] = {
+                    'translation': [0.0, 0.0, 0.2],
+                    'rotation_euler': [0.0, 0.0, 2 * math.pi * sibling / config['branching']],
+                }
+                links[parentname]['children'].append(linkname)
+                joints[linkname] = {
+                    'name': linkname,
+                    'parent': parentname,
+                    'child': linkname,
+                    'type': 'revolute',
+                    'axis': [0.0, 1.0, 0.0],
+                    'limits': {'lower': -1.57, 'upper': 1.57, 'effort': 10.0, 'velocity': 1.0},
+                }
+            links[linkname] = link
+            linknames.append(linkname)
+
+        return {
+            'name': name,
+            'links': links,
+            'joints': joints,
+            'materials': {
+                'benchmark': {
+                    'name': 'benchmark',
+                    'diffuse': [0.5, 0.5, 0.5, 1.0],
+                    'specular': (1.0, 1.0, 1.0),
+                }
+            },
+        }
+
+    def generateRobot(name, config):
+        """Creates a synthetic robot in the scene.
+
+        The visuals are replaced by unique sphere meshes with the configured number of triangles.
+        Sensors and motors are distributed evenly over the links and joints.
+
+        Args:
+          name(str): name of the model
+          config(dict): robot configuration (see :data:`ROBOTS`)
+
+        Returns:
+          : bpy.types.Object -- root object of the new robot
+
+        """
+        model = generateModelDictionary(name, config)
+        models.buildModelFromDictionary(model)
+        linkobjects = [link['object'] for link in model['links'].values()]
+
+        for linkobj in linkobjects:
+            for visual in [obj for obj in linkobj.children if obj.phobostype == 'visual']:
+                mesh = createSphereMesh('mesh_' + visual.name, config['triangles'])
+                for material in visual.data.materials:
+                    mesh.materials.append(material)
+                visual.data = mesh
+                visual['geometry/type'] = 'mesh'
+                if 'geometry/radius' in visual:
+                    del visual['geometry/radius']
+
+        sensortype = sorted(defs.definitions['sensors'])[0]
+        for i in range(config['sensors']):
+            linkobj = linkobjects[i * len(linkobjects) // config['sensors']]
+            sensor = ioUtils.getDictFromYamlDefs('sensor', sensortype, 'sensor_{0:03d}'.format(i))
+            sensormodel.createSensor(sensor, linkobj, linkobj.matrix_world)
+
+        motortype = sorted(defs.definitions['motors'])[0]
+        jointobjects = linkobjects[1:]
+        for i in range(min(config['motors'], len(jointobjects))):
+            jointobj = jointobjects[i * len(jointobjects) // config['motors']]
+            motor = ioUtils.getDictFromYamlDefs('motor', motortype, 'motor_{0:03d}'.format(i))
+            motormodel.createMotor(motor, jointobj, jointobj.matrix_world)
+
+        return sUtils.getRoot(linkobjects[0])
+
+    def calculateInertias(root):
+        """Calculates the mesh inertia of all visuals and fuses the inertials of every link.
+
+        Args:
+          root(bpy.types.Object): root object of the robot
+
+        Returns:
+
+        """
+        objects = sUtils.getChildren(root)
+        for obj in objects:
+            if obj.phobostype == 'visual':
+                inertiamodel.calculateInertia(obj, 1.0)
+        for obj in objects:
+            if obj.phobostype == 'link':
+                inertiamodel.fuse_inertia_data(inertiamodel.gatherInertialChilds(obj, objects))
+
+    def benchmarkRobot(name, config, outpath):
+        """Runs all benchmark steps on a synthetic robot.
+
+        Args:
+          name(str): name of the robot
+          config(dict): robot configuration (see :data:`ROBOTS`)
+          outpath(str): folder to export the robot to
+
+        Returns:
+          : OrderedDict -- durations of the benchmark steps in seconds
+
+        """
+        timings = OrderedDict()
+        resetScene()
+        root = timed(timings, 'generate', generateRobot, name, config)
+        model = timed(timings, 'derive', models.deriveModelDictionary, root)
+        timed(timings, 'inertia', calculateInertias, root)
+
+        batchexport.setExportTypes(ENTITY_TYPES, MESH_TYPES)
+        for task in ioUtils.getExportTasks(model, outpath):
+            timed(timings, 'export_' + task.phase, task.function, *task.args)
+
+        imported = {}
+        for entitytype in IMPORT_TYPES:
+            filepath = os.path.join(outpath, entitytype, model['name'] + '.' + entitytype)
+            imported[entitytype] = timed(
+                timings, 'import_' + entitytype, entity_types[entitytype]['import'], filepath
+            )
+
+        if 'urdf' in imported:
+            resetScene()
+            timed(timings, 'build_urdf', models.buildModelFromDictionary, imported['urdf'])
+        return timings
+
+    def loadBaseline():
+        """Returns the stored baseline timings or an empty dictionary if there are none."""
+        if not os.path.isfile(BASELINE_FILE):
+            return {}
+        with open(BASELINE_FILE, 'r') as jsonfile:
+            return json.load(jsonfile)
+
+    def formatTimings(results, baseline):
+        """Creates a table of the benchmark timings compared to the baseline.
+
+        Args:
+          results(dict): timings of every robot
+          baseline(dict): baseline timings of every robot
+
+        Returns:
+          : str -- table with one line per robot and step
+
+        """
+        lines = ['{0:8s} {1:14s} {2:>10s} {3:>10s} {4:>7s}'.format(
+            'robot', 'step', 'time [s]', 'base [s]', 'ratio')]
+        for robot, timings in results.items():
+            for step, duration in timings.items():
+                reference = baseline.get(robot, {}).get(step)
+                if reference:
+                    lines.append('{0:8s} {1:14s} {2:10.3f} {3:10.3f} {4:7.2f}'.format(
+                        robot, step, duration, reference, duration / reference))
+                else:
+                    lines.append('{0:8s} {1:14s} {2:10.3f} {3:>10s} {4:>7s}'.format(
+                        robot, step, duration, '-', '-'))
+        return '\n'.join(lines)
+
+    class TestScaling(unittest.TestCase):
+
+        results = OrderedDict()
+
+        @classmethod
+        def setUpClass(cls):
+            outroot = tempfile.mkdtemp(prefix='phobos_benchmark_')
+            try:
+                for robot, config in ROBOTS.items():
+                    cls.results[robot] = benchmarkRobot(
+                        robot, config, os.path.join(outroot, robot))
+            finally:
+                shutil.rmtree(outroot, ignore_errors=True)
+            cls.baseline = loadBaseline()
+            print(formatTimings(cls.results, cls.baseline))
+
+        def test_exports(self):
+            # all benchmarked formats have to produce an export step
+            for robot, timings in self.results.items():
+                for exporttype in ENTITY_TYPES + MESH_TYPES:
+                    self.assertIn('export_' + exporttype, timings, robot)
+
+        def test_baseline(self):
+            if not self.baseline:
+                self.skipTest("No baseline stored in " + BASELINE_FILE)
+            regressions = []
+            for robot, timings in self.results.items():
+                for step, duration in timings.items():
+                    reference = self.baseline.get(robot, {}).get(step)
+                    if reference and max(duration, reference) > MIN_DURATION:
+                        if duration > reference * TOLERANCE:
+                            regressions.append('{0}/{1}: {2:.3f}s (baseline {3:.3f}s)'.format(
+                                robot, step, duration, reference))
+            self.assertFalse(regressions, 'Slower than baseline:\n' + '\n'.join(regressions))
+
+    # we have to manually invoke the test runner here, as we cannot use the CLI
+    suite = unittest.defaultTestLoader.loadTestsFromTestCase(TestScaling)
+    success = unittest.TextTestRunner().run(suite)
+
+    if success.errors:
+        raise Exception
+
+    if '--update-baseline' in sys.argv:
+        with open(BASELINE_FILE, 'w') as jsonfile:
+            json.dump(TestScaling.results, jsonfile, indent=2)
+        print('Stored new baseline in {}.'.format(BASELINE_FILE))
+    elif success.failures:
+        raise Exception
+
+except Exception:
+    sys.exit(1)
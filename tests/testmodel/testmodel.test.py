@@ -66,12 +66,62 @@ try:
 
             # TODO continue with joints
 
+    class TestPoseModel(unittest.TestCase):
+
+        def createPoseDictionary(self):
+            return {
+                'start': {'name': 'start', 'joints': {'shoulder': 0., 'elbow': 1.}},
+                'end': {'name': 'end', 'joints': {'shoulder': 2., 'wrist': 5.}},
+                'other': {'name': 'other', 'joints': {'gripper': 0.5}},
+            }
+
+        def test_setPose(self):
+            import numpy
+            library = phobos.model.poses.PoseLibrary(
+                {'start': {'name': 'start', 'joints': {'shoulder': 1.}}})
+            library.setPose('end', {'shoulder': 2., 'elbow': 3.})
+            self.assertListEqual(library.jointnames, ['shoulder', 'elbow'])
+            self.assertListEqual(library.posenames, ['start', 'end'])
+            # the existing pose does not define the new joint
+            start = library.getPositions('start')
+            self.assertEqual(start[0], 1.)
+            self.assertTrue(numpy.isnan(start[1]))
+            self.assertListEqual(library.getPositions('end').tolist(), [2., 3.])
+            # overwriting a pose removes the joints it does not define
+            library.setPose('start', {'elbow': 4.})
+            start = library.getPositions('start')
+            self.assertTrue(numpy.isnan(start[0]))
+            self.assertEqual(start[1], 4.)
+            self.assertListEqual(library.posenames, ['start', 'end'])
+
+        def test_interpolate(self):
+            import numpy
+            library = phobos.model.poses.PoseLibrary(self.createPoseDictionary())
+            positions = dict(zip(library.jointnames, library.interpolate('start', 'end', 0.25)))
+            self.assertAlmostEqual(positions['shoulder'], 0.5)
+            # joints defined by one pose keep its position
+            self.assertEqual(positions['elbow'], 1.)
+            self.assertEqual(positions['wrist'], 5.)
+            self.assertTrue(numpy.isnan(positions['gripper']))
+
+        def test_toDictionary(self):
+            posedict = self.createPoseDictionary()
+            library = phobos.model.poses.PoseLibrary(posedict)
+            self.assertDictEqual(library.toDictionary(), posedict)
+            copy = phobos.model.poses.PoseLibrary(library.toDictionary())
+            self.assertDictEqual(copy.toDictionary(), posedict)
+
     # we have to manually invoke the test runner here, as we cannot use the CLI
-    suite = unittest.defaultTestLoader.loadTestsFromTestCase(TestInertiaModel)
-    success = unittest.TextTestRunner().run(suite)
+    inertiatest = unittest.defaultTestLoader.loadTestsFromTestCase(TestInertiaModel)
+    posetest = unittest.defaultTestLoader.loadTestsFromTestCase(TestPoseModel)
+
+    results = []
+    results.append(unittest.TextTestRunner().run(inertiatest))
+    results.append(unittest.TextTestRunner().run(posetest))
 
-    if success.errors or success.failures:
-        raise Exception
+    for result in results:
+        if result.errors or result.failures:
+            raise Exception
 
 except Exception:
     sys.exit(1)
@@ -14,6 +14,11 @@ import unittest
 try:
     import mathutils as mathutils
     import phobos
+    # not imported on add-on registration
+    import phobos.utils.batch
+    import phobos.utils.dynamics
+    import phobos.utils.kinematics
+    import phobos.utils.rendering
 
     class TestBlenderUtils(unittest.TestCase):
 
@@ -213,17 +218,378 @@ try:
             target = ''
             self.assertEqual(phobos.utils.naming.stripNamespaceFromName(testname), target)
 
+    class TestBatchUtils(unittest.TestCase):
+
+        def test_splitJobs(self):
+            chunks = phobos.utils.batch.splitJobs([1, 2, 3, 4, 5], 2)
+            self.assertListEqual(chunks, [[1, 2], [3, 4], [5]])
+            self.assertListEqual(phobos.utils.batch.splitJobs([1, 2], 0), [[1], [2]])
+
+        def test_getFileHash(self):
+            import tempfile
+            import os
+
+            with tempfile.TemporaryDirectory() as tmpdir:
+                filepath = os.path.join(tmpdir, 'mesh.stl')
+                with open(filepath, 'w') as meshfile:
+                    meshfile.write('solid test')
+                cachedir = os.path.join(tmpdir, 'cache')
+                digest = phobos.utils.batch.getFileHash(filepath, cachedir)
+                self.assertEqual(digest, phobos.utils.batch.getFileHash(filepath))
+                self.assertEqual(len(os.listdir(os.path.join(cachedir, 'keys'))), 1)
+                self.assertEqual(digest, phobos.utils.batch.getFileHash(filepath, cachedir))
+
+    class TestRenderingUtils(unittest.TestCase):
+
+        def test_rasterize(self):
+            import numpy
+            # pixel coordinates and depth of a triangle covering the upper left half
+            pixels = numpy.array([[0., 0., 0.], [8., 0., 0.], [0., 8., 0.]])
+            triangleids = phobos.utils.rendering.rasterize(pixels, numpy.array([[0, 1, 2]]), 8)
+            rows, columns = numpy.indices((8, 8))
+            # pixel centers on the edge are covered
+            self.assertTrue(numpy.array_equal(triangleids >= 0, rows + columns <= 7))
+
+        def test_rasterize_depth(self):
+            import numpy
+            pixels = numpy.array([[0., 0., 1.], [8., 0., 1.], [0., 8., 1.],
+                                  [0., 0., .5], [8., 0., .5], [0., 8., .5]])
+            # the closer triangle (smaller depth) is visible regardless of the order
+            for triangles, closer in (([[0, 1, 2], [3, 4, 5]], 1), ([[3, 4, 5], [0, 1, 2]], 0)):
+                triangleids = phobos.utils.rendering.rasterize(pixels, numpy.array(triangles), 8)
+                self.assertSetEqual(set(triangleids.flatten()), {-1, closer})
+
+        def test_renderThumbnail(self):
+            # a green triangle below a red one, seen from above
+            vertices = [[0., 0., 0.], [1., 0., 0.], [0., 1., 0.],
+                        [0., 0., 1.], [1., 0., 1.], [0., 1., 1.]]
+            colors = [[0., 1., 0.], [1., 0., 0.]]
+            image = phobos.utils.rendering.renderThumbnail(
+                vertices, [[0, 1, 2], [3, 4, 5]], colors, resolution=20, direction=(0., 0., -1.))
+            self.assertTupleEqual(image.shape, (20, 20, 4))
+            # x points right and y up in the image
+            self.assertEqual(image[15, 4, 3], 255)
+            self.assertGreater(image[15, 4, 0], 0)
+            self.assertEqual(image[15, 4, 1], 0)
+            self.assertEqual(image[4, 15, 3], 0)
+
+        def test_writePNG(self):
+            import numpy
+            import os
+            import struct
+            import tempfile
+            import zlib
+            image = numpy.arange(2 * 3 * 4, dtype=numpy.uint8).reshape(2, 3, 4)
+            with tempfile.TemporaryDirectory() as tmpdir:
+                filepath = os.path.join(tmpdir, 'thumbnails', 'image.png')
+                phobos.utils.rendering.writePNG(filepath, image)
+                with open(filepath, 'rb') as pngfile:
+                    data = pngfile.read()
+            self.assertEqual(data[:8], b'\x89PNG\r\n\x1a\n')
+            length, tag = struct.unpack('>I4s', data[8:16])
+            self.assertEqual(tag, b'IHDR')
+            self.assertEqual(length, 13)
+            # width, height, bit depth, colour type RGBA, compression, filter and interlacing
+            self.assertTupleEqual(struct.unpack('>IIBBBBB', data[16:29]), (3, 2, 8, 6, 0, 0, 0))
+            self.assertEqual(struct.unpack('>I', data[29:33])[0], zlib.crc32(data[12:29]))
+            length, tag = struct.unpack('>I4s', data[33:41])
+            self.assertEqual(tag, b'IDAT')
+            rows = numpy.frombuffer(zlib.decompress(data[41:41 + length]), dtype=numpy.uint8)
+            self.assertTrue(numpy.array_equal(rows.reshape(2, -1)[:, 1:], image.reshape(2, -1)))
+            self.assertTrue(data.endswith(b'IEND' + struct.pack('>I', zlib.crc32(b'IEND'))))
+
+        def test_readMeshFile(self):
+            import numpy
+            import os
+            import tempfile
+            with tempfile.TemporaryDirectory() as tmpdir:
+                filepath = os.path.join(tmpdir, 'mesh.obj')
+                with open(filepath, 'w') as objfile:
+                    objfile.write('v 1 2 3\nv 4 5 6\nv 7 8 9\nv 0 0 0\n'
+                                  'vn 0 1 0\nf 1//1 2//1 3//1\nf -4 -3 -2 -1\n')
+                vertices, triangles = phobos.utils.rendering.readMeshFile(filepath)
+            # the Y up axis is converted to Z up
+            self.assertTrue(numpy.array_equal(
+                vertices, [[1., -3., 2.], [4., -6., 5.], [7., -9., 8.], [0., 0., 0.]]))
+            self.assertListEqual(triangles.tolist(), [[0, 1, 2], [0, 1, 2], [0, 2, 3]])
+
+    class TestHierarchyUtils(unittest.TestCase):
+
+        def createLinkTree(self):
+            # two trees: a with the branches b (d, e) and c (f), and x with y
+            parents = {'a': None, 'b': 'a', 'c': 'a', 'd': 'b', 'e': 'b', 'f': 'c', 'x': None,
+                       'y': 'x'}
+            return phobos.utils.hierarchy.LinkTree(parents)
+
+        def test_getCommonAncestor(self):
+            tree = self.createLinkTree()
+            self.assertEqual(tree.getCommonAncestor('d', 'f'), 'a')
+            self.assertEqual(tree.getCommonAncestor('d', 'e'), 'b')
+            self.assertEqual(tree.getCommonAncestor('d', 'b'), 'b')
+            self.assertEqual(tree.getCommonAncestor('a', 'a'), 'a')
+            self.assertIsNone(tree.getCommonAncestor('d', 'y'))
+
+        def test_getCommonAncestor_chain(self):
+            # a long chain with a branch, so that the ancestors are skipped in powers of two
+            parents = {'l0': None}
+            parents.update({'l' + str(i): 'l' + str(i - 1) for i in range(1, 20)})
+            parents['m0'] = 'l5'
+            parents['m1'] = 'm0'
+            tree = phobos.utils.hierarchy.LinkTree(parents)
+            self.assertEqual(tree.getCommonAncestor('l19', 'm1'), 'l5')
+            self.assertEqual(tree.getCommonAncestor('m1', 'l6'), 'l5')
+            self.assertListEqual(tree.getAncestors('m0'), ['l' + str(i) for i in range(5, -1, -1)])
+
+        def test_getPath(self):
+            tree = self.createLinkTree()
+            self.assertListEqual(tree.getPath('d', 'f'), ['d', 'b', 'a', 'c', 'f'])
+            self.assertListEqual(tree.getPath('e', 'a'), ['e', 'b', 'a'])
+            self.assertListEqual(tree.getPath('d', 'd'), ['d'])
+            self.assertIsNone(tree.getPath('d', 'y'))
+
+        def test_getLeaves(self):
+            tree = self.createLinkTree()
+            self.assertListEqual(tree.getLeaves('a'), ['d', 'e', 'f'])
+            self.assertListEqual(tree.getLeaves('c'), ['f'])
+            self.assertListEqual(tree.getLeaves('x'), ['y'])
+            self.assertListEqual(tree.getSubtree('b'), ['b', 'd', 'e'])
+
+        def test_getLeaves_include(self):
+            tree = self.createLinkTree()
+            # the subtrees of rejected links are left out
+            self.assertListEqual(tree.getLeaves('a', lambda name: name != 'c'), ['d', 'e'])
+            # links whose children are all rejected are leaves
+            self.assertListEqual(tree.getLeaves('a', lambda name: name not in ('d', 'e')), ['b', 'f'])
+            self.assertListEqual(tree.getLeaves('a', lambda name: False), ['a'])
+
+    class TestKinematicsUtils(unittest.TestCase):
+
+        @staticmethod
+        def createLink(name, parent, translation, mass=0., com=(0., 0., 0.)):
+            return {
+                'name': name,
+                'parent': parent,
+                'pose': {'translation': translation, 'rotation_euler': [0., 0., 0.]},
+                'inertial': {
+                    'mass': mass,
+                    'inertia': [0., 0., 0., 0., 0., 0.],
+                    'pose': {'translation': list(com), 'rotation_euler': [0., 0., 0.]},
+                },
+            }
+
+        def createArm(self):
+            # planar arm with two revolute joints about z and two links of length 1
+            model = {
+                'name': 'arm',
+                'links': {
+                    'base': self.createLink('base', None, [0., 0., 0.]),
+                    'upper': self.createLink('upper', 'base', [0., 0., 0.]),
+                    'lower': self.createLink('lower', 'upper', [1., 0., 0.]),
+                    'tip': self.createLink('tip', 'lower', [1., 0., 0.]),
+                },
+                'joints': {
+                    'upper': {'name': 'upper', 'parent': 'base', 'child': 'upper',
+                              'type': 'continuous', 'axis': [0., 0., 1.]},
+                    'lower': {'name': 'lower', 'parent': 'upper', 'child': 'lower',
+                              'type': 'continuous', 'axis': [0., 0., 1.]},
+                    'tip': {'name': 'tip', 'parent': 'lower', 'child': 'tip', 'type': 'fixed'},
+                },
+            }
+            return model
+
+        def test_computeMassProperties(self):
+            import numpy
+            # point masses of 3 at the joint and 1 at a distance of 2 on the arm
+            model = {
+                'name': 'rotor',
+                'links': {
+                    'base': self.createLink('base', None, [0., 0., 0.], 3.),
+                    'arm': self.createLink('arm', 'base', [0., 0., 0.], 1., [2., 0., 0.]),
+                },
+                'joints': {
+                    'arm': {'name': 'arm', 'parent': 'base', 'child': 'arm',
+                            'type': 'continuous', 'axis': [0., 0., 1.]},
+                },
+            }
+            angles = numpy.linspace(-numpy.pi, numpy.pi, 9)
+            properties = phobos.utils.kinematics.computeMassProperties(
+                model, angles[:, None], subtrees=['arm'], chunksize=4)
+            cos, sin = numpy.cos(angles), numpy.sin(angles)
+            self.assertAlmostEqual(properties['mass'], 4.)
+            self.assertTrue(numpy.allclose(
+                properties['com'], numpy.column_stack((0.5 * cos, 0.5 * sin, 0. * cos))))
+            # parallel axis theorem: 3 * 0.5^2 + 1 * 1.5^2 = 3 about the com
+            expected = numpy.zeros((len(angles), 3, 3))
+            expected[:, 0, 0] = 3. * sin ** 2
+            expected[:, 1, 1] = 3. * cos ** 2
+            expected[:, 0, 1] = expected[:, 1, 0] = -3. * cos * sin
+            expected[:, 2, 2] = 3.
+            self.assertTrue(numpy.allclose(properties['inertia'], expected))
+            arm = properties['subtrees']['arm']
+            self.assertAlmostEqual(arm['mass'], 1.)
+            self.assertTrue(numpy.allclose(arm['com'], 4. * properties['com']))
+            self.assertTrue(numpy.allclose(arm['inertia'], 0.))
+
+        def test_computeWorkspace(self):
+            import numpy
+            workspace = phobos.utils.kinematics.computeWorkspace(
+                self.createArm(), 'tip', samples=200000, voxelsize=0.1, manipulability=True,
+                seed=0, chunksize=50000)
+            self.assertListEqual(workspace['jointnames'], ['upper', 'lower'])
+            self.assertEqual(workspace['counts'].sum(), 200000)
+            # the arm reaches the disk of radius 2 in the plane z = 0
+            self.assertTrue(numpy.all(workspace['voxels'][:, 2] == 0))
+            centers = phobos.utils.kinematics.getVoxelCenters(workspace)
+            self.assertLessEqual(numpy.linalg.norm(centers[:, :2], axis=1).max(), 2. + 0.075)
+            disk = numpy.pi * 2. ** 2 / 0.1 ** 2
+            self.assertGreater(len(workspace['voxels']), 0.95 * disk)
+            self.assertLess(len(workspace['voxels']), disk + 4. * numpy.pi * 2. / 0.1)
+            # the manipulability of the arm is |sin(lower)|
+            self.assertLessEqual(workspace['manipulability'].max(), 1. + 1e-6)
+            self.assertGreater(workspace['manipulability'].max(), 0.99)
+
+        def test_computeWorkspace_fixed(self):
+            import numpy
+            model = self.createArm()
+            for endlink, startlink in (('base', None), ('tip', 'lower')):
+                workspace = phobos.utils.kinematics.computeWorkspace(
+                    model, endlink, startlink, samples=100, manipulability=True, seed=0)
+                self.assertListEqual(workspace['jointnames'], [])
+                self.assertEqual(len(workspace['voxels']), 1)
+                self.assertTrue(numpy.all(workspace['manipulability'] == 0.))
+
+        def test_getVoxelKeys(self):
+            import numpy
+            limit = phobos.utils.kinematics.VOXEL_OFFSET
+            indices = numpy.array([[0, 0, 0], [-3, 0, 7], [5, -1, -2], [-limit, limit - 1, 1]])
+            keys = phobos.utils.kinematics.getVoxelKeys(indices)
+            self.assertEqual(len(numpy.unique(keys)), len(indices))
+            self.assertTrue(numpy.array_equal(
+                phobos.utils.kinematics.getVoxelIndices(keys), indices))
+
+        def test_saveWorkspace(self):
+            import numpy
+            import os
+            import tempfile
+            workspace = phobos.utils.kinematics.computeWorkspace(
+                self.createArm(), 'tip', samples=1000, voxelsize=0.2, manipulability=True, seed=0)
+            with tempfile.TemporaryDirectory() as tmpdir:
+                filepath = os.path.join(tmpdir, 'workspace.npz')
+                phobos.utils.kinematics.saveWorkspace(filepath, workspace)
+                loaded = phobos.utils.kinematics.loadWorkspace(filepath)
+            self.assertSetEqual(set(loaded), set(workspace))
+            self.assertListEqual(loaded['jointnames'], workspace['jointnames'])
+            self.assertEqual(loaded['voxelsize'], workspace['voxelsize'])
+            for name in ('voxels', 'counts', 'manipulability'):
+                self.assertTrue(numpy.array_equal(loaded[name], workspace[name]))
+
+    class TestDynamicsUtils(unittest.TestCase):
+
+        @staticmethod
+        def createLink(name, parent, translation, mass, com):
+            return {
+                'name': name,
+                'parent': parent,
+                'pose': {'translation': translation, 'rotation_euler': [0., 0., 0.]},
+                'inertial': {
+                    'mass': mass,
+                    'inertia': [0.01, 0., 0., 0.01, 0., 0.01],
+                    'pose': {'translation': com, 'rotation_euler': [0., 0., 0.]},
+                },
+            }
+
+        def createPendulum(self):
+            model = {
+                'name': 'pendulum',
+                'links': {
+                    'base': self.createLink('base', None, [0., 0., 0.], 5., [0., 0., 0.]),
+                    'arm': self.createLink('arm', 'base', [0., 0., 1.], 2., [0.5, 0., 0.]),
+                },
+                'joints': {
+                    'arm': {
+                        'name': 'arm', 'parent': 'base', 'child': 'arm', 'type': 'revolute',
+                        'axis': [0., -1., 0.], 'limits': {'lower': -1.5, 'upper': 1.5, 'effort': 5.},
+                    },
+                },
+            }
+            return model
+
+        def test_inverseDynamics_pendulum(self):
+            import numpy
+            model = self.createPendulum()
+            positions = numpy.linspace(-1.5, 1.5, 7)[:, None]
+            stillstand = numpy.zeros(positions.shape)
+            efforts = phobos.utils.dynamics.inverseDynamics(
+                model, positions, stillstand, stillstand)
+            # holding torque m * g * l * cos(q)
+            expected = 2. * 9.81 * 0.5 * numpy.cos(positions)
+            self.assertTrue(numpy.allclose(efforts, expected))
+
+        def test_inverseDynamics_fixed(self):
+            import numpy
+            model = self.createPendulum()
+            model['links']['tip'] = self.createLink('tip', 'arm', [1., 0., 0.], 1., [0., 0., 0.])
+            model['joints']['tip'] = {
+                'name': 'tip', 'parent': 'arm', 'child': 'tip', 'type': 'fixed'}
+            positions = numpy.array([[0.], [0.5]])
+            stillstand = numpy.zeros(positions.shape)
+            efforts = phobos.utils.dynamics.inverseDynamics(
+                model, positions, stillstand, stillstand)
+            # the fixed tip adds its load to the arm joint without a joint variable
+            expected = (2. * 0.5 + 1. * 1.) * 9.81 * numpy.cos(positions)
+            self.assertTrue(numpy.allclose(efforts, expected))
+
+        def test_inverseDynamics_prismatic(self):
+            model = {
+                'name': 'slider',
+                'links': {
+                    'base': self.createLink('base', None, [0., 0., 0.], 1., [0., 0., 0.]),
+                    'slide': self.createLink('slide', 'base', [1., 0., 0.], 3., [0., 0., 0.5]),
+                },
+                'joints': {
+                    'slide': {
+                        'name': 'slide', 'parent': 'base', 'child': 'slide', 'type': 'prismatic',
+                        'axis': [0., 0., 1.], 'limits': {'lower': 0., 'upper': 1.},
+                    },
+                },
+            }
+            efforts = phobos.utils.dynamics.inverseDynamics(model, [[0.3]], [[1.]], [[2.]])
+            self.assertAlmostEqual(efforts[0, 0], 3. * (2. + 9.81))
+
+        def test_checkMotorLimits(self):
+            import numpy
+            model = self.createPendulum()
+            positions = numpy.zeros((1, 1))
+            exceeded = phobos.utils.dynamics.checkMotorLimits(
+                model, positions, positions, positions)
+            self.assertEqual(len(exceeded), 1)
+            self.assertEqual(exceeded[0]['joint'], 'arm')
+            self.assertAlmostEqual(exceeded[0]['effort'], 9.81)
+            model['motors'] = {'motor': {'name': 'motor', 'joint': 'arm', 'maxEffort': 20.}}
+            self.assertListEqual(phobos.utils.dynamics.checkMotorLimits(
+                model, positions, positions, positions), [])
+
     # we have to manually invoke the test runner here, as we cannot use the CLI
     blenderutilstest = unittest.defaultTestLoader.loadTestsFromTestCase(TestBlenderUtils)
     generalutilstest = unittest.defaultTestLoader.loadTestsFromTestCase(TestGeneralUtils)
     ioutilstest = unittest.defaultTestLoader.loadTestsFromTestCase(TestIOUtils)
     namingutilstest = unittest.defaultTestLoader.loadTestsFromTestCase(TestNamingUtils)
+    batchutilstest = unittest.defaultTestLoader.loadTestsFromTestCase(TestBatchUtils)
+    renderingutilstest = unittest.defaultTestLoader.loadTestsFromTestCase(TestRenderingUtils)
+    hierarchyutilstest = unittest.defaultTestLoader.loadTestsFromTestCase(TestHierarchyUtils)
+    kinematicsutilstest = unittest.defaultTestLoader.loadTestsFromTestCase(TestKinematicsUtils)
+    dynamicsutilstest = unittest.defaultTestLoader.loadTestsFromTestCase(TestDynamicsUtils)
 
     results = []
     results.append(unittest.TextTestRunner().run(blenderutilstest))
     results.append(unittest.TextTestRunner().run(generalutilstest))
     results.append(unittest.TextTestRunner().run(ioutilstest))
     results.append(unittest.TextTestRunner().run(namingutilstest))
+    results.append(unittest.TextTestRunner().run(batchutilstest))
+    results.append(unittest.TextTestRunner().run(renderingutilstest))
+    results.append(unittest.TextTestRunner().run(hierarchyutilstest))
+    results.append(unittest.TextTestRunner().run(kinematicsutilstest))
+    results.append(unittest.TextTestRunner().run(dynamicsutilstest))
 
     for result in results:
         if result.errors or result.failures: